@@ -0,0 +1,146 @@
+"""Semantic response cache for LLM-generated FAQ answers.
+
+Entries are keyed by the query embedding plus the ids of the FAQ rows that
+were retrieved for it. A lookup hits when an entry with the same retrieved
+ids has a cosine similarity to the new query at or above ``threshold``, so
+paraphrases of the same question share one generated answer.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+
+ENTRY_OVERHEAD_BYTES= 256
+
+
+@dataclass
+class CacheEntry:
+    vector: np.ndarray
+    ids: tuple
+    answer: str
+    created: float
+    size: int
+
+
+class SemanticCache:
+    """Bounded LRU/TTL cache matched by embedding similarity.
+
+    Args:
+        threshold: Minimum cosine similarity for a hit. Vectors are expected
+            to be L2-normalised, so this is a plain dot product.
+        max_entries: Maximum number of cached answers.
+        max_bytes: Approximate memory bound over vectors and answer text.
+        ttl: Seconds an entry stays valid; ``0`` disables expiry.
+    """
+
+    def __init__(self, threshold=0.92, max_entries=1024, max_bytes=8 * 1024 * 1024, ttl=3600):
+        self.threshold= threshold
+        self.max_entries= max_entries
+        self.max_bytes= max_bytes
+        self.ttl= ttl
+        self.hits= 0
+        self.misses= 0
+        self._entries= OrderedDict()
+        self._by_ids= {}
+        self._bytes= 0
+        self._next_key= 0
+        self._lock= threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        total= self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
+
+    def get(self, vector, ids):
+        """Return the cached answer for a similar query, or None."""
+        vector= np.asarray(vector, dtype=np.float32)
+        ids= tuple(ids)
+        now= time.monotonic()
+        with self._lock:
+            best_key, best_score= None, self.threshold
+            for key in list(self._by_ids.get(ids, ())):
+                entry= self._entries[key]
+                if self.ttl and now - entry.created > self.ttl:
+                    self._remove(key)
+                    continue
+                score= float(np.dot(entry.vector, vector))
+                if score >= best_score:
+                    best_key, best_score= key, score
+            if best_key is None:
+                self.misses+= 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits+= 1
+            return self._entries[best_key].answer
+
+    def put(self, vector, ids, answer):
+        vector= np.array(vector, dtype=np.float32)
+        ids= tuple(ids)
+        size= vector.nbytes + len(answer.encode('utf-8')) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            key= self._next_key
+            self._next_key+= 1
+            self._entries[key]= CacheEntry(vector, ids, answer, time.monotonic(), size)
+            self._by_ids.setdefault(ids, []).append(key)
+            self._bytes+= size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_ids.clear()
+            self._bytes= 0
+
+    def _remove(self, key):
+        entry= self._entries.pop(key)
+        self._bytes-= entry.size
+        keys= self._by_ids[entry.ids]
+        keys.remove(key)
+        if not keys:
+            del self._by_ids[entry.ids]
+
+
+def replay(answer):
+    """Yield a cached answer in word-sized chunks, like an LLM stream."""
+    yield from re.findall(r"\S+\s*|\s+", answer)
+
+
+def cached_stream(stream, on_complete):
+    """Pass ``stream`` through and hand the full text to ``on_complete``.
+
+    The answer is only stored when the stream finishes; a consumer that stops
+    early or an upstream error leaves the cache untouched.
+    """
+    chunks= []
+    for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    on_complete("".join(chunks))
+
+
+def cache_from_env():
+    """Build the FAQ answer cache from ``FAQ_CACHE_*`` environment variables."""
+    return SemanticCache(
+        threshold= float(os.getenv("FAQ_CACHE_THRESHOLD", "0.92")),
+        max_entries= int(os.getenv("FAQ_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes= int(os.getenv("FAQ_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+        ttl= float(os.getenv("FAQ_CACHE_TTL", "3600")),
+    )
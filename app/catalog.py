@@ -0,0 +1,311 @@
+"""In-memory columnar engine for rule-parsed product queries.
+
+Every question the rule parser accepts is a conjunction of brand, price,
+discount, rating and rating-count bounds, optionally sorted with a LIMIT.
+``ColumnarCatalog`` loads those columns of ``product`` once into NumPy
+arrays, with ``brand_norm`` dictionary-encoded to integer codes, and
+evaluates a ``ProductQuery`` with vectorised masks:
+
+* brand filters start from per-brand posting lists instead of every row;
+* sorts the rule parser emits (cheapest, most expensive, best rated) walk a
+  permutation presorted at load time, and stop at the first k matches;
+* other sorts take the top k with ``argpartition`` instead of a full sort;
+* LIMITed queries evaluate rows in growing blocks and stop early, the way
+  SQLite stops an index walk.
+
+Only the selected rows are then read from SQLite by rowid, so results have
+exactly the columns and values of ``SELECT * FROM product``.
+
+Ties in ORDER BY are broken by rowid. Unsorted queries return rows in rowid
+order; SQLite may pick other rows when it walks an index instead. Full-text
+``terms`` are left to SQLite (see ``supports``).
+
+The engine checks the database file (and its WAL) on every query. When it
+has changed, a new snapshot is loaded on a background thread and swapped in
+with one reference assignment, so queries never see a half-loaded catalog.
+Rows are only returned when the file still matches the snapshot after they
+were fetched. Otherwise (a reload is pending, or the file changed mid-query)
+``query`` returns None and the caller asks SQLite instead, so rowids from
+one version of the table are never read from another.
+
+    python benchmarks/catalog_engine.py --sizes 1000 1000000
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from db import QueryResult
+
+
+NUMERIC_COLUMNS= ("price", "discount", "avg_rating", "total_ratings")
+LOAD_CHUNK= 100_000
+FETCH_CHUNK= 500
+FIRST_BLOCK= 4096
+# (column, descending) orders the rule parser emits; presorted at load time
+PRESORTED= (("price", False), ("price", True), ("avg_rating", True))
+# ProductQuery bound -> (column, comparison); NULLs are NaN and fail every comparison, as in SQL
+FILTERS= (
+    ("min_price", "price", np.greater_equal),
+    ("max_price", "price", np.less_equal),
+    ("price_above", "price", np.greater),
+    ("price_below", "price", np.less),
+    ("min_discount", "discount", np.greater_equal),
+    ("max_discount", "discount", np.less_equal),
+    ("discount_above", "discount", np.greater),
+    ("min_rating", "avg_rating", np.greater_equal),
+    ("rating_above", "avg_rating", np.greater),
+    ("min_total_ratings", "total_ratings", np.greater_equal),
+    ("total_ratings_above", "total_ratings", np.greater),
+)
+
+
+class Snapshot(NamedTuple):
+    """One immutable load of the catalog."""
+
+    rowids: np.ndarray
+    columns: dict
+    brand_codes: np.ndarray
+    brand_index: dict
+    brand_positions: np.ndarray
+    brand_offsets: np.ndarray
+    orders: dict
+    output_columns: tuple
+    stamp: tuple
+    user_version: int
+    load_seconds: float
+
+    def __len__(self):
+        return len(self.rowids)
+
+
+def file_stamp(path):
+    """Identity, size and mtime of the database file and its WAL."""
+    stamp= []
+    for suffix in ("", "-wal"):
+        try:
+            stat= os.stat(f"{path}{suffix}")
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(stamp)
+
+
+def load_snapshot(path):
+    """Read the filter columns of ``product`` into a ``Snapshot``."""
+    start= time.perf_counter()
+    stamp= file_stamp(path)
+    conn= sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True, isolation_level=None)
+    try:
+        # One read transaction, so the row count and the rows agree
+        conn.execute("BEGIN")
+        user_version= conn.execute("PRAGMA user_version").fetchone()[0]
+        output_columns= tuple(d[0] for d in conn.execute("SELECT * FROM product LIMIT 0").description)
+        n= conn.execute("SELECT COUNT(*) FROM product").fetchone()[0]
+        rowids= np.empty(n, dtype=np.int64)
+        columns= {name: np.empty(n, dtype=np.float64) for name in NUMERIC_COLUMNS}
+        brand_codes= np.empty(n, dtype=np.int32)
+        brand_index= {}
+        cursor= conn.execute(
+            f"SELECT rowid, {', '.join(NUMERIC_COLUMNS)}, brand_norm FROM product ORDER BY rowid")
+        offset= 0
+        while chunk := cursor.fetchmany(LOAD_CHUNK):
+            block= np.array(chunk, dtype=object)
+            end= offset + len(chunk)
+            rowids[offset:end]= block[:, 0].astype(np.int64)
+            for i, name in enumerate(NUMERIC_COLUMNS, start=1):
+                columns[name][offset:end]= block[:, i].astype(np.float64)
+            brand_codes[offset:end]= [brand_index.setdefault(b or "", len(brand_index)) for b in block[:, -1]]
+            offset= end
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    index_type= np.int32 if n < 2**31 else np.int64
+    # Row positions grouped by brand; rows are in rowid order, so each group is too
+    brand_positions= np.argsort(brand_codes, kind="stable").astype(index_type)
+    brand_offsets= np.searchsorted(brand_codes[brand_positions], np.arange(len(brand_index) + 1))
+    positions= np.arange(n)
+    orders= {(column, descending): np.lexsort((positions, sort_key(columns[column], descending))).astype(index_type)
+             for column, descending in PRESORTED}
+    return Snapshot(rowids, columns, brand_codes, brand_index, brand_positions, brand_offsets, orders,
+                    output_columns, stamp, user_version, time.perf_counter() - start)
+
+
+def sort_key(values, descending):
+    """Ascending key matching SQLite's order: NULLs first ascending, last descending."""
+    if descending:
+        return np.where(np.isnan(values), np.inf, -values)
+    return np.where(np.isnan(values), -np.inf, values)
+
+
+def first_matches(matches, limit, positions=None, total=0):
+    """The first ``limit`` hits of ``matches`` over ``positions`` (or rows
+    ``0..total``), evaluated in doubling blocks so a common match stops early."""
+    length= total if positions is None else len(positions)
+    found, count, start, block= [], 0, 0, FIRST_BLOCK
+    while start < length and count < limit:
+        end= min(start + block, length)
+        hits= matches(slice(start, end) if positions is None else positions[start:end])
+        found.append(hits)
+        count+= len(hits)
+        start, block= end, block * 2
+    return np.concatenate(found)[:limit] if found else np.empty(0, dtype=np.int64)
+
+
+class ColumnarCatalog:
+    """Vectorised filter/sort/top-k over an in-memory copy of ``product``.
+
+    Args:
+        path: SQLite catalog file.
+        fetch_rows: ``fn(sql, params) -> QueryResult`` used to read the
+            selected rows, e.g. a ``QueryExecutor`` without a row cap.
+        background: Reload on a daemon thread when the file changes;
+            ``query`` returns None until the new snapshot is ready.
+    """
+
+    def __init__(self, path, fetch_rows, background=True):
+        self.path= Path(path)
+        self.fetch_rows= fetch_rows
+        self.background= background
+        self.reloads= 0
+        self._snapshot= load_snapshot(self.path)
+        self._attempted= self._snapshot.stamp
+        self._reload_lock= threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @staticmethod
+    def supports(spec):
+        """Whether ``spec`` can be answered without SQLite's full-text index."""
+        return not spec.terms and (spec.order_by is None or spec.order_by in NUMERIC_COLUMNS)
+
+    def refresh(self, stamp=None):
+        """Start a reload if the file changed. Returns True if one started."""
+        if stamp is None:
+            stamp= file_stamp(self.path)
+        # A stamp whose load failed is not retried until the file changes again
+        if stamp in (self._snapshot.stamp, self._attempted):
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self._attempted= stamp
+        if self.background:
+            threading.Thread(target=self._reload, name="catalog-reload", daemon=True).start()
+        else:
+            self._reload()
+        return True
+
+    def _reload(self):
+        try:
+            self._snapshot= load_snapshot(self.path)
+            self.reloads+= 1
+        except (sqlite3.Error, OSError) as e:
+            print(f"Catalog reload failed, keeping the previous snapshot: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def select(self, spec, max_rows=None, snapshot=None):
+        """Rowids matching ``spec``, in result order, at most ``max_rows``."""
+        snapshot= snapshot or self._snapshot
+        n= len(snapshot)
+        tests= [(snapshot.columns[column], compare, getattr(spec, attr))
+                for attr, column, compare in FILTERS if getattr(spec, attr) is not None]
+        postings= brand_lookup= None
+        if spec.brands:
+            codes= [snapshot.brand_index[b] for b in spec.brands if b in snapshot.brand_index]
+            postings= [snapshot.brand_positions[snapshot.brand_offsets[c]:snapshot.brand_offsets[c + 1]] for c in codes]
+            brand_lookup= np.zeros(len(snapshot.brand_index), dtype=bool)
+            brand_lookup[codes]= True
+        matched= sum(len(p) for p in postings) if postings is not None else n
+
+        def matches(rows, check_brand=False):
+            mask= brand_lookup[snapshot.brand_codes[rows]] if check_brand else None
+            for values, compare, bound in tests:
+                hit= compare(values[rows], bound)
+                mask= hit if mask is None else mask & hit
+            if isinstance(rows, slice):
+                return np.arange(rows.start, rows.stop) if mask is None else np.flatnonzero(mask) + rows.start
+            return rows if mask is None else rows[mask]
+
+        def candidates():
+            # Rows of the requested brands in position order; one brand is a view, no copy
+            if postings is None:
+                return slice(0, n)
+            if len(postings) == 1:
+                return postings[0]
+            return np.sort(np.concatenate([np.empty(0, dtype=snapshot.brand_positions.dtype), *postings]))
+
+        limits= [v for v in (spec.limit, max_rows) if v is not None]
+        limit= min(limits) if limits else None
+        # Scanning in order with a brand check beats gathering the brands' rows unless they are rare
+        scan= limit is not None and matched ** 2 > limit * n
+        if spec.order_by:
+            order= snapshot.orders.get((spec.order_by, spec.descending))
+            if scan and order is not None:
+                index= first_matches(lambda rows: matches(rows, check_brand=postings is not None), limit, order)
+            else:
+                index= matches(candidates())
+                key= sort_key(snapshot.columns[spec.order_by][index], spec.descending)
+                picked= np.arange(len(index))
+                if limit is not None and limit < len(index):
+                    # Top-k, widened to every row tied with the k-th so the position tie-break is exact
+                    kth= key[np.argpartition(key, limit - 1)[limit - 1]]
+                    picked= np.flatnonzero(key <= kth)
+                index= index[picked[np.lexsort((index[picked], key[picked]))][:limit]]
+        elif limit is not None:
+            if postings is not None and len(postings) == 1:
+                index= first_matches(matches, limit, postings[0])
+            elif postings is None or scan:
+                index= first_matches(lambda rows: matches(rows, check_brand=postings is not None), limit, total=n)
+            else:
+                index= first_matches(matches, limit, candidates())
+        else:
+            index= matches(candidates())
+        return snapshot.rowids[index]
+
+    def query(self, spec, max_rows=None):
+        """Evaluate ``spec`` and return the rows as ``SELECT * FROM product`` would.
+
+        Returns:
+            The ``QueryResult``, or None when the snapshot does not match
+            the file (see the module docstring).
+
+        Raises:
+            ValueError: If ``supports(spec)`` is false.
+        """
+        if not self.supports(spec):
+            raise ValueError("full-text terms need SQLite")
+        stamp= file_stamp(self.path)
+        snapshot= self._snapshot
+        if stamp != snapshot.stamp:
+            self.refresh(stamp)
+            snapshot= self._snapshot
+            if stamp != snapshot.stamp:
+                return None
+        result= self.fetch(self.select(spec, max_rows, snapshot), snapshot)
+        # The executor reopens its connection when the file moves, so an unchanged stamp means
+        # the rowids were read from the same table version they were selected from
+        return result if file_stamp(self.path) == snapshot.stamp else None
+
+    def fetch(self, rowids, snapshot=None):
+        """Full rows for ``rowids``, in the given order."""
+        rowids= [int(r) for r in rowids]
+        by_id= {}
+        for start in range(0, len(rowids), FETCH_CHUNK):
+            chunk= rowids[start:start + FETCH_CHUNK]
+            result= self.fetch_rows(
+                f"SELECT rowid, * FROM product WHERE rowid IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+            by_id.update((row[0], row[1:]) for row in result.rows)
+        # A row deleted since the snapshot was loaded is skipped
+        return QueryResult((snapshot or self._snapshot).output_columns, [by_id[r] for r in rowids if r in by_id])
@@ -0,0 +1,53 @@
+"""Thin streaming client for the async backend in ``server.py``.
+
+Lets the Streamlit UI forward queries to a shared backend instead of running
+the pipeline in its own script thread.
+"""
+
+import http.client
+import json
+from urllib.parse import urlsplit
+
+
+BUSY_MESSAGE= "The assistant is busy right now, please try again in a moment."
+
+
+def stream_answer(base_url, query, timeout=120, history=()):
+    """POST ``query`` to ``<base_url>/ask`` and yield the streamed answer chunks.
+
+    Args:
+        base_url: Backend address, e.g. ``http://127.0.0.1:8000``.
+        query: The user's question.
+        timeout: Socket timeout in seconds.
+        history: Earlier conversation messages sent along with the query.
+    """
+    parts= urlsplit(base_url)
+    connection_class= http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn= connection_class(parts.hostname, parts.port, timeout=timeout)
+    try:
+        conn.request("POST", parts.path.rstrip("/") + "/ask", body=json.dumps({"query": query, "history": list(history)}),
+                     headers={"Content-Type": "application/json", "Accept": "text/event-stream"})
+        response= conn.getresponse()
+        if response.status == 503:
+            yield BUSY_MESSAGE
+            return
+        if response.status != 200:
+            yield f"An error occurred: backend returned HTTP {response.status}"
+            return
+        event= None
+        for raw in response:
+            line= raw.decode("utf-8").rstrip("\r\n")
+            if not line:
+                event= None
+            elif line.startswith("event:"):
+                event= line[len("event:"):].strip()
+                if event == "done":
+                    return
+            elif line.startswith("data:"):
+                payload= json.loads(line[len("data:"):])
+                if event == "error":
+                    yield f"An error occurred: {payload.get('error')}"
+                    return
+                yield payload.get("text", "")
+    finally:
+        conn.close()
@@ -0,0 +1,210 @@
+"""Bounded conversation context for follow-up questions.
+
+A ``Conversation`` keeps the last ``keep_messages`` messages verbatim and
+folds everything older into one rolling summary, so the context sent to the
+LLM stays within ``token_budget`` however long the session runs. Messages
+that fall out of the verbatim window are summarised on a background thread,
+together with the previous summary. Until that finishes they are still
+included verbatim (subject to the budget), so a turn never waits for the
+summary.
+
+``context()`` returns chat messages ready to be placed between a handler's
+system prompt and the user's question. They only use the ``user`` and
+``assistant`` roles (the summary is a ``user`` message), so a client can
+send them back as history without being able to inject system prompts.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from serialize import count_tokens
+
+
+logger= logging.getLogger(__name__)
+
+CONVERSATION_KEEP_MESSAGES= int(os.getenv("CONVERSATION_KEEP_MESSAGES", "6"))
+CONVERSATION_TOKEN_BUDGET= int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1024"))
+CONVERSATION_SUMMARY_TOKENS= int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "256"))
+# "llm" asks the model for the summary; "extractive" keeps the user's questions only
+CONVERSATION_SUMMARY= os.getenv("CONVERSATION_SUMMARY", "llm")
+# Assistant replies are mostly product lists; their head is enough to resolve "cheaper ones"
+MESSAGE_MAX_TOKENS= 128
+MIN_PARTIAL_TOKENS= 32
+
+summary_prompt= """You maintain a running summary of a conversation between a shopper and an e-commerce assistant.
+You are given the current summary and the messages that followed it. Write the updated summary in at most {words} words.
+Keep the products, brands, price ranges, discounts, ratings and policies the shopper asked about, and what the assistant offered.
+Leave out greetings and small talk. Reply with the summary only."""
+
+_executor= ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarize")
+
+
+@dataclass
+class Message:
+    role: str
+    content: str
+    tokens: int
+
+
+def truncate(text, max_tokens):
+    """``text`` cut to roughly ``max_tokens`` tokens, marked with an ellipsis."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Tokens average a few characters; trim by words until it fits
+    words= text.split()
+    keep= max_tokens
+    while keep > 0 and count_tokens(" ".join(words[:keep])) > max_tokens:
+        keep= keep * 3 // 4
+    return " ".join(words[:keep]) + " ..."
+
+
+def extractive_summary(summary, messages, max_tokens=CONVERSATION_SUMMARY_TOKENS):
+    """Summary made of the shopper's questions, newest kept when over budget."""
+    questions= [m.content for m in messages if m.role == "user"]
+    lines= ([summary] if summary else []) + [f"The shopper asked: {q}" for q in questions]
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate("\n".join(lines), max_tokens)
+
+
+def llm_summary(summary, messages, max_tokens=CONVERSATION_SUMMARY_TOKENS):
+    """Fold ``messages`` into ``summary`` with one LLM call."""
+    # Imported here so a thin client (see main.py) does not load the Groq stack
+    from llm import complete_chat, get_client
+
+    transcript= "\n".join(f"{m.role}: {m.content}" for m in messages)
+    content= complete_chat(
+        get_client(), "conversation.summary",
+        messages=[
+            {"role": "system", "content": summary_prompt.format(words=max_tokens * 3 // 4)},
+            {"role": "user", "content": f"Summary:\n{summary or '(none)'}\n\nMessages:\n{transcript}"},
+        ],
+        model=os.getenv("GROQ_MODEL"),
+        temperature=0.2,
+        max_tokens=max_tokens,
+    )
+    return truncate(content.strip(), max_tokens)
+
+
+SUMMARIZERS= {"llm": llm_summary, "extractive": extractive_summary}
+
+
+class Conversation:
+    """Recent messages verbatim plus a rolling summary of older ones.
+
+    Args:
+        keep_messages: Messages kept verbatim (a user/assistant exchange is two).
+        token_budget: Upper bound on the tokens ``context()`` returns.
+        summary_tokens: Upper bound on the rolling summary.
+        summarizer: ``fn(summary, messages, max_tokens) -> summary``; falls
+            back to ``extractive_summary`` if it raises.
+        background: Summarise on the shared worker thread instead of inline.
+    """
+
+    def __init__(self, keep_messages=CONVERSATION_KEEP_MESSAGES, token_budget=CONVERSATION_TOKEN_BUDGET,
+                 summary_tokens=CONVERSATION_SUMMARY_TOKENS, summarizer=None, background=True):
+        self.keep_messages= keep_messages
+        self.token_budget= token_budget
+        self.summary_tokens= summary_tokens
+        self.summarizer= summarizer or SUMMARIZERS.get(CONVERSATION_SUMMARY, extractive_summary)
+        self.background= background
+        self.summary= ""
+        self.summarized= 0
+        self._recent= []
+        self._pending= []
+        self._running= None
+        self._lock= threading.Lock()
+
+    def __len__(self):
+        """Messages added so far, including summarised ones."""
+        with self._lock:
+            return self.summarized + len(self._pending) + len(self._recent)
+
+    def add(self, role, content):
+        """Append a message; messages leaving the verbatim window are summarised."""
+        content= truncate(content or "", MESSAGE_MAX_TOKENS)
+        with self._lock:
+            self._recent.append(Message(role, content, count_tokens(content) + 4))
+            overflow= len(self._recent) - self.keep_messages
+            if overflow > 0:
+                self._pending.extend(self._recent[:overflow])
+                del self._recent[:overflow]
+            start= self._pending and self._running is None
+            if start:
+                self._running= self._pending[:]
+        if start:
+            if self.background:
+                _executor.submit(self._summarize)
+            else:
+                self._summarize()
+
+    def context(self):
+        """Chat messages for the LLM: the summary, then recent messages, within budget.
+
+        The oldest verbatim messages are dropped first when over budget; the
+        one that crosses the budget is cut short rather than dropped.
+        """
+        with self._lock:
+            summary= self.summary
+            messages= self._pending + self._recent
+        budget= self.token_budget
+        header= []
+        if summary:
+            content= f"Summary of the earlier conversation: {summary}"
+            header= [{"role": "user", "content": content}]
+            budget-= count_tokens(content) + 4
+        kept= []
+        for message in reversed(messages):
+            if message.tokens > budget:
+                if budget >= MIN_PARTIAL_TOKENS:
+                    kept.append({"role": message.role, "content": truncate(message.content, budget - 8)})
+                break
+            kept.append({"role": message.role, "content": message.content})
+            budget-= message.tokens
+        return header + kept[::-1]
+
+    def wait(self, timeout=None):
+        """Block until no summary is being computed (offline tools and checks)."""
+        with self._lock:
+            running= self._running is not None
+        if running:
+            _executor.submit(lambda: None).result(timeout)
+
+    def _summarize(self):
+        while True:
+            with self._lock:
+                summary, batch= self.summary, self._running
+            try:
+                updated= self.summarizer(summary, batch, self.summary_tokens)
+            except Exception as e:
+                logger.warning("conversation summary failed, keeping questions only: %s", e)
+                updated= extractive_summary(summary, batch, self.summary_tokens)
+            with self._lock:
+                self.summary= updated
+                self.summarized+= len(batch)
+                del self._pending[:len(batch)]
+                self._running= self._pending[:] or None
+                if self._running is None:
+                    return
+
+
+def history_messages(history):
+    """Validated copy of chat ``history`` ({"role", "content"} dicts), or ``[]``.
+
+    Only ``user`` and ``assistant`` messages are accepted; history comes from
+    clients and must not be able to add instructions to the system prompt.
+    """
+    messages= []
+    for message in history or ():
+        if not isinstance(message, dict):
+            raise ValueError("history entries must be objects")
+        role, content= message.get("role"), message.get("content")
+        if role not in ("user", "assistant"):
+            raise ValueError("history roles must be user or assistant")
+        if not isinstance(content, str):
+            raise ValueError("history entries need string content")
+        messages.append({"role": role, "content": content})
+    return messages
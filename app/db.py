@@ -0,0 +1,320 @@
+"""Read-only query executor for the product database.
+
+Each thread keeps one read-only SQLite connection with a statement cache,
+so requests skip the connect cost. Results come back as plain row tuples
+with a row cap pushed into the query as a LIMIT, and a progress handler
+aborts statements that run past a wall-clock deadline.
+
+An optional ``ResultCache`` serves repeated statements from memory. It is
+keyed by the normalised SQL text, its parameters and the row cap. The cache
+is emptied whenever the catalog may have changed. Three signals are checked:
+``PRAGMA data_version`` on the calling thread's connection (commits by other
+connections), the database file's identity, size and mtime (a replaced
+file), and ``PRAGMA user_version``, the ingest generation that
+``csv_to_sqlite.py`` bumps.
+
+A changed file stamp also bumps the executor's connection generation. Each
+thread reopens a connection from an older generation before its next query,
+so a file swapped in with ``os.replace`` is read instead of the old inode
+that an open connection still holds.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+
+PROGRESS_INTERVAL= 1000
+ENTRY_OVERHEAD_BYTES= 200
+# Quoted literals, kept verbatim by normalize_sql, and comments, which it drops.
+# Matching both in one pass keeps a quote inside a comment (or "--" inside a
+# literal) from being misread.
+SQL_TOKEN_RE= re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?(?:\*/|$))""", re.DOTALL)
+COMMENT_PREFIXES= ("--", "/*")
+
+
+class QueryTimeout(Exception):
+    """Raised when a statement runs past the executor's deadline."""
+
+
+class QueryResult(NamedTuple):
+    columns: tuple
+    rows: list
+
+    def __len__(self):
+        return len(self.rows)
+
+    def records(self):
+        """Rows as ``column -> value`` dicts."""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+def normalize_sql(sql):
+    """Canonical text for ``sql``: no comments, lowercase, single spaces, no
+    trailing ``;``.
+
+    Quoted literals are left untouched, so only formatting differences
+    collapse to the same key. Comments are removed before whitespace is
+    collapsed, otherwise a ``--`` comment would run on over the clauses that
+    followed it on later lines.
+    """
+    parts, text= [], []
+    for i, token in enumerate(SQL_TOKEN_RE.split(sql)):
+        if i % 2 == 0:
+            text.append(token)
+        elif token.startswith(COMMENT_PREFIXES):
+            text.append(" ")
+        else:
+            parts+= [_collapse("".join(text)), token]
+            text= []
+    parts.append(_collapse("".join(text)))
+    return "".join(parts).rstrip(";").strip()
+
+
+def _collapse(text):
+    text= " ".join(text.lower().split())
+    return re.sub(r"\s*([(),=<>!*+\-/;])\s*", r"\1", text)
+
+
+def result_size(result):
+    """Approximate bytes held by a cached ``QueryResult``."""
+    size= ENTRY_OVERHEAD_BYTES + sys.getsizeof(result.rows)
+    for row in result.rows:
+        size+= sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class ResultCache:
+    """Byte-bounded LRU of ``(sql, params, max_rows) -> QueryResult``.
+
+    Args:
+        max_bytes: Approximate memory bound over cached rows.
+        max_entry_bytes: Results larger than this are never cached;
+            defaults to an eighth of ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_entry_bytes=None):
+        self.max_bytes= max_bytes
+        self.max_entry_bytes= max_entry_bytes or max_bytes // 8
+        self.hits= 0
+        self.misses= 0
+        self.evictions= 0
+        self.invalidations= 0
+        self._entries= OrderedDict()
+        self._bytes= 0
+        self._lock= threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry= self._entries.get(key)
+            if entry is None:
+                self.misses+= 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits+= 1
+            return entry[0]
+
+    def put(self, key, result):
+        size= result_size(result)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old= self._entries.pop(key, None)
+            if old is not None:
+                self._bytes-= old[1]
+            self._entries[key]= (result, size)
+            self._bytes+= size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted)= self._entries.popitem(last=False)
+                self._bytes-= evicted
+                self.evictions+= 1
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self.invalidations+= 1
+            self._entries.clear()
+            self._bytes= 0
+
+    @property
+    def stats(self):
+        total= self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+class QueryExecutor:
+    """Per-thread, read-only SQLite executor.
+
+    Args:
+        path: SQLite database file.
+        max_rows: Default row cap; ``None`` disables it.
+        timeout: Wall-clock limit per statement, in seconds.
+        immutable: Open with ``immutable=1``. Only safe when nothing writes
+            to the file while the process is running.
+        cached_statements: Size of each connection's prepared-statement cache.
+        cache: Optional ``ResultCache`` for repeated statements.
+    """
+
+    def __init__(self, path, max_rows=50, timeout=2.0, immutable=False, cached_statements=128, cache=None):
+        self.path= Path(path)
+        self.max_rows= max_rows
+        self.timeout= timeout
+        self.immutable= immutable
+        self.cached_statements= cached_statements
+        self.cache= cache
+        self._local= threading.local()
+        self._catalog= None
+        self._stamp= None
+        self._generation= 0
+        self._catalog_lock= threading.Lock()
+        self._listeners= []
+
+    def add_listener(self, callback):
+        """Call ``callback()`` whenever ``check_catalog`` finds the catalog
+        changed, e.g. to drop other data derived from it."""
+        self._listeners.append(callback)
+
+    def _connection(self):
+        conn= getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation != self._generation:
+            # Opened before the file changed; it may still read the old inode
+            conn.close()
+            conn= None
+        if conn is None:
+            uri= self.path.resolve().as_uri() + "?mode=ro"
+            if self.immutable:
+                uri+= "&immutable=1"
+            conn= sqlite3.connect(uri, uri=True, cached_statements=self.cached_statements)
+            conn.execute("PRAGMA query_only = 1")
+            conn.set_progress_handler(self._check_deadline, PROGRESS_INTERVAL)
+            self._local.conn= conn
+            self._local.generation= self._generation
+            self._local.deadline= None
+            self._local.data_version= None
+        return conn
+
+    def _file_stamp(self):
+        try:
+            stat= os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def check_catalog(self):
+        """Empty the result cache if the catalog changed since the last check.
+
+        Also reopens the calling thread's connection when the file changed
+        since it was opened.
+
+        Returns:
+            True when the catalog changed.
+        """
+        stamp= self._file_stamp()
+        with self._catalog_lock:
+            moved= self._stamp is not None and stamp != self._stamp
+            if moved:
+                self._generation+= 1
+            self._stamp= stamp
+        conn= self._connection()
+        data_version= conn.execute("PRAGMA data_version").fetchone()[0]
+        committed= self._local.data_version not in (None, data_version)
+        self._local.data_version= data_version
+        known= self._catalog
+        if not (committed or moved) and known is not None and stamp == known[0]:
+            return False
+        # The file moved or another connection committed: compare the ingest generation too
+        catalog= (stamp, conn.execute("PRAGMA user_version").fetchone()[0])
+        with self._catalog_lock:
+            changed= committed or moved or (self._catalog is not None and self._catalog != catalog)
+            self._catalog= catalog
+        if changed:
+            if self.cache is not None:
+                self.cache.clear()
+            for callback in self._listeners:
+                callback()
+        return changed
+
+    def execute(self, sql, params=(), max_rows=...):
+        """Run a SELECT and return at most ``max_rows`` rows.
+
+        Served from the result cache when one is configured and the catalog
+        has not changed.
+
+        Raises:
+            ValueError: If ``sql`` is not a SELECT statement.
+            QueryTimeout: If the statement exceeds the deadline.
+        """
+        self.check_catalog()
+        if self.cache is None:
+            return self._execute(sql, params, max_rows)
+        if max_rows is ...:
+            max_rows= self.max_rows
+        params= tuple(params)
+        key= (normalize_sql(sql), params, max_rows)
+        result= self.cache.get(key)
+        if result is None:
+            generation= self._generation
+            result= self._execute(sql, params, max_rows)
+            result= QueryResult(result.columns, tuple(result.rows))
+            # A swap noticed by another thread mid-query may have made these rows stale
+            if generation == self._generation:
+                self.cache.put(key, result)
+        return result
+
+    def _check_deadline(self):
+        deadline= self._local.deadline
+        return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+    def _execute(self, sql, params, max_rows):
+        if max_rows is ...:
+            max_rows= self.max_rows
+        sql= sql.strip().rstrip(";").strip()
+        if not sql.upper().startswith("SELECT"):
+            raise ValueError("Only SELECT statements can be executed")
+        params= tuple(params)
+        if max_rows is not None:
+            sql, params= limit_query(sql, params, max_rows)
+
+        conn= self._connection()
+        self._local.deadline= time.monotonic() + self.timeout if self.timeout else None
+        try:
+            cursor= conn.execute(sql, params)
+            rows= cursor.fetchall() if max_rows is None else cursor.fetchmany(max_rows)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                raise QueryTimeout(f"Query exceeded {self.timeout}s") from e
+            raise
+        finally:
+            self._local.deadline= None
+        columns= tuple(d[0] for d in cursor.description or ())
+        cursor.close()
+        return QueryResult(columns, rows)
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn= getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn= None
+
+
+def limit_query(sql, params, max_rows):
+    """Push a row cap into ``sql`` so SQLite can stop (or top-N sort) early."""
+    return f"SELECT * FROM ({sql}) LIMIT ?", params + (max_rows,)
@@ -0,0 +1,152 @@
+"""Micro-batching of concurrent query embeddings.
+
+Every routed query needs one MiniLM forward pass. Under concurrent load,
+many batch-of-one passes compete for the GIL and the cores. Here callers
+hand their text to a single worker thread instead. The worker gathers
+whatever is queued into one batch and resolves each caller's future.
+
+The worker only waits for the batching window when the previous batch held
+more than one request. A lone user's query is therefore encoded as soon as
+it arrives, and the window only applies once there is load to amortise.
+
+Batch sizes and queue waits go to the ``chatbot_embed_batch_size`` and
+``chatbot_embed_queue_wait_seconds`` histograms on ``/metrics``, and each
+caller's wait is recorded on its trace as ``embed.queue_wait``.
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import tracing
+
+
+EMBED_BATCH_WINDOW= float(os.getenv("EMBED_BATCH_WINDOW_MS", "3")) / 1000
+EMBED_MAX_BATCH= int(os.getenv("EMBED_MAX_BATCH", "32"))
+BATCH_SIZE_BUCKETS= (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Request:
+    __slots__= ("text", "future", "enqueued", "wait")
+
+    def __init__(self, text):
+        self.text= text
+        self.future= Future()
+        self.enqueued= time.perf_counter()
+        self.wait= 0.0
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent ``encode`` calls into batched model calls.
+
+    Args:
+        encode: Function mapping a list of texts to a sequence of vectors.
+        window: Seconds to keep collecting a batch once load is detected.
+        max_batch: Upper bound on texts per model call.
+    """
+
+    def __init__(self, encode, window=EMBED_BATCH_WINDOW, max_batch=EMBED_MAX_BATCH):
+        self._encode= encode
+        self.window= window
+        self.max_batch= max(1, max_batch)
+        self.batches= 0
+        self.items= 0
+        self._queue= queue.SimpleQueue()
+        self._loaded= False
+        self._thread= None
+        self._lock= threading.Lock()
+
+    def submit(self, text):
+        """Queue ``text``; returns a ``Future`` for its vector."""
+        return self._submit(text).future
+
+    def encode(self, text):
+        """Encode ``text`` as part of the next batch and wait for the result."""
+        request= self._submit(text)
+        vector= request.future.result()
+        tracing.record("embed.queue_wait", request.wait)
+        return vector
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _submit(self, text):
+        if self._thread is None:
+            self._start()
+        request= _Request(text)
+        self._queue.put(request)
+        return request
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread= threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch= [self._queue.get()]
+            deadline= time.perf_counter() + self.window if self._loaded and self.window > 0 else None
+            while len(batch) < self.max_batch:
+                try:
+                    remaining= deadline - time.perf_counter() if deadline is not None else 0
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._loaded= len(batch) > 1
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        start= time.perf_counter()
+        for request in batch:
+            request.wait= start - request.enqueued
+        # Sessions often send the same text (greetings, retries): encode it once
+        unique= list(dict.fromkeys(request.text for request in batch))
+        try:
+            vectors= dict(zip(unique, self._encode(unique)))
+        except BaseException as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        self.batches+= 1
+        self.items+= len(batch)
+        if tracing.ENABLED:
+            tracing.registry.observe("chatbot_embed_batch_size", {}, len(batch), BATCH_SIZE_BUCKETS)
+            for request in batch:
+                tracing.registry.observe("chatbot_embed_queue_wait_seconds", {}, request.wait)
+        for request in batch:
+            request.future.set_result(vectors[request.text])
+
+
+def _throughput(encode_one, texts, threads):
+    start= time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(encode_one, texts))
+    return len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    from embeddings import embed
+
+    parser= argparse.ArgumentParser(description="Compare batched and per-query encode throughput")
+    parser.add_argument("--threads", type=int, default=16, help="Concurrent callers")
+    parser.add_argument("--queries", type=int, default=2000)
+    args= parser.parse_args()
+
+    texts= [f"Show me running shoes under {1000 + i} rupees" for i in range(args.queries)]
+    embed(texts[:8])  # load the model outside the timings
+    batcher= EmbeddingBatcher(embed)
+    direct= _throughput(lambda t: embed([t])[0], texts, args.threads)
+    batched= _throughput(batcher.encode, texts, args.threads)
+    print(f"per-query: {direct:.0f} queries/s")
+    print(f"batched:   {batched:.0f} queries/s ({batcher.stats()})")
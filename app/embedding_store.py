@@ -0,0 +1,108 @@
+"""On-disk store for route utterance embeddings.
+
+Vectors are keyed by a content hash of the encoder name and the utterance
+text, so a cold start with unchanged routes only has to memory-map the
+stored matrix instead of running the encoder over every utterance. Only
+utterances whose hash is missing from the store are re-encoded.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def content_key(encoder_name, text):
+    """Stable key for ``text`` embedded by ``encoder_name``."""
+    return hashlib.sha1(f"{encoder_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Memory-mapped ``key -> vector`` store backed by a .npy/.json pair.
+
+    Args:
+        path: Base path; ``<path>.npy`` holds the vectors and
+            ``<path>.keys.json`` the row keys.
+        encoder_name: Name folded into every key so a model change
+            invalidates the whole store.
+    """
+
+    def __init__(self, path, encoder_name):
+        self.path= Path(path)
+        self.encoder_name= encoder_name
+        self.vectors_path= self.path.with_suffix(".npy")
+        self.keys_path= self.path.with_suffix(".keys.json")
+        self.vectors= None
+        self.index= {}
+        self.encoded_count= 0
+        self._load()
+
+    def _load(self):
+        if not (self.vectors_path.exists() and self.keys_path.exists()):
+            return
+        try:
+            keys= json.loads(self.keys_path.read_text())
+            vectors= np.load(self.vectors_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        if len(keys) != len(vectors):
+            return
+        self.vectors= vectors
+        self.index= {key: row for row, key in enumerate(keys)}
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, text):
+        """Return the stored vector for ``text`` or None."""
+        row= self.index.get(content_key(self.encoder_name, text))
+        if row is None:
+            return None
+        return self.vectors[row]
+
+    def sync(self, texts, encode):
+        """Make the store hold exactly ``texts``.
+
+        Missing texts are encoded with ``encode`` in one batch; entries for
+        texts no longer present are dropped. Nothing is written when the
+        store is already up to date.
+
+        Args:
+            texts: Utterances that must be present.
+            encode: Callable mapping a list of strings to a 2-D array.
+
+        Returns:
+            The number of texts that had to be encoded.
+        """
+        keys= list(dict.fromkeys(content_key(self.encoder_name, t) for t in texts))
+        text_by_key= {content_key(self.encoder_name, t): t for t in texts}
+        missing= [k for k in keys if k not in self.index]
+        if not missing and len(keys) == len(self.index):
+            return 0
+
+        fresh= {}
+        if missing:
+            encoded= np.asarray(encode([text_by_key[k] for k in missing]), dtype=np.float32)
+            fresh= dict(zip(missing, encoded))
+        matrix= np.stack([
+            fresh[k] if k in fresh else np.asarray(self.vectors[self.index[k]])
+            for k in keys
+        ]).astype(np.float32, copy=False)
+        self._write(keys, matrix)
+        self.encoded_count+= len(missing)
+        return len(missing)
+
+    def _write(self, keys, matrix):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_vectors= self.vectors_path.with_name(self.vectors_path.name + ".tmp")
+        tmp_keys= self.keys_path.with_name(self.keys_path.name + ".tmp")
+        with open(tmp_vectors, "wb") as f:
+            np.save(f, matrix)
+        tmp_keys.write_text(json.dumps(keys))
+        # Replace vectors first: a reader that sees new keys with old vectors
+        # fails the length check in _load and simply re-encodes.
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
+        self._load()
@@ -0,0 +1,111 @@
+"""Process-wide sentence embedding service.
+
+The semantic router and the FAQ vector store both embed text with
+all-MiniLM-L6-v2. Instead of each loading its own copy of the model, they go
+through this module so a worker process holds a single set of weights and a
+query can be encoded once and reused for routing and retrieval.
+"""
+
+import os
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from pydantic import PrivateAttr
+from semantic_router.encoders import DenseEncoder
+
+from embed_batcher import EmbeddingBatcher
+from lifecycle import singleton
+
+
+MODEL_NAME= "sentence-transformers/all-MiniLM-L6-v2"
+BATCH_SIZE= 64
+EMBED_BATCHING= os.getenv("EMBED_BATCHING", "1") == "1"
+# "torch" (SentenceTransformer) or "onnx" (int8 onnxruntime, see onnx_encoder.py)
+EMBED_BACKEND= os.getenv("EMBED_BACKEND", "torch")
+# Keys persisted vectors, so switching backends re-embeds instead of mixing spaces
+ENCODER_NAME= MODEL_NAME if EMBED_BACKEND == "torch" else f"{MODEL_NAME}:onnx-int8"
+
+
+@singleton("encoder")
+def get_model():
+    """Return the shared encoder for ``EMBED_BACKEND``, loading it on first use."""
+    if EMBED_BACKEND == "onnx":
+        from onnx_encoder import OnnxEncoder
+        return OnnxEncoder()
+    # Imported here so the ONNX backend never pays for torch
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+def embed(texts):
+    """Encode a batch of texts into L2-normalised float32 vectors.
+
+    Args:
+        texts: Iterable of strings.
+
+    Returns:
+        A ``(len(texts), dim)`` float32 numpy array.
+    """
+    vectors= get_model().encode(
+        list(texts),
+        batch_size=BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return vectors.astype(np.float32, copy=False)
+
+
+def embed_query(text):
+    """Encode a single query string into a 1-D float32 vector.
+
+    Concurrent calls are batched into one forward pass unless
+    ``EMBED_BATCHING=0``.
+    """
+    if _batcher is None:
+        return embed([text])[0]
+    return _batcher.encode(text)
+
+
+_batcher= EmbeddingBatcher(embed) if EMBED_BATCHING else None
+
+
+class SharedEncoder(DenseEncoder):
+    """semantic-router encoder backed by the shared model.
+
+    When given an ``EmbeddingStore``, texts found in it are served from the
+    store and only the remainder goes through the model.
+    """
+
+    name: str = MODEL_NAME
+    type: str = "huggingface"
+    score_threshold: float = 0.5
+    _store: object = PrivateAttr(default=None)
+
+    def __init__(self, store=None, **data):
+        super().__init__(**data)
+        self._store= store
+
+    def __call__(self, docs):
+        if self._store is None:
+            return embed(docs).tolist()
+        vectors= [self._store.get(doc) for doc in docs]
+        missing= [i for i, vec in enumerate(vectors) if vec is None]
+        if missing:
+            for i, vec in zip(missing, embed([docs[i] for i in missing])):
+                vectors[i]= vec
+        return [np.asarray(vec).tolist() for vec in vectors]
+
+
+class SharedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function backed by the shared model."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return list(embed(input))
+
+    @staticmethod
+    def name():
+        return "shared_minilm"
@@ -1,84 +1,180 @@
+import hashlib
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import chromadb
-from chromadb.utils import embedding_functions
-from groq import Groq
 import os
 from dotenv import load_dotenv
 
+import tracing
+from answer_cache import cache_from_env, replay
+from embeddings import ENCODER_NAME, MODEL_NAME, SharedEmbeddingFunction, embed, embed_query
+from lifecycle import singleton
+from llm import ChatRequest, get_client, run_chat, run_prepared
+
 load_dotenv(override=True)
 
 filepath=Path(__file__).parent /"resources/faq_data.csv"
-groq_client= Groq()
-chroma_client= chromadb.Client()
+chroma_path= Path(__file__).parent /"resources/chroma"
 client_collection_name= "faq"
-ef=embedding_functions.SentenceTransformerEmbeddingFunction("all-MiniLM-L6-v2")
+ef= SharedEmbeddingFunction()
+INGEST_BATCH_SIZE= 1000
+answer_cache= cache_from_env()
+
+
+@singleton("vector_store")
+def get_chroma_client():
+    """Process-wide persistent Chroma client."""
+    return chromadb.PersistentClient(path=str(chroma_path))
+
+
+@singleton("faq_index")
+def load_faq_index():
+    """The FAQ collection, synced with ``filepath`` once per process."""
+    ingest_faq_data(filepath)
+    return get_chroma_client().get_collection(name= client_collection_name, embedding_function= ef)
+
 
+def row_id(question):
+    """Stable Chroma id for an FAQ row, derived from its question text."""
+    return "faq_" + hashlib.sha1(question.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def row_hash(question, answer):
+    return hashlib.sha1(f"{question}\0{answer}".encode("utf-8")).hexdigest()
 
 
 def ingest_faq_data(file):
-    if client_collection_name not in [i.name for i in chroma_client.list_collections() ]:
-        #print("Ingesting data into chromadb with embedding questions as doc and answers as metadata")
-        collection= chroma_client.get_or_create_collection(
-            name= client_collection_name,
-            embedding_function= ef)
-        df= pd.read_csv(file)
-        docs= df['question'].to_list()
-        metadata=  [{'answers':ans} for ans in df['answer'].to_list()]
-        ids= [f"id_{i}" for i in range(len(docs))]
-        collection.add(
+    """Sync the persistent FAQ collection with the CSV at ``file``.
+
+    Rows are diffed by content hash: only added or edited rows are embedded
+    and upserted, and rows removed from the CSV are deleted.
+
+    Returns:
+        A dict with the number of ``added``, ``updated`` and ``deleted`` rows.
+    """
+    chroma_client= get_chroma_client()
+    collection= chroma_client.get_or_create_collection(
+        name= client_collection_name,
+        embedding_function= ef)
+    df= pd.read_csv(file).drop_duplicates(subset='question', keep='last')
+    rows= {row_id(q): (q, a, row_hash(q, a)) for q, a in zip(df['question'], df['answer'])}
+
+    existing= collection.get(include=['metadatas'])
+    # Rows embedded by another backend are re-embedded too
+    stored= {i: ((m or {}).get('hash'), (m or {}).get('encoder', MODEL_NAME))
+             for i, m in zip(existing['ids'], existing['metadatas'])}
+
+    changed= [i for i, (_, _, h) in rows.items() if stored.get(i) != (h, ENCODER_NAME)]
+    removed= [i for i in stored if i not in rows]
+    batch_size= min(INGEST_BATCH_SIZE, chroma_client.get_max_batch_size())
+
+    for start in range(0, len(changed), batch_size):
+        ids= changed[start:start + batch_size]
+        docs= [rows[i][0] for i in ids]
+        collection.upsert(
+            ids= ids,
             documents= docs,
-            metadatas= metadata,
-            ids= ids
+            embeddings= embed(docs),
+            metadatas= [{'answers': rows[i][1], 'hash': rows[i][2], 'encoder': ENCODER_NAME} for i in ids]
         )
-        print(f"FAQ data successfully ingested into chromadb")
-    else:
-        print(f"Collection {client_collection_name} already exists")
+    for start in range(0, len(removed), batch_size):
+        collection.delete(ids= removed[start:start + batch_size])
+
+    stats= {
+        'added': sum(1 for i in changed if i not in stored),
+        'updated': sum(1 for i in changed if i in stored),
+        'deleted': len(removed),
+    }
+    if changed or removed:
+        # Cached answers may quote rows that just changed
+        answer_cache.clear()
+        print(f"FAQ data synced into chromadb: {stats}")
+    return stats
 
-def query_qa_results(query):
+
+def query_qa_results(query, query_embeddings=None):
     #print("Invoking query_qa_results which provided associated questions for query")
-    collection= chroma_client.get_collection(name= client_collection_name)
-    results= collection.query(
-        query_texts= query,
-        n_results=2
-    )
+    # Reuse the vector computed for routing when the caller has one
+    if query_embeddings is None:
+        query_embeddings= embed_query(query)
+    collection= load_faq_index()
+    with tracing.span("faq.retrieve"):
+        results= collection.query(
+            query_embeddings= [np.asarray(query_embeddings).tolist()],
+            n_results=2
+        )
     #print("Results associated with query:  ", results, "\n")
     return results
 
-def faq_chain(query):
-    results= query_qa_results(query)
+def best_similarity(results):
+    """Cosine similarity of the closest retrieved FAQ question, or 0.0."""
+    distances= results.get('distances') or [[]]
+    if not distances[0]:
+        return 0.0
+    # Default l2 space stores squared distance; vectors are L2-normalised
+    return 1.0 - distances[0][0] / 2.0
+
+
+def prepare_faq(query, query_embeddings=None, results=None, history=()):
+    """Retrieve FAQ context for ``query``.
+
+    Args:
+        results: Output of ``query_qa_results`` when the caller already has it.
+        history: Earlier conversation messages, given to the LLM. An answer
+            shaped by one conversation must not be replayed to another, so
+            the answer cache is neither read nor written when it is set.
+
+    Returns:
+        Cached answer chunks on a cache hit, otherwise a ``ChatRequest``
+        that generates the answer (and stores it in the cache when there
+        is no history).
+    """
+    if query_embeddings is None:
+        query_embeddings= embed_query(query)
+    if results is None:
+        results= query_qa_results(query, query_embeddings)
+    faq_ids= results['ids'][0]
+    if not history:
+        cached= answer_cache.get(query_embeddings, faq_ids)
+        if cached is not None:
+            return replay(cached)
     #print("Query:",query)
     context= ''.join([r.get('answers') for r in results['metadatas'][0]])
     #print("Context:",context)
-    #print("Generating the answer with provided context and query")
-    answer= generate_answer(query,context)
-    return answer
+    return ChatRequest(
+        "faq.llm",
+        answer_params(query, context, history),
+        client= get_client(),
+        on_complete= None if history else lambda text: answer_cache.put(query_embeddings, faq_ids, text),
+    )
 
-def generate_answer(query, context):
-    #print("Invoking generate_answer function")
-    query= query
-    context= context
+
+def faq_chain(query, query_embeddings=None, history=()):
+    return run_prepared(prepare_faq(query, query_embeddings, history=history))
+
+def answer_params(query, context, history=()):
     prompt= f"""
             Given the user query: {query} and the given context{context},
             answer the query using the context only. Do not go out of context,
             if dont know say you dont know 
             """
-    stream= groq_client.chat.completions.create(
-        messages=[{
+    return dict(
+        messages=[*history, {
             'role':'user',
             'content':prompt
         }],
         model=os.environ.get("GROQ_MODEL"),
-        stream= True
     )
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            yield chunk.choices[0].delta.content
 
+def generate_answer(query, context):
+    #print("Invoking generate_answer function")
+    yield from run_chat(ChatRequest("faq.llm", answer_params(query, context), client= get_client()))
 
 
 if __name__== "__main__":
-    ingest_faq_data(filepath)
+    load_faq_index()
     exit_list = ['none', 'exit', 'bye', 'quit', 'q']
 
     print("\n--- FAQ System Active ---")
@@ -0,0 +1,227 @@
+"""Lifecycle of the process-wide resources behind the chatbot.
+
+The encoder, route store, router, FAQ index, product database executor and
+Groq clients are each built once per process, on first use, through
+``singleton`` getters (``embeddings.get_model``, ``router.get_router``,
+``faq.load_faq_index`` and so on). Nothing heavy happens at import time, so
+a Streamlit rerun or a new session only pays for its own request.
+
+``warm_up`` loads every component in order, optionally on a background
+thread so the first page can render while the models load. ``ready`` and
+``status`` report progress. ``profile`` gives import and load time per
+component:
+
+    python app/lifecycle.py
+"""
+
+import importlib
+import sys
+import threading
+import time
+
+
+class Singleton:
+    """Thread-safe, lazily built process-wide value.
+
+    Calling the instance builds the value on first use and returns the same
+    object afterwards. A failed build is not cached, so the next call
+    retries.
+    """
+
+    def __init__(self, name, factory):
+        self.name= name
+        self.factory= factory
+        self.seconds= None
+        self.error= None
+        self._value= None
+        self._loaded= False
+        self._loading= False
+        self._lock= threading.Lock()
+        self.__doc__= factory.__doc__
+        self.__wrapped__= factory
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    @property
+    def state(self):
+        if self._loaded:
+            return "ready"
+        if self._loading:
+            return "loading"
+        return f"failed: {self.error}" if self.error else "pending"
+
+    def __call__(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                self._loading= True
+                start= time.perf_counter()
+                try:
+                    self._value= self.factory()
+                except Exception as e:
+                    self.error= f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self._loading= False
+                self.seconds= time.perf_counter() - start
+                self.error= None
+                self._loaded= True
+        return self._value
+
+
+_singletons= {}
+
+
+def singleton(name):
+    """Decorator turning a zero-argument factory into a ``Singleton`` getter."""
+    def wrap(factory):
+        getter= Singleton(name, factory)
+        _singletons[name]= getter
+        return getter
+    return wrap
+
+
+# (component, module, getter) in load order; a getter of None only imports the module
+COMPONENTS= (
+    ("llm", "llm_client", "get_client"),
+    ("encoder", "embeddings", "get_model"),
+    ("route_store", "router", "get_route_store"),
+    ("router", "router", "get_router"),
+    ("route_scorer", "router", "get_route_scorer"),
+    ("db", "sql", "get_executor"),
+    ("catalog", "sql", "get_catalog"),
+    ("faq_index", "faq", "load_faq_index"),
+    ("pipeline", "pipeline", None),
+)
+
+
+class _WarmUp:
+    def __init__(self):
+        self.thread= None
+        self.import_seconds= {}
+        self.errors= {}
+        self.done= threading.Event()
+        self._lock= threading.Lock()
+
+
+_warm= _WarmUp()
+
+
+def _load(component, module_name, getter):
+    if module_name not in sys.modules:
+        start= time.perf_counter()
+        module= importlib.import_module(module_name)
+        # Time is charged to the first component that imports the module
+        _warm.import_seconds[component]= time.perf_counter() - start
+    else:
+        module= sys.modules[module_name]
+    if getter is not None:
+        getattr(module, getter)()
+
+
+def _run(components):
+    try:
+        for component, module_name, getter in components:
+            try:
+                _load(component, module_name, getter)
+            except Exception as e:
+                # Later components may still load; the request path retries this one
+                _warm.errors[component]= f"{type(e).__name__}: {e}"
+    finally:
+        _warm.done.set()
+
+
+def warm_up(background=True, components=COMPONENTS):
+    """Load every component once per process.
+
+    Args:
+        background: Load on a daemon thread and return at once. Requests
+            that arrive before it finishes wait only for the components they
+            use.
+
+    Returns:
+        The warm-up thread, or None when loading inline or already started.
+    """
+    with _warm._lock:
+        if _warm.thread is not None:
+            return None
+        if background:
+            _warm.thread= threading.Thread(target=_run, args=(components,), name="warm-up", daemon=True)
+            _warm.thread.start()
+            return _warm.thread
+        _warm.thread= threading.current_thread()
+    _run(components)
+    return None
+
+
+def wait(timeout=None):
+    """Block until a started warm-up has finished; True if it has."""
+    return _warm.done.wait(timeout)
+
+
+def status():
+    """``component -> "pending" | "loading" | "ready" | "failed: ..."``."""
+    result= {}
+    for component, module_name, getter in COMPONENTS:
+        if component in _warm.errors and not _loaded(component, module_name, getter):
+            result[component]= f"failed: {_warm.errors[component]}"
+        elif getter is None:
+            result[component]= "ready" if module_name in sys.modules else "pending"
+        else:
+            instance= _singletons.get(component)
+            result[component]= instance.state if instance is not None else "pending"
+    return result
+
+
+def _loaded(component, module_name, getter):
+    if getter is None:
+        return module_name in sys.modules
+    instance= _singletons.get(component)
+    return instance is not None and instance.loaded
+
+
+def ready():
+    """True once every component is loaded."""
+    return all(_loaded(*c) for c in COMPONENTS)
+
+
+def profile():
+    """Import and load time per component, in milliseconds.
+
+    Components that have not loaded yet have no ``load_ms``.
+    """
+    rows= []
+    for component, _, _ in COMPONENTS:
+        instance= _singletons.get(component)
+        seconds= instance.seconds if instance is not None else None
+        rows.append({
+            "component": component,
+            "import_ms": round(_warm.import_seconds.get(component, 0.0) * 1000, 1),
+            "load_ms": round(seconds * 1000, 1) if seconds is not None else None,
+        })
+    return rows
+
+
+def format_profile(rows=None):
+    rows= profile() if rows is None else rows
+    states= status()
+    lines= [f"{'component':<14}{'import ms':>12}{'load ms':>12}  status"]
+    for row in rows:
+        load= "-" if row["load_ms"] is None else f"{row['load_ms']:.1f}"
+        lines.append(f"{row['component']:<14}{row['import_ms']:>12.1f}{load:>12}  {states[row['component']]}")
+    total= sum(r["import_ms"] + (r["load_ms"] or 0.0) for r in rows)
+    lines.append(f"{'total':<14}{total:>24.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # The components register with the importable module, not with __main__
+    import lifecycle
+
+    start= time.perf_counter()
+    lifecycle.warm_up(background=False)
+    print(lifecycle.format_profile())
+    print(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.1f} ms; ready: {lifecycle.ready()}")
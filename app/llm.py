@@ -0,0 +1,362 @@
+"""Helpers shared by the modules that call the Groq chat API.
+
+Identical concurrent chat streams are coalesced: requests with the same
+parameters (prompt, model, sampling settings) share one upstream stream. The
+first caller starts it and later callers replay it from the first chunk. Set
+``LLM_COALESCE=0`` to give every caller its own stream.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import llm_client
+import tracing
+from llm_client import get_async_client, get_client
+
+
+LLM_COALESCE= os.getenv("LLM_COALESCE", "1") == "1"
+
+
+@dataclass
+class ChatRequest:
+    """A streaming chat completion a handler wants to run.
+
+    Handlers return one of these instead of starting the stream themselves
+    so the same request can be driven by a sync client (Streamlit, CLI) or
+    the async backend.
+
+    Attributes:
+        stage: Trace stage name, e.g. ``"faq.llm"``.
+        params: Keyword arguments for ``chat.completions.create``.
+        client: Sync Groq client used by ``run_chat``.
+        on_complete: Called with the full text once the stream finishes.
+    """
+
+    stage: str
+    params: dict
+    client: Any = None
+    on_complete: Optional[Callable[[str], None]] = None
+
+
+def stream_chat(client, stage, **params):
+    """Start a streaming chat completion and yield its text deltas.
+
+    Records time-to-first-token, total stream time and token usage for
+    ``stage`` on the current trace.
+
+    Args:
+        client: A Groq client.
+        stage: Trace stage name, e.g. ``"faq.llm"``.
+        **params: Passed to ``client.chat.completions.create``.
+    """
+    trace= tracing.current()
+    start= time.perf_counter()
+    # Pooled client, per-route deadlines, retries and optional hedging
+    stream= llm_client.open_stream(client, stage, params)
+    first= None
+    try:
+        for chunk in stream:
+            if trace is not None:
+                _record_usage(chunk)
+            content= _content(chunk)
+            if content is not None:
+                if first is None:
+                    first= time.perf_counter()
+                    tracing.record(f"{stage}.ttft", first - start)
+                yield content
+    finally:
+        stream.close()
+    tracing.record(f"{stage}.total", time.perf_counter() - start)
+
+
+async def astream_chat(client, stage, **params):
+    """Async counterpart of ``stream_chat`` for an ``AsyncGroq`` client."""
+    trace= tracing.current()
+    start= time.perf_counter()
+    stream= llm_client.aopen_stream(client, stage, params)
+    first= None
+    try:
+        async for chunk in stream:
+            if trace is not None:
+                _record_usage(chunk)
+            content= _content(chunk)
+            if content is not None:
+                if first is None:
+                    first= time.perf_counter()
+                    tracing.record(f"{stage}.ttft", first - start)
+                yield content
+    finally:
+        await stream.aclose()
+    tracing.record(f"{stage}.total", time.perf_counter() - start)
+
+
+def flight_key(params):
+    """Coalescing key: a hash of the exact request parameters."""
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One upstream stream and the chunks it has produced so far."""
+
+    def __init__(self, key):
+        self.key= key
+        self.chunks= []
+        self.done= False
+        self.error= None
+        self.subscribers= 0
+        self.task= None
+
+
+class _Subscription:
+    def __init__(self, flights, flight, leader):
+        self.flights= flights
+        self.flight= flight
+        self.leader= leader
+
+
+class SingleFlight:
+    """Shares one ``stream_chat`` among concurrent identical requests.
+
+    A background thread drives the upstream stream and buffers its chunks,
+    so every subscriber sees the complete answer whenever it joined. A
+    subscriber that stops iterating early just detaches. When the last one
+    leaves, the upstream stream is closed at its next chunk.
+    """
+
+    def __init__(self):
+        self._flights= {}
+        self._lock= threading.Lock()
+        self._changed= threading.Condition(self._lock)
+        self.started= 0
+        self.joined= 0
+
+    def stream(self, client, stage, params):
+        """Subscribe to the stream for ``params``, starting it if needed."""
+        subscription= self._subscribe(client, stage, params)
+        return subscription, self._replay(subscription.flight)
+
+    def stats(self):
+        with self._lock:
+            return {"started": self.started, "joined": self.joined, "in_flight": len(self._flights)}
+
+    def _subscribe(self, client, stage, params):
+        key= flight_key(params)
+        with self._lock:
+            flight= self._flights.get(key)
+            leader= flight is None
+            if leader:
+                flight= self._flights[key]= _Flight(key)
+                self.started+= 1
+            else:
+                self.joined+= 1
+            flight.subscribers+= 1
+        if leader:
+            # The driver records TTFT and token usage on the leader's trace
+            ctx= contextvars.copy_context()
+            threading.Thread(target=ctx.run, args=(self._drive, flight, client, stage, params),
+                             name="llm-flight", daemon=True).start()
+        return _Subscription(self, flight, leader)
+
+    def _drive(self, flight, client, stage, params):
+        stream= stream_chat(client, stage, **params)
+        try:
+            for chunk in stream:
+                with self._lock:
+                    if flight.subscribers == 0:
+                        break
+                    flight.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            flight.error= e
+        finally:
+            stream.close()
+            with self._lock:
+                flight.done= True
+                self._forget(flight)
+                self._changed.notify_all()
+
+    def _replay(self, flight):
+        position= 0
+        try:
+            while True:
+                with self._lock:
+                    while position >= len(flight.chunks) and not flight.done:
+                        self._changed.wait()
+                    if position < len(flight.chunks):
+                        chunk= flight.chunks[position]
+                        position+= 1
+                    elif flight.error is not None:
+                        raise flight.error
+                    else:
+                        return
+                yield chunk
+        finally:
+            with self._lock:
+                flight.subscribers-= 1
+                if flight.subscribers == 0:
+                    self._forget(flight)
+
+    def _forget(self, flight):
+        # Late arrivals start a fresh stream instead of joining an abandoned one
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for ``astream_chat`` on the server's event loop."""
+
+    def __init__(self):
+        self._flights= {}
+        self._changed= None
+        self.started= 0
+        self.joined= 0
+
+    def stream(self, client, stage, params):
+        if self._changed is None:
+            self._changed= asyncio.Condition()
+        key= flight_key(params)
+        flight= self._flights.get(key)
+        leader= flight is None
+        if leader:
+            flight= self._flights[key]= _Flight(key)
+            flight.task= asyncio.get_running_loop().create_task(self._drive(flight, client, stage, params))
+            self.started+= 1
+        else:
+            self.joined+= 1
+        flight.subscribers+= 1
+        return _Subscription(self, flight, leader), self._replay(flight)
+
+    def stats(self):
+        return {"started": self.started, "joined": self.joined, "in_flight": len(self._flights)}
+
+    async def _drive(self, flight, client, stage, params):
+        try:
+            async for chunk in astream_chat(client, stage, **params):
+                async with self._changed:
+                    flight.chunks.append(chunk)
+                    self._changed.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            flight.error= e
+        finally:
+            flight.done= True
+            self._forget(flight)
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def _replay(self, flight):
+        position= 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: position < len(flight.chunks) or flight.done)
+                if position < len(flight.chunks):
+                    position+= 1
+                    yield flight.chunks[position - 1]
+                elif flight.error is not None:
+                    raise flight.error
+                else:
+                    return
+        finally:
+            flight.subscribers-= 1
+            if flight.subscribers == 0:
+                self._forget(flight)
+                if not flight.done:
+                    flight.task.cancel()
+
+    def _forget(self, flight):
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+
+flights= SingleFlight()
+async_flights= AsyncSingleFlight()
+
+
+def run_chat(request):
+    """Drive ``request`` with its sync client, yielding text deltas."""
+    if not LLM_COALESCE:
+        chunks= []
+        for chunk in stream_chat(request.client, request.stage, **request.params):
+            chunks.append(chunk)
+            yield chunk
+        if request.on_complete is not None:
+            request.on_complete("".join(chunks))
+        return
+    subscription, stream= flights.stream(request.client, request.stage, request.params)
+    chunks= []
+    try:
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        stream.close()
+    # Only the caller that drove the stream runs the completion hook
+    if subscription.leader and request.on_complete is not None:
+        request.on_complete("".join(chunks))
+
+
+def run_prepared(prepared):
+    """Yield the answer for a handler's output: drive a ``ChatRequest`` or
+    pass ready-made chunks through."""
+    if isinstance(prepared, ChatRequest):
+        return run_chat(prepared)
+    return prepared
+
+
+async def arun_chat(client, request):
+    """Drive ``request`` with an async client, yielding text deltas."""
+    if LLM_COALESCE:
+        subscription, stream= async_flights.stream(client, request.stage, request.params)
+    else:
+        subscription, stream= None, astream_chat(client, request.stage, **request.params)
+    chunks= []
+    try:
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+    finally:
+        await stream.aclose()
+    if (subscription is None or subscription.leader) and request.on_complete is not None:
+        request.on_complete("".join(chunks))
+
+
+def complete_chat(client, stage, **params):
+    """Run a non-streaming chat completion and return its message text."""
+    with tracing.span(stage):
+        completion= llm_client.complete(client, stage, params)
+    usage= getattr(completion, "usage", None)
+    if usage is not None:
+        tracing.add_tokens(usage.prompt_tokens, usage.completion_tokens)
+    return completion.choices[0].message.content
+
+
+async def acomplete_chat(client, stage, **params):
+    """Async counterpart of ``complete_chat``."""
+    start= time.perf_counter()
+    completion= await llm_client.acomplete(client, stage, params)
+    tracing.record(stage, time.perf_counter() - start)
+    usage= getattr(completion, "usage", None)
+    if usage is not None:
+        tracing.add_tokens(usage.prompt_tokens, usage.completion_tokens)
+    return completion.choices[0].message.content
+
+
+def _record_usage(chunk):
+    usage= getattr(getattr(chunk, "x_groq", None), "usage", None)
+    if usage is not None:
+        tracing.add_tokens(usage.prompt_tokens, usage.completion_tokens)
+
+
+def _content(chunk):
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
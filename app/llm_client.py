@@ -0,0 +1,451 @@
+"""Shared Groq clients with connection pooling, deadlines, retries and hedging.
+
+Every module that talks to Groq uses ``get_client`` (or ``get_async_client``
+on the async backend). That gives the whole process one keep-alive HTTP
+connection pool instead of one per module.
+
+Requests carry per-route deadlines looked up from the stage name
+(``"faq.llm"`` -> ``faq``): a time-to-first-token limit and a total limit.
+Retryable failures before the first chunk (connection errors, timeouts,
+429 and 5xx) are retried with full-jitter exponential backoff. The SDK's own
+retries are disabled so the two do not stack.
+
+With ``LLM_HEDGE=1``, a stream whose first chunk has not arrived within the
+stage's observed p95 TTFT (or ``LLM_HEDGE_DELAY``) gets a second, identical
+request. Whichever responds first is kept and the other is closed. Hedges
+are capped at ``LLM_HEDGE_BUDGET`` of all streams so a slow upstream is not
+hit with twice the load.
+"""
+
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from dotenv import load_dotenv
+from groq import APIConnectionError, APIStatusError, APITimeoutError, AsyncGroq, Groq
+
+from lifecycle import singleton
+
+load_dotenv()
+
+
+LLM_MAX_CONNECTIONS= int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE= int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY= float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT= float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_RETRIES= int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE= float(os.getenv("LLM_RETRY_BASE", "0.25"))
+LLM_RETRY_CAP= float(os.getenv("LLM_RETRY_CAP", "4"))
+LLM_HEDGE= os.getenv("LLM_HEDGE", "0") == "1"
+# Fixed hedge delay in seconds; 0 uses the stage's observed p95 TTFT
+LLM_HEDGE_DELAY= float(os.getenv("LLM_HEDGE_DELAY", "0"))
+# Upper bound on hedged requests as a fraction of all streams
+LLM_HEDGE_BUDGET= float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+HEDGE_MIN_SAMPLES= 20
+TTFT_WINDOW= 500
+
+# (ttft, total) seconds per route; override with LLM_TTFT_TIMEOUT_<ROUTE> / LLM_TOTAL_TIMEOUT_<ROUTE>
+DEFAULT_DEADLINES= {
+    "faq": (5.0, 30.0),
+    "sql": (5.0, 30.0),
+    "small_talk": (5.0, 20.0),
+}
+FALLBACK_DEADLINES= (10.0, 60.0)
+
+_END= object()
+
+
+class DeadlineExceeded(Exception):
+    """A request missed its route's time-to-first-token or total deadline."""
+
+
+# What the SDK and httpx raise when a connect or read timeout fires
+TIMEOUT_ERRORS= (APITimeoutError, httpx.TimeoutException)
+
+
+def deadlines_for(stage):
+    """``(ttft, total)`` deadline in seconds for ``stage``."""
+    route= stage.split(".")[0]
+    ttft, total= DEFAULT_DEADLINES.get(route, FALLBACK_DEADLINES)
+    suffix= route.upper()
+    return (float(os.getenv(f"LLM_TTFT_TIMEOUT_{suffix}", ttft)),
+            float(os.getenv(f"LLM_TOTAL_TIMEOUT_{suffix}", total)))
+
+
+def _limits():
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                        keepalive_expiry=LLM_KEEPALIVE_EXPIRY)
+
+
+@singleton("llm")
+def get_client():
+    """Process-wide ``Groq`` client on a pooled keep-alive connection."""
+    return Groq(max_retries=0, http_client=httpx.Client(limits=_limits()))
+
+
+@singleton("llm_async")
+def get_async_client():
+    """Process-wide ``AsyncGroq`` client, created on first use."""
+    return AsyncGroq(max_retries=0, http_client=httpx.AsyncClient(limits=_limits()))
+
+
+class Stats:
+    def __init__(self):
+        self._lock= threading.Lock()
+        self.counts= {"streams": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+        self._ttft= {}
+
+    def add(self, name, count=1):
+        with self._lock:
+            self.counts[name]+= count
+
+    def try_hedge(self):
+        """Count a hedge if it fits within ``LLM_HEDGE_BUDGET``."""
+        with self._lock:
+            if self.counts["hedges"] + 1 > LLM_HEDGE_BUDGET * self.counts["streams"]:
+                return False
+            self.counts["hedges"]+= 1
+            return True
+
+    def observe_ttft(self, stage, seconds):
+        with self._lock:
+            self._ttft.setdefault(stage, deque(maxlen=TTFT_WINDOW)).append(seconds)
+
+    def ttft_p95(self, stage):
+        with self._lock:
+            samples= sorted(self._ttft.get(stage, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+stats= Stats()
+
+
+def hedge_delay(stage):
+    """Seconds to wait for a first chunk before hedging, or None to not hedge."""
+    if not LLM_HEDGE:
+        return None
+    if LLM_HEDGE_DELAY > 0:
+        return LLM_HEDGE_DELAY
+    return stats.ttft_p95(stage)
+
+
+def is_retryable(error):
+    if isinstance(error, (APIConnectionError, APITimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt, error=None):
+    """Full-jitter exponential backoff, honouring ``Retry-After`` on 429s."""
+    response= getattr(error, "response", None)
+    retry_after= response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_RETRY_CAP)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_RETRY_CAP, LLM_RETRY_BASE * 2 ** attempt))
+
+
+def _stream_timeout(ttft, total):
+    # The read timeout bounds the wait for the first chunk (and any later stall)
+    return httpx.Timeout(total, connect=LLM_CONNECT_TIMEOUT, read=ttft)
+
+
+def _should_retry(error, attempt, start, total):
+    return attempt < LLM_MAX_RETRIES and is_retryable(error) and time.perf_counter() - start < total
+
+
+def _deadline_error(stage, error, limit):
+    """``DeadlineExceeded`` for a timeout that is not retried any more, else None."""
+    if not isinstance(error, TIMEOUT_ERRORS):
+        return None
+    stats.add("deadline_exceeded")
+    return DeadlineExceeded(f"{stage} timed out waiting {limit:g}s for a response")
+
+
+def open_stream(client, stage, params):
+    """Start a streaming completion and yield its raw chunks.
+
+    Retries happen only before the first chunk; after that a failure is
+    raised to the caller. Raises ``DeadlineExceeded`` when the first chunk
+    (or any later one) takes longer than the TTFT deadline, once retries are
+    used up, or when the stream runs past the total deadline.
+    """
+    stats.add("streams")
+    delay= hedge_delay(stage)
+    if delay is not None:
+        return _hedged_stream(client, stage, params, delay)
+    return _stream(client, stage, params)
+
+
+def _stream(client, stage, params, cancelled=None):
+    ttft, total= deadlines_for(stage)
+    start= time.perf_counter()
+    attempt= 0
+    while True:
+        stream= None
+        try:
+            stream= client.chat.completions.create(stream=True, timeout=_stream_timeout(ttft, total), **params)
+            chunks= iter(stream)
+            first= next(chunks, _END)
+            break
+        except Exception as e:
+            if stream is not None:
+                stream.close()
+            if not _should_retry(e, attempt, start, total):
+                deadline= _deadline_error(stage, e, ttft)
+                if deadline is not None:
+                    raise deadline from e
+                raise
+            stats.add("retries")
+            time.sleep(backoff_delay(attempt, e))
+            attempt+= 1
+    try:
+        if first is _END or (cancelled is not None and cancelled.is_set()):
+            return
+        if cancelled is None:
+            # Hedged attempts are timed by the hedge from the caller's start instead
+            stats.observe_ttft(stage, time.perf_counter() - start)
+        yield first
+        try:
+            for chunk in chunks:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                if time.perf_counter() - start > total:
+                    stats.add("deadline_exceeded")
+                    raise DeadlineExceeded(f"{stage} exceeded its {total:g}s deadline")
+                yield chunk
+        except TIMEOUT_ERRORS as e:
+            # The read timeout also fires when a started stream stalls
+            raise _deadline_error(stage, e, ttft) from e
+    finally:
+        stream.close()
+
+
+def _hedged_stream(client, stage, params, delay):
+    events= queue.Queue()
+    cancelled= [threading.Event(), threading.Event()]
+
+    def attempt(index):
+        try:
+            for chunk in _stream(client, stage, params, cancelled[index]):
+                events.put((index, chunk, None))
+            events.put((index, _END, None))
+        except Exception as e:
+            events.put((index, _END, e))
+
+    def launch(index):
+        threading.Thread(target=attempt, args=(index,), name=f"llm-hedge-{index}", daemon=True).start()
+
+    launch(0)
+    start= time.perf_counter()
+    launched, failed, winner= 1, [], None
+    try:
+        while True:
+            timeout= max(0.0, delay - (time.perf_counter() - start)) if launched == 1 and delay is not None else None
+            try:
+                index, chunk, error= events.get(timeout=timeout)
+            except queue.Empty:
+                if stats.try_hedge():
+                    launch(1)
+                    launched= 2
+                else:
+                    delay= None
+                continue
+            if winner is None:
+                if chunk is _END:
+                    # This attempt finished or failed before producing anything
+                    failed.append(error)
+                    if len(failed) < launched:
+                        continue
+                    if error is not None:
+                        raise error
+                    return
+                winner= index
+                stats.observe_ttft(stage, time.perf_counter() - start)
+                if index == 1:
+                    stats.add("hedge_wins")
+                cancelled[1 - index].set()
+            elif index != winner:
+                continue
+            if chunk is _END:
+                if error is not None:
+                    raise error
+                return
+            yield chunk
+    finally:
+        for event in cancelled:
+            event.set()
+
+
+async def aopen_stream(client, stage, params):
+    """Async counterpart of ``open_stream``."""
+    stats.add("streams")
+    delay= hedge_delay(stage)
+    source= _ahedged_stream(client, stage, params, delay) if delay is not None else _astream(client, stage, params)
+    try:
+        async for chunk in source:
+            yield chunk
+    finally:
+        await source.aclose()
+
+
+async def _astream(client, stage, params, hedged=False):
+    ttft, total= deadlines_for(stage)
+    start= time.perf_counter()
+    attempt= 0
+    while True:
+        stream= None
+        try:
+            stream= await client.chat.completions.create(stream=True, timeout=_stream_timeout(ttft, total), **params)
+            chunks= stream.__aiter__()
+            first= await anext(chunks, _END)
+            break
+        except Exception as e:
+            if stream is not None:
+                await stream.close()
+            if not _should_retry(e, attempt, start, total):
+                deadline= _deadline_error(stage, e, ttft)
+                if deadline is not None:
+                    raise deadline from e
+                raise
+            stats.add("retries")
+            await asyncio.sleep(backoff_delay(attempt, e))
+            attempt+= 1
+    try:
+        if first is _END:
+            return
+        if not hedged:
+            stats.observe_ttft(stage, time.perf_counter() - start)
+        yield first
+        try:
+            async for chunk in chunks:
+                if time.perf_counter() - start > total:
+                    stats.add("deadline_exceeded")
+                    raise DeadlineExceeded(f"{stage} exceeded its {total:g}s deadline")
+                yield chunk
+        except TIMEOUT_ERRORS as e:
+            raise _deadline_error(stage, e, ttft) from e
+    finally:
+        await stream.close()
+
+
+async def _ahedged_stream(client, stage, params, delay):
+    events= asyncio.Queue()
+
+    async def attempt(index):
+        source= _astream(client, stage, params, hedged=True)
+        try:
+            async for chunk in source:
+                await events.put((index, chunk, None))
+            await events.put((index, _END, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await events.put((index, _END, e))
+        finally:
+            await source.aclose()
+
+    loop= asyncio.get_running_loop()
+    tasks= [loop.create_task(attempt(0))]
+    start= time.perf_counter()
+    failed, winner= [], None
+    try:
+        while True:
+            if len(tasks) == 1 and delay is not None:
+                try:
+                    index, chunk, error= await asyncio.wait_for(
+                        events.get(), max(0.0, delay - (time.perf_counter() - start)))
+                except asyncio.TimeoutError:
+                    if stats.try_hedge():
+                        tasks.append(loop.create_task(attempt(1)))
+                    else:
+                        delay= None
+                    continue
+            else:
+                index, chunk, error= await events.get()
+            if winner is None:
+                if chunk is _END:
+                    failed.append(error)
+                    if len(failed) < len(tasks):
+                        continue
+                    if error is not None:
+                        raise error
+                    return
+                winner= index
+                stats.observe_ttft(stage, time.perf_counter() - start)
+                if index == 1:
+                    stats.add("hedge_wins")
+                if len(tasks) > 1:
+                    tasks[1 - index].cancel()
+            elif index != winner:
+                continue
+            if chunk is _END:
+                if error is not None:
+                    raise error
+                return
+            yield chunk
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _completion_timeout(stage):
+    _, total= deadlines_for(stage)
+    return httpx.Timeout(total, connect=LLM_CONNECT_TIMEOUT)
+
+
+def complete(client, stage, params):
+    """Non-streaming completion with the stage's total deadline and retries.
+
+    Raises ``DeadlineExceeded`` when the last attempt times out.
+    """
+    start= time.perf_counter()
+    _, total= deadlines_for(stage)
+    attempt= 0
+    while True:
+        try:
+            return client.chat.completions.create(timeout=_completion_timeout(stage), **params)
+        except Exception as e:
+            if not _should_retry(e, attempt, start, total):
+                deadline= _deadline_error(stage, e, total)
+                if deadline is not None:
+                    raise deadline from e
+                raise
+            stats.add("retries")
+            time.sleep(backoff_delay(attempt, e))
+            attempt+= 1
+
+
+async def acomplete(client, stage, params):
+    """Async counterpart of ``complete``."""
+    start= time.perf_counter()
+    _, total= deadlines_for(stage)
+    attempt= 0
+    while True:
+        try:
+            return await client.chat.completions.create(timeout=_completion_timeout(stage), **params)
+        except Exception as e:
+            if not _should_retry(e, attempt, start, total):
+                deadline= _deadline_error(stage, e, total)
+                if deadline is not None:
+                    raise deadline from e
+                raise
+            stats.add("retries")
+            await asyncio.sleep(backoff_delay(attempt, e))
+            attempt+= 1
@@ -6,39 +6,39 @@ A Streamlit-based chatbot that routes user queries to appropriate handlers:
 - Small talk: General conversation
 """
 
+import os
 import streamlit as st
-from pathlib import Path
 
-from faq import faq_chain, ingest_faq_data
-from router import router
-from small_talk import talk
-from sql import sql_chain
+import lifecycle
+from conversation import Conversation, extractive_summary
 
 
-# Initialize FAQ data
-FAQ_DATA_PATH = Path(__file__).parent / "resources/faq_data.csv"
-ingest_faq_data(FAQ_DATA_PATH)
+# With a backend configured the UI only forwards queries to it (see server.py)
+BACKEND_URL = os.getenv("CHATBOT_BACKEND_URL")
+# Load models on a background thread so the first page renders immediately
+WARM_UP_BACKGROUND = os.getenv("WARM_UP_BACKGROUND", "1") == "1"
 
+if BACKEND_URL:
+    from client import stream_answer
 
-def ask_query(query: str) -> str:
-    """Route the user query to the appropriate handler.
+    def ask_query(query: str, history=()):
+        return stream_answer(BACKEND_URL, query, history=history)
+else:
+    import tracing
 
-    Args:
-        query: The user's input query string.
+    @st.cache_resource
+    def start_resources():
+        """Runs once per server process, not on every rerun or session."""
+        lifecycle.warm_up(background=WARM_UP_BACKGROUND)
+        tracing.start_metrics_server()
+        return True
 
-    Returns:
-        The response from the appropriate handler or an error message.
-    """
-    route = router(query).name
+    start_resources()
 
-    if route == "faq":
-        return faq_chain(query)
-    elif route == "sql":
-        return sql_chain(query)
-    elif route == "small_talk":
-        return talk(query)
-    else:
-        return f"Route '{route}' is not implemented."
+    def ask_query(query: str, history=()):
+        # Imported on first use; waits only if warm-up is still loading it
+        from pipeline import ask_query as run_query
+        return run_query(query, history)
 
 
 # Page configuration
@@ -76,14 +76,38 @@ st.markdown(
     """
 )
 
+if not BACKEND_URL:
+    with st.sidebar:
+        if lifecycle.ready():
+            st.success("Models loaded")
+        else:
+            st.info("Loading models in the background...")
+        with st.expander("Startup profile"):
+            st.code(lifecycle.format_profile())
+
+# Only the newest messages are rendered on each rerun; older ones load a page at a time
+CHAT_RENDER_WINDOW = int(os.getenv("CHAT_RENDER_WINDOW", "20"))
+
 # Initialize session state for message history
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "conversation" not in st.session_state:
+    # Bounded LLM context: recent turns verbatim, older ones summarised. A thin
+    # client has no Groq credentials, so it keeps the shopper's questions instead
+    st.session_state.conversation = Conversation(summarizer=extractive_summary if BACKEND_URL else None)
+if "render_window" not in st.session_state:
+    st.session_state.render_window = CHAT_RENDER_WINDOW
 
 # Display message history
 st.markdown("---")
 st.markdown("### Chat History")
-for message in st.session_state.messages:
+messages = st.session_state.messages
+hidden = max(0, len(messages) - st.session_state.render_window)
+if hidden:
+    if st.button(f"Show earlier messages ({hidden} hidden)"):
+        st.session_state.render_window += CHAT_RENDER_WINDOW
+        st.rerun()
+for message in messages[hidden:]:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -95,9 +119,13 @@ if user_query:
     with st.chat_message("user"):
         st.markdown(user_query)
     st.session_state.messages.append({"role": "user", "content": user_query})
+    conversation = st.session_state.conversation
+    history = conversation.context()
 
     # Generate and display assistant response
     with st.chat_message("assistant"):
-        response_generator = ask_query(user_query)
+        response_generator = ask_query(user_query, history)
         full_response = st.write_stream(response_generator)
-    st.session_state.messages.append({"role": "assistant", "content": full_response})
\ No newline at end of file
+    st.session_state.messages.append({"role": "assistant", "content": full_response})
+    conversation.add("user", user_query)
+    conversation.add("assistant", full_response if isinstance(full_response, str) else str(full_response))
\ No newline at end of file
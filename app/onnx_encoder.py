@@ -0,0 +1,137 @@
+"""int8-quantized ONNX Runtime backend for the MiniLM encoder.
+
+Selected with ``EMBED_BACKEND=onnx``. This backend skips the torch import,
+keeps far less memory resident and encodes faster on CPU than the PyTorch
+SentenceTransformer. The model has to be exported once:
+
+    python app/onnx_encoder.py
+
+The export downloads the fp32 ONNX graph published with the model on the
+Hugging Face hub. If that graph is unavailable, it exports the model with
+``torch.onnx``, which needs torch and transformers at export time only. It
+then quantizes the weights to int8 with onnxruntime's dynamic quantization
+and writes the graph and ``tokenizer.json`` to ``resources/onnx/``.
+``benchmarks/encoder_check.py`` compares the results with the torch encoder.
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+
+ONNX_DIR= Path(__file__).parent / "resources" / "onnx"
+MODEL_FILE= "model_int8.onnx"
+TOKENIZER_FILE= "tokenizer.json"
+# SentenceTransformer's max_seq_length for all-MiniLM-L6-v2
+MAX_SEQ_LENGTH= 256
+EMBEDDING_DIM= 384
+
+
+def export_model(model_name, output_dir=ONNX_DIR):
+    """Export ``model_name`` to an int8 ONNX graph plus tokenizer.
+
+    Returns:
+        Path of the quantized model.
+    """
+    from huggingface_hub import hf_hub_download
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir= Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path= output_dir / "model_fp32.onnx"
+    try:
+        shutil.copyfile(hf_hub_download(model_name, "onnx/model.onnx"), fp32_path)
+    except Exception:
+        _torch_export(model_name, fp32_path)
+    shutil.copyfile(hf_hub_download(model_name, TOKENIZER_FILE), output_dir / TOKENIZER_FILE)
+
+    model_path= output_dir / MODEL_FILE
+    quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+    fp32_path.unlink()
+    return model_path
+
+
+def _torch_export(model_name, path):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer= AutoTokenizer.from_pretrained(model_name)
+    model= AutoModel.from_pretrained(model_name).eval()
+    inputs= tokenizer(["export"], return_tensors="pt")
+    names= ["input_ids", "attention_mask", "token_type_ids"]
+    axes= {name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]}
+    torch.onnx.export(model, tuple(inputs[name] for name in names), str(path),
+                      input_names=names, output_names=["last_hidden_state"],
+                      dynamic_axes=axes, opset_version=14)
+
+
+class OnnxEncoder:
+    """Mean-pooled MiniLM sentence embeddings computed with onnxruntime.
+
+    ``encode`` accepts the subset of ``SentenceTransformer.encode`` arguments
+    used by ``embeddings.embed``, so the two backends are interchangeable.
+
+    Args:
+        model_dir: Directory written by ``export_model``.
+        max_length: Token limit per text; longer texts are truncated.
+        threads: onnxruntime intra-op threads (None lets it decide).
+    """
+
+    def __init__(self, model_dir=ONNX_DIR, max_length=MAX_SEQ_LENGTH, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir= Path(model_dir)
+        model_path= model_dir / MODEL_FILE
+        if not model_path.exists():
+            raise FileNotFoundError(f"{model_path} not found; export it with `python app/onnx_encoder.py`")
+
+        self.tokenizer= Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options= ort.SessionOptions()
+        options.graph_optimization_level= ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads= threads
+        self.session= ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names= {i.name for i in self.session.get_inputs()}
+        outputs= [o.name for o in self.session.get_outputs()]
+        self.output_name= "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=True,
+               convert_to_numpy=True, show_progress_bar=False):
+        sentences= list(sentences)
+        if not sentences:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        batches= [self._encode_batch(sentences[start:start + batch_size])
+                  for start in range(0, len(sentences), batch_size)]
+        vectors= np.concatenate(batches)
+        if normalize_embeddings:
+            vectors/= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def _encode_batch(self, texts):
+        encodings= self.tokenizer.encode_batch(texts)
+        mask= np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds= {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden= self.session.run([self.output_name], {k: v for k, v in feeds.items() if k in self.input_names})[0]
+        # Mean pooling over real tokens, as in the model's SentenceTransformer config
+        weights= mask[..., None].astype(np.float32)
+        return ((hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)).astype(np.float32)
+
+
+if __name__ == "__main__":
+    from embeddings import MODEL_NAME
+
+    parser= argparse.ArgumentParser(description="Export MiniLM to an int8 ONNX model")
+    parser.add_argument("--output-dir", default=str(ONNX_DIR))
+    args= parser.parse_args()
+    path= export_model(MODEL_NAME, args.output_dir)
+    print(f"Quantized model written to {path} ({path.stat().st_size / 1e6:.1f} MB)")
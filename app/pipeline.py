@@ -0,0 +1,75 @@
+"""Query pipeline shared by the Streamlit UI and offline tooling.
+
+Routes a user query to the FAQ, SQL or small-talk handler and returns the
+handler's response generator.
+"""
+
+import speculation
+import tracing
+from embeddings import embed_query
+from faq import faq_chain
+from llm import run_prepared
+from router import get_router
+from small_talk import talk
+from sql import sql_chain
+
+
+def ask_query(query: str, history=()):
+    """Route the user query to the appropriate handler.
+
+    Args:
+        query: The user's input query string.
+        history: Earlier conversation messages as chat dicts, usually
+            ``Conversation.context()``. Routing uses the query alone.
+
+    Returns:
+        The response from the appropriate handler or an error message.
+    """
+    trace = tracing.start_trace(query)
+    streaming = False
+    try:
+        response = _dispatch(query, history)
+        streaming = trace is not None and not isinstance(response, str)
+    finally:
+        tracing.detach(trace)
+        # Streams finish their trace in tracing.traced; failures and plain answers end here
+        if trace is not None and not streaming:
+            trace.finish()
+    if not streaming:
+        return response
+    return tracing.traced(trace, response)
+
+
+def route_query(query: str):
+    """Encode ``query`` and pick its route.
+
+    Returns:
+        ``(route name or None, query vector)``; the vector is reused for
+        FAQ retrieval so the query is only encoded once.
+    """
+    with tracing.span("router.encode"):
+        query_vector = embed_query(query)
+    with tracing.span("router.score"):
+        route = get_router()(vector=query_vector).name
+    tracing.set_route(route)
+    return route, query_vector
+
+
+def _dispatch(query: str, history=()):
+    route, query_vector = route_query(query)
+
+    # Ambiguous FAQ/SQL queries prepare both routes in parallel (opt-in)
+    other = speculation.runner_up(route, query_vector)
+    if other is not None:
+        route, prepared = speculation.speculate(query, query_vector, route, other, history)
+        tracing.set_route(route)
+        return run_prepared(prepared)
+
+    if route == "faq":
+        return faq_chain(query, query_embeddings=query_vector, history=history)
+    elif route == "sql":
+        return sql_chain(query, history)
+    elif route == "small_talk":
+        return talk(query, history)
+    else:
+        return f"Route '{route}' is not implemented."
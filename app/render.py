@@ -0,0 +1,82 @@
+"""Deterministic rendering of SQL results, without a comprehension LLM call.
+
+Product lists are formatted straight from the result rows in the same list
+shape ``comprehension_prompt`` asks the model for, and simple single-value
+aggregates ("AVG(price)") get a one-line answer. Anything else returns None
+from ``renderer_for`` and is left to the LLM.
+"""
+
+import re
+
+from serialize import canonical_link
+
+
+PRODUCT_COLUMNS= {"title", "price", "discount", "avg_rating", "product_link"}
+EMPTY_MESSAGE= "I couldn't find any products matching your request."
+
+AGGREGATE_RE= re.compile(r"^\s*(avg|min|max|sum|count)\s*\(\s*(?:distinct\s+)?([\w*]+)\s*\)\s*$", re.IGNORECASE)
+AGGREGATE_WORDS= {"avg": "average", "min": "lowest", "max": "highest", "sum": "total"}
+COLUMN_WORDS= {
+    "price": "price",
+    "discount": "discount",
+    "avg_rating": "rating",
+    "total_ratings": "number of ratings",
+}
+
+
+def is_product_list(columns):
+    return PRODUCT_COLUMNS.issubset(columns)
+
+
+def product_line(number, product):
+    title= product["title"].strip()
+    brand= (product.get("brand") or "").strip()
+    if brand and brand.lower() not in title.lower():
+        title= f"{brand} {title}"
+    discount= round((product["discount"] or 0) * 100)
+    return (f"{number}. {title}: Rs. {product['price']} ({discount} percent off), "
+            f"Rating: {product['avg_rating']} <{canonical_link(product['product_link'])}>\n")
+
+
+def render_products(result):
+    """Yield a short header and one formatted line per product row."""
+    count= len(result.rows)
+    yield "Here is the product I found:\n\n" if count == 1 else f"Here are {count} products I found:\n\n"
+    for number, row in enumerate(result.rows, start=1):
+        yield product_line(number, dict(zip(result.columns, row)))
+
+
+def render_aggregate(result):
+    """Yield a one-line answer for a single ``AGG(column)`` value."""
+    function, column= AGGREGATE_RE.match(result.columns[0]).groups()
+    value= result.rows[0][0]
+    function= function.lower()
+    # MIN/MAX/AVG/SUM over no rows is NULL
+    if value is None:
+        yield EMPTY_MESSAGE
+        return
+    if function == "count":
+        yield f"I found {value} matching products."
+        return
+    if isinstance(value, float):
+        value= round(value * 100) if column == "discount" else round(value, 2)
+    suffix= " percent" if column == "discount" else ""
+    prefix= "Rs. " if column == "price" else ""
+    yield f"The {AGGREGATE_WORDS[function]} {COLUMN_WORDS[column]} is {prefix}{value}{suffix}."
+
+
+def render_empty(result):
+    yield EMPTY_MESSAGE
+
+
+def renderer_for(result):
+    """Return a generator function that renders ``result``, or None."""
+    if not result.rows:
+        return render_empty
+    if is_product_list(result.columns):
+        return render_products
+    if len(result.columns) == 1 and len(result.rows) == 1:
+        match= AGGREGATE_RE.match(result.columns[0])
+        if match and (match.group(1).lower() == "count" or match.group(2) in COLUMN_WORDS):
+            return render_aggregate
+    return None
@@ -0,0 +1,83 @@
+"""Route scoring that reproduces ``SemanticRouter`` decisions with numpy.
+
+semantic-router takes the ``top_k`` utterances most similar to the query,
+groups their similarities by route, aggregates each group (mean by default)
+and picks the best route if its score clears the threshold. Doing the same
+over a whole matrix of queries lets offline tools score many queries at once
+without going through the router one call at a time.
+"""
+
+import numpy as np
+
+
+TOP_K= 5
+SCORE_THRESHOLD= 0.5
+
+
+class RouteScorer:
+    """Scores query vectors against a fixed set of utterance vectors.
+
+    Args:
+        utterance_vectors: ``(n, dim)`` L2-normalised utterance embeddings.
+        utterance_routes: Route name of each utterance.
+        top_k: Nearest utterances considered per query.
+        aggregation: ``"mean"``, ``"sum"`` or ``"max"``, as in semantic-router.
+        threshold: Minimum aggregated score for a route to be chosen.
+    """
+
+    def __init__(self, utterance_vectors, utterance_routes, top_k=TOP_K,
+                 aggregation="mean", threshold=SCORE_THRESHOLD):
+        if aggregation not in ("mean", "sum", "max"):
+            raise ValueError(f"Unsupported aggregation: {aggregation}")
+        self.vectors= np.asarray(utterance_vectors, dtype=np.float32)
+        self.route_names= list(dict.fromkeys(utterance_routes))
+        self.route_ids= np.array([self.route_names.index(r) for r in utterance_routes])
+        self.top_k= min(top_k, len(self.vectors))
+        self.aggregation= aggregation
+        self.threshold= threshold
+
+    def scores(self, query_vectors):
+        """Aggregated score per route, ``-inf`` where a route has no top-k hit.
+
+        Returns:
+            A ``(len(query_vectors), len(route_names))`` float array.
+        """
+        similarities= np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)) @ self.vectors.T
+        top= np.argpartition(-similarities, self.top_k - 1, axis=1)[:, :self.top_k]
+        top_scores= np.take_along_axis(similarities, top, axis=1)
+        top_routes= self.route_ids[top]
+
+        result= np.full((len(similarities), len(self.route_names)), -np.inf, dtype=np.float32)
+        for route in range(len(self.route_names)):
+            hit= top_routes == route
+            count= hit.sum(axis=1)
+            present= count > 0
+            if self.aggregation == "max":
+                value= np.where(hit, top_scores, -np.inf).max(axis=1)
+            else:
+                value= np.where(hit, top_scores, 0.0).sum(axis=1)
+                if self.aggregation == "mean":
+                    value= value / np.maximum(count, 1)
+            result[present, route]= value[present]
+        return result
+
+    def decide(self, scores, threshold=None):
+        """Best route per row of ``scores()`` output.
+
+        Args:
+            threshold: Overrides ``self.threshold``, e.g. to sweep thresholds
+                over scores computed once.
+
+        Returns:
+            ``(names, best_scores)``: the route name, or None below the
+            threshold, and the best aggregated score of each row.
+        """
+        threshold= self.threshold if threshold is None else threshold
+        best= scores.argmax(axis=1)
+        best_scores= scores[np.arange(len(scores)), best]
+        names= [self.route_names[b] if best_scores[i] >= threshold else None for i, b in enumerate(best)]
+        return names, best_scores
+
+    def classify(self, query_vectors):
+        """Route name (or None below the threshold) for each query vector."""
+        return self.decide(self.scores(query_vectors))[0]
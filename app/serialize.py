@@ -0,0 +1,64 @@
+"""Compact serialisation of SQL result rows for LLM prompts.
+
+Scraped Flipkart links carry ~600 characters of tracking parameters, which
+used to make up most of the comprehension prompt. Rows are sent as a header
+line plus ``|``-delimited values instead, with links reduced to their
+canonical ``/p/<itm>?pid=...`` form and floats rounded.
+"""
+
+import re
+from urllib.parse import parse_qs, urlparse, urlunparse
+
+
+# Internal columns the model never needs to see
+HIDDEN_COLUMNS= {"brand_norm", "product_key"}
+FLOAT_DIGITS= 2
+DELIMITER= "|"
+
+_TOKEN_RE= re.compile(r"\w+|[^\w\s]")
+
+
+def canonical_link(link):
+    """Strip tracking parameters, keeping the product path and ``pid``."""
+    if not link:
+        return link
+    parsed= urlparse(link)
+    pid= parse_qs(parsed.query).get("pid")
+    if "/p/" not in parsed.path:
+        return link
+    query= f"pid={pid[0]}" if pid else ""
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, "", query, ""))
+
+
+def format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{round(value, FLOAT_DIGITS):g}"
+    text= str(value).strip()
+    if text.startswith("http"):
+        text= canonical_link(text)
+    return text.replace(DELIMITER, "/").replace("\n", " ")
+
+
+def compact_rows(columns, rows):
+    """Render rows as a header line followed by one delimited line per row."""
+    keep= [i for i, name in enumerate(columns) if name not in HIDDEN_COLUMNS]
+    lines= [DELIMITER.join(columns[i] for i in keep)]
+    for row in rows:
+        lines.append(DELIMITER.join(format_value(row[i]) for i in keep))
+    return "\n".join(lines)
+
+
+def verbose_rows(columns, rows):
+    """The previous ``str(dict)`` per-row format, kept for token comparisons."""
+    return "\n".join(str(dict(zip(columns, row))) for row in rows)
+
+
+def count_tokens(text):
+    """Approximate token count: words and individual punctuation marks.
+
+    Close enough to BPE counts to compare two serialisations of the same
+    data without shipping a tokenizer.
+    """
+    return len(_TOKEN_RE.findall(text))
@@ -0,0 +1,302 @@
+"""Async HTTP backend that serves the chatbot pipeline over SSE.
+
+One event loop drives every in-flight LLM stream with the async Groq
+client, so a chat no longer pins a thread for the whole completion. The
+encoder, Chroma and SQLite work runs in a bounded thread pool, and each
+route has its own concurrency limit with a short wait queue; requests that
+would overflow it get ``503`` with ``Retry-After`` instead of piling up.
+
+    python app/server.py --port 8000
+
+    POST /ask   {"query": "...", "history": [...]}  -> text/event-stream
+    GET  /ask?q=...                                 -> text/event-stream
+    GET  /health                                    -> route limits and queue depths
+
+Each answer chunk is sent as ``data: {"text": ...}``; the stream ends with
+``event: done`` (or ``event: error``). ``history`` is optional: earlier chat
+messages (``{"role", "content"}``) the client kept, e.g. from
+``Conversation.context()``; the server itself is stateless.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+import lifecycle
+import speculation
+import tracing
+from conversation import history_messages
+from faq import prepare_faq
+from llm import ChatRequest, acomplete_chat, arun_chat, get_async_client
+from pipeline import route_query
+from small_talk import talk_request
+from sql import answer_from_sql, extract_sql, resolve_sql, sql_generation_params, sql_prompt
+
+load_dotenv()
+
+SERVER_HOST= os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT= int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS= int(os.getenv("SERVER_WORKERS", "8"))
+SERVER_MAX_QUEUE= int(os.getenv("SERVER_MAX_QUEUE", "128"))
+SERVER_QUEUE_TIMEOUT= float(os.getenv("SERVER_QUEUE_TIMEOUT", "10"))
+SERVER_MAX_BODY= 64 * 1024
+ROUTE_LIMITS= {
+    "faq": int(os.getenv("SERVER_LIMIT_FAQ", "64")),
+    "sql": int(os.getenv("SERVER_LIMIT_SQL", "32")),
+    "small_talk": int(os.getenv("SERVER_LIMIT_SMALL_TALK", "64")),
+}
+RETRY_AFTER_SECONDS= 2
+
+STATUS_TEXT= {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+              413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    """Raised when a route's wait queue is full or the wait timed out."""
+
+
+class RouteLimiter:
+    """Concurrency limit plus a bounded wait queue for one route."""
+
+    def __init__(self, limit, max_waiting, queue_timeout):
+        self.limit= limit
+        self.max_waiting= max_waiting
+        self.queue_timeout= queue_timeout
+        self.active= 0
+        self.waiting= 0
+        self.rejected= 0
+        self._semaphore= asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            self.rejected+= 1
+            raise Overloaded("queue full")
+        self.waiting+= 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected+= 1
+            raise Overloaded("queue wait timed out")
+        finally:
+            self.waiting-= 1
+        self.active+= 1
+        try:
+            yield
+        finally:
+            self.active-= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting, "rejected": self.rejected}
+
+
+class ChatServer:
+    def __init__(self, workers=SERVER_WORKERS, route_limits=ROUTE_LIMITS,
+                 max_queue=SERVER_MAX_QUEUE, queue_timeout=SERVER_QUEUE_TIMEOUT):
+        self.executor= ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chatbot")
+        self.limiters= {route: RouteLimiter(limit, max_queue, queue_timeout)
+                        for route, limit in route_limits.items()}
+
+    async def run_sync(self, fn, *args):
+        """Run blocking ``fn`` in the worker pool with the current trace active."""
+        ctx= contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, ctx.run, fn, *args)
+
+    async def prepare(self, route, query, query_vector, history=()):
+        """Handler output for ``route``: answer chunks or a ``ChatRequest``."""
+        if route == "faq":
+            return await self.run_sync(partial(prepare_faq, query, query_vector, history=history))
+        if route == "sql":
+            return await self.prepare_sql(query, history)
+        return talk_request(query, history)
+
+    async def prepare_sql(self, question, history=()):
+        try:
+            with tracing.span("sql.generate"):
+                resolved= await self.run_sync(resolve_sql, question, history)
+                generated= resolved is None
+                if generated:
+                    content= await acomplete_chat(get_async_client(), "sql.generate.llm",
+                                                  **sql_generation_params(sql_prompt, question, history))
+                    resolved= extract_sql(content), (), None
+            sql_query, params, spec= resolved
+            return await self.run_sync(answer_from_sql, question, sql_query, params, generated and not history, spec)
+        except Exception as e:
+            return iter([f"An error occurred: {str(e)}"])
+
+    async def answer(self, prepared):
+        if isinstance(prepared, ChatRequest):
+            async for chunk in arun_chat(get_async_client(), prepared):
+                yield chunk
+        else:
+            # Cached and rendered answers are already in memory
+            for chunk in prepared:
+                yield chunk
+
+    async def handle(self, reader, writer):
+        try:
+            request= await read_request(reader)
+            if request is None:
+                return
+            method, path, query_params, body= request
+            if path == "/health":
+                await send_json(writer, 200, {route: l.stats() for route, l in self.limiters.items()})
+            elif path != "/ask":
+                await send_json(writer, 404, {"error": "not found"})
+            elif method not in ("GET", "POST"):
+                await send_json(writer, 405, {"error": "use GET or POST"})
+            else:
+                query, history= parse_query(method, query_params, body)
+                if not query:
+                    await send_json(writer, 400, {"error": "missing query"})
+                else:
+                    await self.ask(writer, query, history)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            await send_json(writer, 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def ask(self, writer, query, history=()):
+        trace= tracing.start_trace(query)
+        try:
+            try:
+                route, query_vector= await self.run_sync(route_query, query)
+            except Exception as e:
+                await send_json(writer, 500, {"error": f"routing failed: {e}"})
+                return
+            prepared= None
+            other= speculation.runner_up(route, query_vector)
+            if other is not None:
+                route, prepared= await self.run_sync(speculation.speculate, query, query_vector, route, other, history)
+                tracing.set_route(route)
+            limiter= self.limiters.get(route)
+            if limiter is None:
+                await send_headers(writer)
+                await send_event(writer, {"text": f"Route '{route}' is not implemented."})
+                await send_event(writer, {}, "done")
+                return
+            try:
+                async with limiter.slot():
+                    if prepared is None:
+                        prepared= await self.prepare(route, query, query_vector, history)
+                    await self.stream(writer, prepared)
+            except Overloaded as e:
+                await send_json(writer, 503, {"error": f"{route} is overloaded: {e}"},
+                                {"Retry-After": str(RETRY_AFTER_SECONDS)})
+        finally:
+            tracing.detach(trace)
+            if trace is not None:
+                trace.finish()
+
+    async def stream(self, writer, prepared):
+        await send_headers(writer)
+        chunks= self.answer(prepared)
+        try:
+            async for chunk in chunks:
+                await send_event(writer, {"text": chunk})
+            await send_event(writer, {}, "done")
+        except ConnectionError:
+            # Client went away; closing the generator cancels the upstream stream
+            raise
+        except Exception as e:
+            await send_event(writer, {"error": str(e)}, "error")
+        finally:
+            await chunks.aclose()
+
+
+async def read_request(reader):
+    request_line= await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _= request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ValueError("malformed request line")
+    headers= {}
+    while True:
+        line= await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value= line.decode("latin-1").partition(":")
+        headers[name.strip().lower()]= value.strip()
+    length= int(headers.get("content-length") or 0)
+    if length > SERVER_MAX_BODY:
+        raise ValueError("request body too large")
+    body= await reader.readexactly(length) if length else b""
+    parts= urlsplit(target)
+    return method.upper(), parts.path.rstrip("/") or "/", parse_qs(parts.query), body
+
+
+def parse_query(method, query_params, body):
+    """``(query, history)`` from the query string or the JSON body."""
+    if method == "GET":
+        return (query_params.get("q") or [""])[0].strip(), []
+    try:
+        payload= json.loads(body or b"{}")
+    except json.JSONDecodeError:
+        raise ValueError("body must be JSON")
+    if not isinstance(payload, dict):
+        return "", []
+    query= payload.get("query")
+    history= payload.get("history") or []
+    if not isinstance(history, list):
+        raise ValueError("history must be a list")
+    return (query.strip() if isinstance(query, str) else ""), history_messages(history)
+
+
+async def send_json(writer, status, payload, headers=None):
+    body= json.dumps(payload).encode("utf-8")
+    head= [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+           "Content-Type: application/json",
+           f"Content-Length: {len(body)}",
+           "Connection: close"]
+    head+= [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def send_headers(writer):
+    writer.write(b"HTTP/1.1 200 OK\r\n"
+                 b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                 b"Cache-Control: no-cache\r\n"
+                 b"Connection: close\r\n\r\n")
+    await writer.drain()
+
+
+async def send_event(writer, payload, event=None):
+    prefix= f"event: {event}\n" if event else ""
+    writer.write(f"{prefix}data: {json.dumps(payload)}\n\n".encode("utf-8"))
+    await writer.drain()
+
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT):
+    chat_server= ChatServer()
+    await chat_server.run_sync(lifecycle.warm_up, False)
+    print(lifecycle.format_profile())
+    tracing.start_metrics_server()
+    server= await asyncio.start_server(chat_server.handle, host, port, backlog=1024)
+    print(f"Chatbot backend listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args= parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -1,10 +1,10 @@
-from groq import Groq
 from dotenv import load_dotenv
 import os
 
+from llm import ChatRequest, get_client, run_chat
+
 load_dotenv()
 
-client= Groq()
 small_talk_prompt= """You are a friendly and engaging conversational agent designed to interact with users in a natural and personable manner. \
     Your primary goal is to create a positive and enjoyable experience for users by responding to their messages with warmth, humor, and empathy.\
     You should be able to handle a wide range of conversational topics, from casual chit-chat to more in-depth discussions about various subjects.\
@@ -13,24 +13,25 @@ small_talk_prompt= """You are a friendly and engaging conversational agent desig
     Your responses should be concise, engaging, and tailored to the user's interests and preferences.\
     Above all, your mission is to be a delightful conversational companion that users look forward to chatting with."""
 
-def talk(query):
-    stream= client.chat.completions.create(
+def talk_request(query, history=()):
+    return ChatRequest("small_talk.llm", dict(
         messages=[
             {
                 "role": "system",
                 "content": small_talk_prompt,
             },
+            *history,
             {
                 "role": "user",
                 "content": query,
             }
         ],
         model=os.getenv("GROQ_MODEL"),
-        stream= True
-    )
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            yield chunk.choices[0].delta.content
+    ), client=get_client())
+
+
+def talk(query, history=()):
+    return run_chat(talk_request(query, history))
 
 
 if __name__ == "__main__":
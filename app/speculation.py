@@ -0,0 +1,150 @@
+"""Speculative preparation of both candidate routes for ambiguous queries.
+
+Usually the router's top route is clear and the pipeline runs serially. When
+the top two routes are FAQ and SQL and their scores are within
+``SPECULATIVE_MARGIN``, both preparations run in parallel: FAQ retrieval
+plus the cache lookup, and SQL resolution or generation plus the fetch.
+Only then is a route committed. The router's pick wins unless its
+preparation found nothing usable (no FAQ close enough, or SQL that failed or
+returned no rows) while the runner-up's did. The loser is discarded before
+any answer is streamed.
+
+This is opt-in (``SPECULATIVE_MARGIN`` > 0). Confident routes never
+speculate, so the only extra LLM spend is at most one SQL-generation call
+per ambiguous query. The answer itself is only generated for the committed
+route.
+
+``stats`` reports how much preparation time ran in parallel rather than in
+sequence (``hidden_seconds``) against the time and SQL-generation calls
+spent on discarded routes. It also counts how often the runner-up was
+committed instead of the router's pick.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+import numpy as np
+
+import tracing
+from faq import best_similarity, prepare_faq, query_qa_results
+from router import get_route_scorer
+from sql import prepare_sql, respond_to_result
+
+
+SPECULATIVE_MARGIN= float(os.getenv("SPECULATIVE_MARGIN", "0"))
+SPECULATIVE_WORKERS= int(os.getenv("SPECULATIVE_WORKERS", "8"))
+FAQ_MIN_SIMILARITY= float(os.getenv("FAQ_MIN_SIMILARITY", "0.5"))
+ENABLED= SPECULATIVE_MARGIN > 0
+SPECULATIVE_PAIR= {"faq", "sql"}
+
+
+class Outcome(NamedTuple):
+    """One route's speculative preparation."""
+
+    prepared: Any
+    found: bool
+    seconds: float
+    llm_calls: int
+
+
+class SpeculationStats:
+    def __init__(self):
+        self._lock= threading.Lock()
+        self.speculated= 0
+        self.overrides= 0
+        self.hidden_seconds= 0.0
+        self.wasted_seconds= 0.0
+        self.wasted_llm_calls= 0
+
+    def record(self, override, hidden, wasted, wasted_llm_calls):
+        with self._lock:
+            self.speculated+= 1
+            self.overrides+= int(override)
+            self.hidden_seconds+= hidden
+            self.wasted_seconds+= wasted
+            self.wasted_llm_calls+= wasted_llm_calls
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "speculated": self.speculated,
+                "overrides": self.overrides,
+                "hidden_seconds": round(self.hidden_seconds, 4),
+                "wasted_seconds": round(self.wasted_seconds, 4),
+                "wasted_llm_calls": self.wasted_llm_calls,
+            }
+
+
+stats= SpeculationStats()
+_pool= ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculate") if ENABLED else None
+
+
+def runner_up(route, query_vector):
+    """The second candidate worth preparing alongside ``route``, or None.
+
+    Only FAQ/SQL pairs whose scores are within ``SPECULATIVE_MARGIN``
+    qualify; small talk has no preparation to overlap.
+    """
+    if not ENABLED or route not in SPECULATIVE_PAIR:
+        return None
+    other= (SPECULATIVE_PAIR - {route}).pop()
+    route_scorer= get_route_scorer()
+    scores= route_scorer.scores(query_vector)[0]
+    names= route_scorer.route_names
+    own, rival= scores[names.index(route)], scores[names.index(other)]
+    if np.isfinite(rival) and own - rival < SPECULATIVE_MARGIN:
+        return other
+    return None
+
+
+def _prepare_faq(query, query_vector, history):
+    results= query_qa_results(query, query_vector)
+    prepared= prepare_faq(query, query_vector, results=results, history=history)
+    return prepared, best_similarity(results) >= FAQ_MIN_SIMILARITY, 0
+
+
+def _prepare_sql(query, query_vector, history):
+    try:
+        result, generated= prepare_sql(query, history)
+    except Exception as e:
+        return iter([f"An error occurred: {str(e)}"]), False, 0
+    return respond_to_result(query, result), bool(result.rows), int(generated)
+
+
+_PREPARE= {"faq": _prepare_faq, "sql": _prepare_sql}
+
+
+def _timed(prepare, query, query_vector, history):
+    start= time.perf_counter()
+    prepared, found, llm_calls= prepare(query, query_vector, history)
+    return Outcome(prepared, found, time.perf_counter() - start, llm_calls)
+
+
+def speculate(query, query_vector, route, other, history=()):
+    """Prepare ``route`` and ``other`` in parallel and commit to one.
+
+    Args:
+        history: Earlier conversation messages, passed to both preparations.
+
+    Returns:
+        ``(committed route, prepared output)``.
+    """
+    start= time.perf_counter()
+    futures= {
+        name: _pool.submit(contextvars.copy_context().run, _timed, _PREPARE[name], query, query_vector, history)
+        for name in (route, other)
+    }
+    outcomes= {name: future.result() for name, future in futures.items()}
+    wall= time.perf_counter() - start
+
+    override= not outcomes[route].found and outcomes[other].found
+    winner, loser= (other, route) if override else (route, other)
+    hidden= max(0.0, sum(o.seconds for o in outcomes.values()) - wall)
+    stats.record(override, hidden, outcomes[loser].seconds, outcomes[loser].llm_calls)
+    tracing.record("speculation.hidden", hidden)
+    tracing.record("speculation.wasted", outcomes[loser].seconds)
+    return winner, outcomes[winner].prepared
@@ -1,16 +1,27 @@
-import sqlite3
+import logging
 import os
-import pandas as pd
-from groq import Groq
+from functools import lru_cache
 from dotenv import load_dotenv
 
+import tracing
+from catalog import ColumnarCatalog
+from db import QueryExecutor, ResultCache
+from lifecycle import singleton
+from llm import ChatRequest, complete_chat, get_client, run_chat, run_prepared
+from sql_cache import cache_from_env
+from render import EMPTY_MESSAGE, renderer_for
+from serialize import compact_rows, count_tokens, verbose_rows
+from sql_rules import parse_question
+
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # print(os.getenv("GROQ_MODEL"))
 
 
-client= Groq()
+sql_cache= cache_from_env()
 
 sql_prompt= """You are an expert in understanding the database schema and generating SQL queries for a natural language question asked
 pertaining to the data you have. The schema is provided in the schema tags. 
@@ -20,22 +31,27 @@ table: product
 fields: 
 product_link - string (hyperlink to product)	
 title - string (name of the product)	
-brand - string (brand of the product)	
+brand - string (brand of the product, as scraped)	
+brand_norm - string (brand in lowercase with surrounding spaces removed; indexed)	
 price - integer (price of the product in Indian Rupees)	
 discount - float (discount on the product. 10 percent discount is represented as 0.1, 20 percent as 0.2, and such.)	
 avg_rating - float (average rating of the product. Range 0-5, 5 is the highest.)	
 total_ratings - integer (total number of ratings for the product)
 
+table: product_fts (FTS5 full-text index over product.title and product.brand, rowid = product.rowid)
 </schema>
-Make sure whenever you try to search for the brand name, the name can be in any case. 
-So, make sure to use %LIKE% to find the brand in condition. Never use "ILIKE". 
+Whenever you search for a brand, compare the lowercase brand name against brand_norm with = or IN,
+for example brand_norm = 'nike' or brand_norm IN ('nike', 'adidas'). Never use LIKE or "ILIKE" on brand.
+When the question describes the kind of product (running, sneakers, formal, a colour and so on), filter titles with
+rowid IN (SELECT rowid FROM product_fts WHERE product_fts MATCH '"running" "sneakers"') instead of LIKE '%...%'.
+Price, discount and avg_rating are indexed, so filter and sort on them directly.
 Create a single SQL query for the question provided. 
 The query should have all the fields in SELECT clause (i.e. SELECT *)
 
 Just the SQL query is needed, nothing more. Always provide the SQL in between the <SQL></SQL> tags."""
 
 
-comprehension_prompt = """You are an expert in understanding the context of the question and replying based on the data pertaining to the question provided. You will be provided with Question: and Data:. The data will be in the form of an array or a dataframe or dict. Reply based on only the data provided as Data for answering the question asked as Question. Do not write anything like 'Based on the data' or any other technical words. Just a plain simple natural language response.
+comprehension_prompt = """You are an expert in understanding the context of the question and replying based on the data pertaining to the question provided. You will be provided with Question: and Data:. The data is a table: the first line holds the column names and each following line is one row, with values separated by |. Reply based on only the data provided as Data for answering the question asked as Question. Do not write anything like 'Based on the data' or any other technical words. Just a plain simple natural language response.
 The Data would always be in context to the question asked. For example is the question is “What is the average rating?” and data is “4.3”, then answer should be “The average rating for the product is 4.3”. So make sure the response is curated with the question and data. Make sure to note the column names to have some context, if needed, for your response.
 There can also be cases where you are given an entire dataframe in the Data: field. Always remember that the data field contains the answer of the question asked. All you need to do is to always reply in the following format when asked about a product: 
 Produt title, price in indian rupees, discount, and rating, and then product link. Take care that all the products are listed in list format, one line after the other. Not as a paragraph.
@@ -47,13 +63,15 @@ For example:
 """
 
 
-def generate_sql_query(prompt, query):
-    chat_completion = client.chat.completions.create(
+def sql_generation_params(prompt, query, history=()):
+    return dict(
     messages=[
         {
             "role": "system",
             "content": prompt,
         },
+        # Earlier turns let follow-ups like "show cheaper ones" refine the last query
+        *history,
         {
             "role": "user",
             "content": query,
@@ -63,29 +81,117 @@ def generate_sql_query(prompt, query):
     temperature=0.2,
     max_tokens=1024
     )
-    return chat_completion.choices[0].message.content.split("<SQL>")[1].split("</SQL>")[0].strip()
 
 
-def sql_chain(question):
+def extract_sql(content):
+    return content.split("<SQL>")[1].split("</SQL>")[0].strip()
+
+
+def generate_sql_query(prompt, query, history=()):
+    content = complete_chat(get_client(), "sql.generate.llm", **sql_generation_params(prompt, query, history))
+    return extract_sql(content)
+
+
+def resolve_sql(question, history=()):
+    """SQL for ``question`` that needs no LLM call, or None.
+
+    Args:
+        history: Earlier conversation messages. With history, only questions
+            that name a brand or product type are taken as self-contained,
+            and the generated-SQL cache (keyed by question alone) is skipped.
+
+    Returns:
+        ``(sql, params, spec)`` from the rule parser or the generated-SQL
+        cache; ``spec`` is the parsed ``ProductQuery``, or None for cached SQL.
+    """
+    # Common brand/price/discount/rating filters skip the LLM entirely
+    spec = parse_question(question, known_brands())
+    if spec is not None and (not history or spec.brands or spec.terms):
+        return (*spec.to_sql(), spec)
+    if history:
+        return None
+    cached_sql = sql_cache.get(question)
+    if cached_sql is not None:
+        return cached_sql, (), None
+    return None
+
+
+def fetch_result(question, sql_query, params=(), generated=False, spec=None):
+    """Execute ``sql_query`` for ``question``.
+
+    Args:
+        generated: True when the SQL came from the LLM, so it is cached
+            once it has executed successfully.
+        spec: The ``ProductQuery`` behind ``sql_query``, answered by the
+            columnar engine when it is enabled, supports the spec and its
+            snapshot is current.
+    """
+    catalog = get_catalog() if spec is not None else None
+    # Truncated to save tokens
+    with tracing.span("sql.fetch"):
+        result = None
+        if catalog is not None and catalog.supports(spec):
+            # None while the in-memory snapshot is behind the database file
+            result = catalog.query(spec, max_rows=CONTEXT_ROWS)
+        if result is None:
+            result = fetch_data(sql_query, params, max_rows=CONTEXT_ROWS)
+    if generated:
+        sql_cache.put(question, sql_query)
+    return result
+
+
+def respond_to_result(question, result):
+    """Answer chunks for ``result``, or a ``ChatRequest`` when it needs the
+    comprehension LLM."""
+    # Product lists and simple aggregates are formatted without a second LLM call
+    renderer = renderer_for(result) if RENDER_MODE == "template" else None
+    if renderer is not None:
+        return renderer(result)
+    if not result.rows:
+        return iter([EMPTY_MESSAGE])
+    return comprehension_request(question, result)
+
+
+def answer_from_sql(question, sql_query, params=(), generated=False, spec=None):
+    """Execute ``sql_query`` and turn the rows into an answer."""
+    return respond_to_result(question, fetch_result(question, sql_query, params, generated, spec))
+
+
+def prepare_sql(question, history=()):
+    """Resolve or generate SQL for ``question`` and execute it.
+
+    Args:
+        history: Earlier conversation messages (see ``conversation.py``).
+
+    Returns:
+        ``(result, generated)`` where ``generated`` tells whether the
+        SQL-generation LLM was called.
+    """
+    with tracing.span("sql.generate"):
+        resolved = resolve_sql(question, history)
+        generated = resolved is None
+        sql_query, params, spec = resolved or (generate_sql_query(sql_prompt, question, history), (), None)
+    # SQL generated from history only answers this conversation, so it is not cached
+    return fetch_result(question, sql_query, params, generated and not history, spec), generated
+
+
+def sql_chain(question, history=()):
     try:
-        sql_query = generate_sql_query(sql_prompt, question)
-        df = fetch_data(sql_query)
-        
-        if df is None or df.empty:
-            yield "I couldn't find any products matching your request."
-            
-        # Truncate to save tokens
-        context = df.head().to_dict(orient='records')
-        yield from comprehension_chain(question, context)
+        result, _ = prepare_sql(question, history)
+        yield from run_prepared(respond_to_result(question, result))
     except Exception as e:
         yield f"An error occurred: {str(e)}"
 
 
-def comprehension_chain(question, data):
-    # Converting dict to a cleaner string format saves tokens compared to raw JSON
-    data_str = "\n".join([str(row) for row in data])
-    
-    stream = client.chat.completions.create(
+def comprehension_request(question, result):
+    # Header plus delimited values with canonical links, instead of str(dict) per row
+    data_str = compact_rows(result.columns, result.rows)
+    # The comparison re-serialises every row, so it is only paid for when debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        before, after = count_tokens(verbose_rows(result.columns, result.rows)), count_tokens(data_str)
+        logger.debug("comprehension data: %d -> %d tokens (%d saved)", before, after, before - after)
+
+    return ChatRequest("sql.comprehension", dict(
         messages=[
             {"role": "system", "content": comprehension_prompt},
             {"role": "user", "content": f"Question: {question}\nData: {data_str}"}
@@ -94,22 +200,70 @@ def comprehension_chain(question, data):
         temperature=0.2,
         # max_tokens can be higher if the response is a long list
         max_tokens=2048,
-        stream=True 
-    )
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            yield chunk.choices[0].delta.content
+    ), client=get_client())
+
+
+def comprehension_chain(question, result):
+    yield from run_chat(comprehension_request(question, result))
 
 
 
 DB_PATH= os.path.join(os.path.dirname(__file__), 'resources', 'ecommerce_data.db')
+CONTEXT_ROWS= 5
+# "columnar" answers rule-parsed questions from in-memory NumPy columns (see catalog.py)
+SQL_ENGINE= os.getenv("SQL_ENGINE", "sqlite")
+# "template" renders product lists directly; "llm" always uses comprehension_chain
+RENDER_MODE= os.getenv("SQL_RENDER_MODE", "template")
+
+@singleton("db")
+def get_executor():
+    """Process-wide product database executor."""
+    # Many phrasings resolve to the same SQL; repeats are served from memory until the catalog changes
+    cache_bytes= int(os.getenv("SQL_RESULT_CACHE_BYTES", str(16 * 1024 * 1024)))
+    executor= QueryExecutor(
+        DB_PATH,
+        max_rows= int(os.getenv("SQL_MAX_ROWS", "50")),
+        timeout= float(os.getenv("SQL_TIMEOUT", "2.0")),
+        immutable= os.getenv("SQL_IMMUTABLE", "0") == "1",
+        cache= ResultCache(cache_bytes) if cache_bytes > 0 else None,
+    )
+    # The brand list the rule parser matches against is derived from the catalog too
+    executor.add_listener(_known_brands.cache_clear)
+    return executor
+
+
+def fetch_data(query, params=(), max_rows=...):
+    """Execute a read-only SELECT; returns a ``QueryResult`` of row tuples."""
+    return get_executor().execute(query, params, max_rows=max_rows)
+
+
+@singleton("catalog")
+def get_catalog():
+    """The columnar engine when ``SQL_ENGINE=columnar``, otherwise None."""
+    if SQL_ENGINE != "columnar":
+        return None
+    return ColumnarCatalog(DB_PATH, lambda sql, params: fetch_data(sql, params, max_rows=None))
+
+
+def result_cache_stats():
+    """Hit rate and size of the SQL result cache, or None when it is disabled."""
+    cache= get_executor().cache
+    return cache.stats if cache is not None else None
+
+
+def known_brands():
+    """Distinct brand names in the catalog, lowercased and stripped.
+
+    Cached until the executor sees the catalog change.
+    """
+    get_executor().check_catalog()
+    return _known_brands()
 
 
-def fetch_data(query):
-    if query.strip().upper().startswith("SELECT"):
-        with sqlite3.connect(DB_PATH) as conn:
-            df= pd.read_sql_query(query, conn)
-            return df
+@lru_cache(maxsize=1)
+def _known_brands():
+    result= fetch_data("SELECT DISTINCT brand_norm FROM product WHERE brand_norm != ''", max_rows=None)
+    return tuple(sorted(brand for (brand,) in result.rows))
 
     
 
@@ -124,5 +278,5 @@ if __name__ == "__main__":
 
     # sql_query = generate_sql_query(sql_prompt, query)
     # print(sql_query)
-    # df = fetch_data(sql_query)
-    # print(df.head())
\ No newline at end of file
+    # result = fetch_data(sql_query)
+    # print(result.rows)
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""Cache of LLM-generated SQL keyed by a normalised form of the question.
+
+Repeat product questions go straight to the database instead of waiting on
+the model. Entries are only stored once the SQL has executed successfully.
+The cache is an in-process LRU, optionally backed by a SQLite file so it
+survives restarts and is shared between worker processes.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+from sql_rules import NUMBER, parse_number
+
+
+def _canonical_number(match):
+    value= parse_number(match.group(1))
+    return f" {value:g} "
+
+
+def normalize_question(question):
+    """Canonicalise case, whitespace, punctuation and number formats.
+
+    "Shoes under Rs. 3,000!" and "shoes under 3000 rupees" both normalise to
+    "shoes under 3000 rs".
+    """
+    text= question.lower()
+    text= re.sub(r"(?:rs\.?|inr|₹)\s*" + NUMBER, r" \1 rs ", text)
+    text= re.sub(NUMBER + r"\s*(?:rupees|rupee|rs\.?|inr|/-)", r" \1 rs ", text)
+    text= re.sub(NUMBER + r"\s*(?:%|percent|per cent)", r" \1 pct ", text)
+    text= re.sub(NUMBER, _canonical_number, text)
+    text= re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", text)
+    text= re.sub(r"\b(rs)(?:\s+rs)+\b", r"\1", text)
+    return " ".join(text.split())
+
+
+class SQLCache:
+    """Bounded LRU of ``normalised question -> SQL``.
+
+    Args:
+        max_entries: Maximum number of cached queries.
+        path: Optional SQLite file for persistence across restarts and
+            worker processes.
+    """
+
+    def __init__(self, max_entries=512, path=None):
+        self.max_entries= max_entries
+        self.path= path
+        self.hits= 0
+        self.misses= 0
+        self._entries= OrderedDict()
+        self._lock= threading.Lock()
+        if path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS sql_cache ("
+                    "question TEXT PRIMARY KEY, sql TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+
+    @contextmanager
+    def _connect(self):
+        """A short-lived connection, committed on success and always closed."""
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn, conn:
+            yield conn
+
+    def get(self, question):
+        key= normalize_question(question)
+        with self._lock:
+            sql= self._entries.get(key)
+            if sql is not None:
+                self._entries.move_to_end(key)
+        if sql is None and self.path:
+            with self._connect() as conn:
+                row= conn.execute("SELECT sql FROM sql_cache WHERE question = ?", (key,)).fetchone()
+                if row:
+                    sql= row[0]
+                    conn.execute("UPDATE sql_cache SET last_used = ? WHERE question = ?", (time.time(), key))
+            if sql is not None:
+                self._remember(key, sql)
+        if sql is None:
+            self.misses+= 1
+        else:
+            self.hits+= 1
+        return sql
+
+    def put(self, question, sql):
+        key= normalize_question(question)
+        self._remember(key, sql)
+        if self.path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO sql_cache (question, sql, last_used) VALUES (?, ?, ?) "
+                    "ON CONFLICT(question) DO UPDATE SET sql = excluded.sql, last_used = excluded.last_used",
+                    (key, sql, time.time()),
+                )
+                conn.execute(
+                    "DELETE FROM sql_cache WHERE question NOT IN "
+                    "(SELECT question FROM sql_cache ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def _remember(self, key, sql):
+        with self._lock:
+            self._entries[key]= sql
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @property
+    def stats(self):
+        total= self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+        }
+
+
+def cache_from_env():
+    """Build the SQL cache from ``SQL_CACHE_*`` environment variables."""
+    return SQLCache(
+        max_entries= int(os.getenv("SQL_CACHE_MAX_ENTRIES", "512")),
+        path= os.getenv("SQL_CACHE_PATH") or None,
+    )
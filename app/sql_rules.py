@@ -0,0 +1,266 @@
+"""Rule-based NL to SQL parser for common product filters.
+
+Most product questions are a brand plus a few numeric filters ("Puma shoes
+under 3000 rupees with at least 20% discount"). ``parse_question`` turns
+those into a parameterised query against the ``product`` table without an
+LLM round trip. It only accepts a question when every word is accounted for
+by a recognised filter or by neutral filler; anything else returns None and
+the caller falls back to LLM SQL generation.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+
+
+NUMBER= r"(\d[\d,]*(?:\.\d+)?k?)"
+CURRENCY= r"(?:rs\.?|inr|₹)?\s*"
+RUPEES= r"(?:\s*(?:rupees|rupee|rs\.?|inr|/-))?"
+PERCENT= r"\s*(?:%|percent|per cent|pc)"
+
+FILLER_WORDS= {
+    "i", "we", "me", "you", "want", "wanna", "need", "would", "like", "to", "buy",
+    "find", "show", "list", "give", "get", "search", "look", "looking", "see",
+    "all", "any", "some", "are", "is", "there", "do", "does", "have", "has",
+    "stock", "sell", "carry", "with", "a", "an", "the", "of", "from", "that",
+    "which", "what", "on", "in", "for", "by", "and", "or", "please", "can",
+    "could", "available", "right", "now", "currently", "shoes", "shoe",
+    "footwear", "pairs", "pair", "products", "product", "items", "options",
+    "cost", "costs", "costing", "priced", "price", "prices", "at", "it", "them",
+    "one", "ones", "your", "my", "also", "only", "just", "both", "either",
+}
+
+# Product-type and colour words answered through the FTS5 title index
+TITLE_TERMS= {
+    "running", "walking", "sports", "sport", "gym", "sneakers", "sneaker",
+    "training", "casual", "casuals", "jogging", "lightweight", "party",
+    "trekking", "hiking", "formal", "loafers", "boots", "sandals", "slippers",
+    "flats", "heels", "women", "womens", "ladies", "girls", "men", "mens",
+    "black", "white", "red", "blue", "navy", "grey", "gray", "pink", "green",
+    "beige", "brown", "yellow", "purple", "orange",
+}
+
+# Left in place of matched spans, so the words between them can still be checked
+BRAND_MARK= "\x01"
+CLAUSE_MARK= "\x02"
+
+# "under 3000" excludes 3000 and "up to 3000" includes it; likewise "over" and "at least".
+# The same words are strict for ratings, rating counts and discounts too.
+STRICTLY_ABOVE= ("above", "over", "more than", "greater than", ">")
+BELOW_PRICE= (rf"(?:price\s+)?(?:under|below|less than|lesser than|cheaper than|lower than)"
+              rf"\s*{CURRENCY}{NUMBER}{RUPEES}")
+MAX_PRICE= (rf"(?:price\s+)?(?:within|up ?to|upto|max(?:imum)?|at most|not more than)"
+            rf"\s*{CURRENCY}{NUMBER}{RUPEES}|{CURRENCY}{NUMBER}{RUPEES}\s+(?:or|and)\s+(?:less|below|under)")
+ABOVE_PRICE= (rf"(?:price\s+)?(?:above|over|more than|greater than|higher than)"
+              rf"\s*{CURRENCY}{NUMBER}{RUPEES}")
+MIN_PRICE= (rf"(?:price\s+)?(?:at least|min(?:imum)?|not less than|starting (?:at|from))"
+            rf"\s*{CURRENCY}{NUMBER}{RUPEES}|{CURRENCY}{NUMBER}{RUPEES}\s+(?:or|and)\s+(?:more|above|over)")
+
+
+@dataclass
+class ProductQuery:
+    """Conjunctive filter and ordering spec over the ``product`` table."""
+
+    brands: list = field(default_factory=list)
+    terms: list = field(default_factory=list)
+    any_term: bool = False
+    min_price: float = None
+    max_price: float = None
+    price_above: float = None
+    price_below: float = None
+    min_discount: float = None
+    max_discount: float = None
+    discount_above: float = None
+    min_rating: float = None
+    rating_above: float = None
+    min_total_ratings: int = None
+    total_ratings_above: int = None
+    order_by: str = None
+    descending: bool = False
+    limit: int = None
+
+    def is_empty(self):
+        return self == ProductQuery()
+
+    def to_sql(self):
+        """Render the spec as ``(sql, params)`` for sqlite3."""
+        clauses, params= [], []
+        if self.brands:
+            clauses.append(f"brand_norm IN ({', '.join('?' * len(self.brands))})")
+            params.extend(self.brands)
+        if self.terms:
+            clauses.append("rowid IN (SELECT rowid FROM product_fts WHERE product_fts MATCH ?)")
+            # FTS5 reads space-separated phrases as AND
+            params.append((" OR " if self.any_term else " ").join(f'"{term}"' for term in self.terms))
+        for column, op, value in (
+            ("price", ">=", self.min_price),
+            ("price", "<=", self.max_price),
+            ("price", ">", self.price_above),
+            ("price", "<", self.price_below),
+            ("discount", ">=", self.min_discount),
+            ("discount", "<=", self.max_discount),
+            ("discount", ">", self.discount_above),
+            ("avg_rating", ">=", self.min_rating),
+            ("avg_rating", ">", self.rating_above),
+            ("total_ratings", ">=", self.min_total_ratings),
+            ("total_ratings", ">", self.total_ratings_above),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql= "SELECT * FROM product"
+        if clauses:
+            sql+= " WHERE " + " AND ".join(clauses)
+        if self.order_by:
+            sql+= f" ORDER BY {self.order_by} {'DESC' if self.descending else 'ASC'}"
+        if self.limit:
+            sql+= " LIMIT ?"
+            params.append(self.limit)
+        return sql, tuple(params)
+
+
+def parse_number(text):
+    """Parse "3,000", "2.5k" or "1500" into a number."""
+    text= text.replace(",", "")
+    if text.endswith("k"):
+        return float(text[:-1]) * 1000
+    value= float(text)
+    return int(value) if value.is_integer() else value
+
+
+class _Parser:
+    def __init__(self, question, brands):
+        self.text= " " + re.sub(r"\s+", " ", question.lower()) + " "
+        self.brands= brands
+        self.spec= ProductQuery()
+
+    def take(self, pattern, handler, placeholder=f" {CLAUSE_MARK} "):
+        """Apply ``handler`` to every match of ``pattern`` and mark where it was."""
+        def replace(match):
+            handler(match)
+            return placeholder
+        self.text= re.sub(pattern, replace, self.text)
+
+    def parse(self):
+        spec= self.spec
+        between= r"between\s*{c}{n}{p}\s*(?:and|to|-)\s*{c}{n}{p}"
+
+        # Ratings first: "more than 1000 ratings" must not read as a price
+        self.take(rf"(more than|over|above|at least|minimum(?: of)?)\s+{NUMBER}\+?\s+(?:customer\s+)?(?:ratings|reviews)",
+                  lambda m: self.bound(m, "min_total_ratings", "total_ratings_above", int(parse_number(m.group(2)))))
+        self.take(rf"{NUMBER}\+\s+(?:ratings|reviews)",
+                  lambda m: setattr(spec, "min_total_ratings", int(parse_number(m.group(1)))))
+        self.take(rf"(?:(?:an?\s+)?(?:average|avg)\s+)?(?:rating|rated|ratings)\s+(?:of\s+)?(above|over|more than|greater than|at least|of at least|>=?)\s+{NUMBER}(?:\s*stars?)?",
+                  lambda m: self.bound(m, "min_rating", "rating_above", parse_number(m.group(2))))
+        # Rating-sized numbers only, so "2000 and above" is left for the price patterns
+        self.take(r"(?<![\d.,])([0-5](?:\.\d+)?)\s*(?:stars?\s+)?(?:and|or)\s+(?:above|up|more)(?:\s+rating)?",
+                  lambda m: setattr(spec, "min_rating", parse_number(m.group(1))))
+        self.take(r"(?:best|top|highest)[\s-]rated",
+                  lambda m: self.order("avg_rating", True))
+
+        # Discounts
+        def discount_range(m):
+            spec.min_discount= parse_number(m.group(1)) / 100
+            spec.max_discount= parse_number(m.group(2)) / 100
+        self.take(rf"(?:a\s+)?discount\s+(?:of\s+)?between\s+{NUMBER}{PERCENT}?\s*(?:and|to|-)\s*{NUMBER}{PERCENT}", discount_range)
+        self.take(rf"(?:a\s+)?discount\s+of\s+(?:at least\s+)?{NUMBER}{PERCENT}(?:\s+or\s+(?:more|higher|above))?",
+                  lambda m: setattr(spec, "min_discount", parse_number(m.group(1)) / 100))
+        self.take(rf"(at least|minimum(?: of)?|more than|over|above)?\s*(?:an?\s+)?{NUMBER}{PERCENT}\s*(or\s+(?:more|higher|above)\s+)?(?:discount|off)(\s+or\s+(?:more|higher|above))?",
+                  lambda m: self.bound(m, "min_discount", "discount_above", parse_number(m.group(2)) / 100,
+                                       inclusive=bool(m.group(3) or m.group(4))))
+        self.take(r"(?:on sale|on discount|on offer|discounted|with (?:an?\s+)?(?:discount|offer))",
+                  lambda m: spec.min_discount is None and spec.discount_above is None
+                  and setattr(spec, "min_discount", 0.01))
+
+        # Prices
+        def price_range(m):
+            spec.min_price= parse_number(m.group(1))
+            spec.max_price= parse_number(m.group(2))
+        self.take(r"(?:price\s+)?" + between.format(c=CURRENCY, n=NUMBER, p=RUPEES), price_range)
+        self.take(MAX_PRICE, lambda m: setattr(spec, "max_price", parse_number(m.group(1) or m.group(2))))
+        self.take(MIN_PRICE, lambda m: setattr(spec, "min_price", parse_number(m.group(1) or m.group(2))))
+        self.take(BELOW_PRICE, lambda m: setattr(spec, "price_below", parse_number(m.group(1))))
+        self.take(ABOVE_PRICE, lambda m: setattr(spec, "price_above", parse_number(m.group(1))))
+        self.take(r"(?:cheapest|lowest[\s-]priced|least expensive|most affordable)",
+                  lambda m: self.order("price", False))
+        self.take(r"(?:most expensive|costliest|highest[\s-]priced|premium)",
+                  lambda m: self.order("price", True))
+
+        # Brands, longest names first so "hrx by hrithik roshan" wins over "hrx"
+        for brand in sorted(self.brands, key=len, reverse=True):
+            def add_brand(m, brand=brand):
+                if brand not in spec.brands:
+                    spec.brands.append(brand)
+            # Marked, so an "or" between brands is not read as one between title terms
+            self.take(rf"(?<![\w']){re.escape(brand)}(?![\w'])", add_brand, placeholder=f" {BRAND_MARK} ")
+
+        leftover= re.findall(rf"[a-z0-9%₹]+|[|{BRAND_MARK}{CLAUSE_MARK}]", self.text)
+        links, gap, since_clause= set(), [], None
+        for word in leftover:
+            word= "or" if word == "|" else word
+            if word == CLAUSE_MARK:
+                # "under 3000 or above 5000" is a disjunction the spec cannot express
+                if since_clause is not None and "or" in since_clause:
+                    return None
+                since_clause= []
+                gap.append(word)
+                continue
+            if since_clause is not None:
+                since_clause.append(word)
+            if word in TITLE_TERMS:
+                if spec.terms:
+                    if "or" in gap and (BRAND_MARK in gap or CLAUSE_MARK in gap):
+                        return None
+                    links.add("or" if "or" in gap else "and")
+                spec.terms.append(word)
+                gap= []
+            elif word in FILLER_WORDS or word == BRAND_MARK:
+                gap.append(word)
+            else:
+                return None
+        # "red or blue" is OR and "red running" is AND; a mix of both needs the LLM
+        if len(links) > 1:
+            return None
+        spec.any_term= links == {"or"}
+        if spec.is_empty():
+            return None
+        return spec
+
+    def bound(self, match, inclusive_attr, strict_attr, value, inclusive=False):
+        """Set a lower bound, strict when ``match.group(1)`` is an "above" word."""
+        strict= not inclusive and match.group(1) in STRICTLY_ABOVE
+        setattr(self.spec, strict_attr if strict else inclusive_attr, value)
+
+    def order(self, column, descending):
+        self.spec.order_by= column
+        self.spec.descending= descending
+
+
+def parse_question(question, brands):
+    """Parse ``question`` into a ProductQuery, or None if it needs the LLM.
+
+    Args:
+        question: The user's natural-language question.
+        brands: Known brand names, lowercased and stripped.
+    """
+    return _Parser(question, brands).parse()
+
+
+if __name__ == "__main__":
+    from routes import sql as sql_route
+    from sql import known_brands
+
+    brands= known_brands()
+    timings, covered= [], 0
+    for utterance in sql_route.utterances:
+        start= time.perf_counter()
+        spec= parse_question(utterance, brands)
+        timings.append(time.perf_counter() - start)
+        covered+= spec is not None
+        print(f"{'RULE' if spec else 'LLM ':4}  {utterance}")
+        if spec:
+            print(f"      {spec.to_sql()}")
+    timings.sort()
+    print(f"\nCoverage: {covered}/{len(timings)} ({covered / len(timings):.0%}) of sql route utterances skip the LLM")
+    print(f"Parse latency: p50 {timings[len(timings) // 2] * 1e6:.0f} us, "
+          f"max {timings[-1] * 1e6:.0f} us")
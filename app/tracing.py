@@ -0,0 +1,247 @@
+"""Per-request latency tracing and Prometheus metrics for ``ask_query``.
+
+Each request gets a ``Trace``; pipeline stages record spans into it with
+``span(name)``, and LLM streams record time-to-first-token, total stream time
+and token counts. Finished traces feed per-route histograms that are served
+in Prometheus text format from a local HTTP endpoint, and can optionally be
+appended to a JSON-lines log.
+
+Tracing is off unless ``METRICS_ENABLED=1`` or ``TRACE_LOG_PATH`` is set; when
+off, ``span`` hands back a shared no-op context manager and nothing else runs.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+ENABLED= os.getenv("METRICS_ENABLED", "0") == "1" or bool(os.getenv("TRACE_LOG_PATH"))
+METRICS_PORT= int(os.getenv("METRICS_PORT", "9464"))
+TRACE_LOG_PATH= os.getenv("TRACE_LOG_PATH")
+
+LATENCY_BUCKETS= (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS= (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+_current= contextvars.ContextVar("trace", default=None)
+_NULL_SPAN= nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets= buckets
+        self.counts= [0] * (len(buckets) + 1)
+        self.sum= 0.0
+        self.count= 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)]+= 1
+        self.sum+= value
+        self.count+= 1
+
+
+class Registry:
+    """Histograms keyed by ``(metric name, label tuple)``."""
+
+    def __init__(self):
+        self._histograms= {}
+        self._lock= threading.Lock()
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key= (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram= self._histograms.get(key)
+            if histogram is None:
+                histogram= self._histograms[key]= Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self):
+        """Prometheus text exposition of every histogram."""
+        lines, seen= [], set()
+        with self._lock:
+            items= sorted(self._histograms.items())
+            for (name, labels), h in items:
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                base= ",".join(f'{k}="{v}"' for k, v in labels)
+                sep= "," if base else ""
+                cumulative= 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative+= count
+                    lines.append(f'{name}_bucket{{{base}{sep}le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{base}{sep}le="+Inf"}} {h.count}')
+                lines.append(f"{name}_sum{{{base}}} {h.sum:.6f}")
+                lines.append(f"{name}_count{{{base}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry= Registry()
+_log_lock= threading.Lock()
+
+
+class Trace:
+    """Spans and token counts for one ``ask_query`` call."""
+
+    def __init__(self, query):
+        self.id= uuid.uuid4().hex[:16]
+        self.query= query
+        self.route= "unknown"
+        self.start= time.perf_counter()
+        self.spans= []
+        self.tokens= {"prompt": 0, "completion": 0}
+        self.finished= False
+        self.token= None
+
+    def record(self, name, seconds):
+        self.spans.append((name, seconds))
+
+    def finish(self):
+        if self.finished:
+            return
+        self.finished= True
+        total= time.perf_counter() - self.start
+        registry.observe("chatbot_request_duration_seconds", {"route": self.route}, total)
+        for name, seconds in self.spans:
+            registry.observe("chatbot_stage_duration_seconds", {"route": self.route, "stage": name}, seconds)
+        for kind, count in self.tokens.items():
+            if count:
+                registry.observe("chatbot_llm_tokens", {"route": self.route, "kind": kind}, count, TOKEN_BUCKETS)
+        if TRACE_LOG_PATH:
+            line= json.dumps({
+                "id": self.id,
+                "ts": time.time(),
+                "route": self.route,
+                "query": self.query,
+                "total_ms": round(total * 1000, 3),
+                "spans": [{"name": n, "ms": round(s * 1000, 3)} for n, s in self.spans],
+                "tokens": self.tokens,
+            })
+            with _log_lock, open(TRACE_LOG_PATH, "a") as f:
+                f.write(line + "\n")
+
+
+def current():
+    """The trace of the request being handled, or None."""
+    return _current.get()
+
+
+def start_trace(query):
+    """Begin a trace for ``query`` and make it current.
+
+    Pair with ``detach`` in the same context. Returns None when tracing is
+    disabled.
+    """
+    if not ENABLED:
+        return None
+    trace= Trace(query)
+    trace.token= _current.set(trace)
+    return trace
+
+
+def detach(trace):
+    """Restore the current trace to what it was before ``start_trace``.
+
+    Worker threads run in copies of the caller's context, so a trace left
+    set would follow them into unrelated work.
+    """
+    if trace is not None and trace.token is not None:
+        _current.reset(trace.token)
+        trace.token= None
+
+
+def set_route(route):
+    trace= _current.get()
+    if trace is not None:
+        trace.route= route or "none"
+
+
+@contextmanager
+def _span(trace, name):
+    start= time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Time the enclosed block as stage ``name`` of the current trace."""
+    trace= _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _span(trace, name)
+
+
+def record(name, seconds):
+    trace= _current.get()
+    if trace is not None:
+        trace.record(name, seconds)
+
+
+def add_tokens(prompt=0, completion=0):
+    trace= _current.get()
+    if trace is not None:
+        trace.tokens["prompt"]+= prompt or 0
+        trace.tokens["completion"]+= completion or 0
+
+
+def traced(trace, stream):
+    """Run ``stream`` with ``trace`` active and finish the trace when it ends.
+
+    Response generators are consumed after ``ask_query`` has returned, so the
+    trace is re-activated around every step of the stream.
+    """
+    if trace is None:
+        yield from stream
+        return
+    try:
+        while True:
+            token= _current.set(trace)
+            try:
+                chunk= next(stream)
+            except StopIteration:
+                break
+            finally:
+                _current.reset(token)
+            yield chunk
+    finally:
+        stream.close()
+        trace.finish()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body= registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server= None
+_server_lock= threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve ``/metrics`` from a daemon thread; a no-op if already running."""
+    global _server
+    with _server_lock:
+        if _server is None and ENABLED:
+            _server= ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
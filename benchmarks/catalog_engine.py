@@ -0,0 +1,204 @@
+"""Columnar NumPy engine vs SQLite on synthetic catalogs.
+
+For each catalog size this builds a synthetic ``product`` table with the
+real schema and indexes, with rows from ``synthetic.product_batches``
+(distributions fitted to the scraped catalog). It then runs a fixed set of rule-parsed questions both through
+SQLite (``QueryExecutor``, no result cache) and through ``ColumnarCatalog``.
+It reports:
+
+* load time and array memory of the columnar snapshot;
+* p50 latency per question for SQLite, for the engine's filter step
+  (``select``) and for the full engine query including the rowid fetch;
+* agreement: ordered questions must return the same sort-key sequence, and
+  every row the engine returns must satisfy the question's filters.
+
+    python benchmarks/catalog_engine.py --sizes 1000 1000000 10000000
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from run import APP_DIR, RESULTS_DIR, percentile
+from synthetic import fit_catalog, product_batches
+
+sys.path.insert(0, str(APP_DIR))
+
+from catalog import FILTERS, ColumnarCatalog  # noqa: E402
+from db import QueryExecutor  # noqa: E402
+from sql_rules import parse_question  # noqa: E402
+
+
+CONTEXT_ROWS= 5
+QUESTIONS= (
+    "nike shoes under 3000",
+    "cheapest puma shoes",
+    "best rated adidas shoes",
+    "shoes between 1000 and 2000 rupees with at least 30% discount",
+    "campus shoes with rating above 4",
+    "most expensive shoes",
+    "shoes with more than 1000 ratings under 1500",
+    "reebok or bata shoes on sale",
+    "sparx shoes with 50 percent discount",
+    "show me shoes above 5000 with rating of at least 4.5",
+)
+
+SCHEMA= """
+CREATE TABLE product (
+    product_link TEXT,
+    title TEXT,
+    brand TEXT,
+    price INTEGER,
+    discount FLOAT,
+    avg_rating FLOAT,
+    total_ratings INTEGER,
+    brand_norm TEXT,
+    product_key TEXT
+);
+CREATE INDEX idx_product_brand_norm ON product(brand_norm);
+CREATE INDEX idx_product_price ON product(price);
+CREATE INDEX idx_product_discount ON product(discount);
+CREATE INDEX idx_product_avg_rating ON product(avg_rating);
+CREATE UNIQUE INDEX idx_product_key ON product(product_key);
+"""
+
+
+def catalog_rows(model, n, seed):
+    for batch in product_batches(model, n, seed):
+        yield from ((r["link"], r["title"], r["brand"], r["price"], r["discount"], r["avg_rating"],
+                     r["total_ratings"], r["brand_norm"], r["pid"]) for r in batch)
+
+
+def build_catalog(path, n, model, seed=0):
+    start= time.perf_counter()
+    conn= sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA.replace("CREATE INDEX", "-- CREATE INDEX").replace("CREATE UNIQUE", "-- CREATE UNIQUE"))
+        with conn:
+            conn.executemany("INSERT INTO product VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", catalog_rows(model, n, seed))
+        # Indexes after the bulk load, as a real nightly rebuild would
+        for line in SCHEMA.splitlines():
+            if line.startswith("CREATE") and "INDEX" in line:
+                conn.execute(line)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def row_matches(spec, row):
+    for attr, column, compare in FILTERS:
+        bound= getattr(spec, attr)
+        if bound is not None and (row[column] is None or not compare(row[column], bound)):
+            return False
+    return not spec.brands or row["brand_norm"] in spec.brands
+
+
+def sort_keys(spec, result):
+    if not spec.order_by:
+        return None
+    column= result.columns.index(spec.order_by)
+    return [row[column] for row in result.rows]
+
+
+def timed(fn, repeat):
+    samples= []
+    for _ in range(repeat):
+        start= time.perf_counter()
+        value= fn()
+        samples.append(time.perf_counter() - start)
+    return value, percentile(samples, 50) * 1e6
+
+
+def measure(path, n, brand_names, repeat):
+    executor= QueryExecutor(path, max_rows=CONTEXT_ROWS, timeout=0)
+    catalog= ColumnarCatalog(path, lambda sql, params: executor.execute(sql, params, max_rows=None))
+    snapshot= catalog.snapshot
+    arrays= [snapshot.rowids, snapshot.brand_codes, snapshot.brand_positions, snapshot.brand_offsets,
+             *snapshot.columns.values(), *snapshot.orders.values()]
+    array_bytes= sum(a.nbytes for a in arrays)
+    questions= []
+    for question in QUESTIONS:
+        spec= parse_question(question, brand_names)
+        if spec is None or not catalog.supports(spec):
+            questions.append({"question": question, "skipped": "not rule-parsed or needs full-text search"})
+            continue
+        sql, params= spec.to_sql()
+        # One untimed run each so both sides start with warm pages and statements
+        executor.execute(sql, params)
+        catalog.query(spec, max_rows=CONTEXT_ROWS)
+        sqlite_result, sqlite_us= timed(lambda: executor.execute(sql, params), repeat)
+        _, select_us= timed(lambda: catalog.select(spec, max_rows=CONTEXT_ROWS), repeat)
+        engine_result, engine_us= timed(lambda: catalog.query(spec, max_rows=CONTEXT_ROWS), repeat)
+        rows= [dict(zip(engine_result.columns, row)) for row in engine_result.rows]
+        questions.append({
+            "question": question,
+            "sqlite_us": round(sqlite_us, 1),
+            "engine_select_us": round(select_us, 1),
+            "engine_query_us": round(engine_us, 1),
+            "speedup": round(sqlite_us / engine_us, 1) if engine_us else None,
+            "rows": len(engine_result.rows),
+            "agrees": (engine_result.columns == sqlite_result.columns
+                       and len(engine_result.rows) == len(sqlite_result.rows)
+                       and sort_keys(spec, engine_result) == sort_keys(spec, sqlite_result)
+                       and all(row_matches(spec, row) for row in rows)),
+        })
+    timed_rows= [q for q in questions if "sqlite_us" in q]
+    return {
+        "rows": n,
+        "load_seconds": round(snapshot.load_seconds, 3),
+        "array_mb": round(array_bytes / 1e6, 1),
+        "sqlite_p50_us": round(float(np.median([q["sqlite_us"] for q in timed_rows])), 1),
+        "engine_select_p50_us": round(float(np.median([q["engine_select_us"] for q in timed_rows])), 1),
+        "engine_query_p50_us": round(float(np.median([q["engine_query_us"] for q in timed_rows])), 1),
+        "all_agree": all(q["agrees"] for q in timed_rows),
+        "questions": questions,
+    }
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workdir", help="Keep the synthetic catalogs here instead of a temp dir")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/catalog-<timestamp>.json)")
+    args= parser.parse_args()
+
+    model= fit_catalog()
+    brand_names= tuple(sorted({b.strip().lower() for b in model.brands}))
+    results= []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir= Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for n in args.sizes:
+            path= workdir / f"catalog-{n}.db"
+            build_seconds= None
+            if not path.exists():
+                print(f"Building {n:,} rows...", flush=True)
+                build_seconds= round(build_catalog(path, n, model), 1)
+            result= measure(path, n, brand_names, args.repeat)
+            result["build_seconds"]= build_seconds
+            results.append(result)
+            print(f"{n:>11,} rows  load {result['load_seconds']:.2f}s  "
+                  f"sqlite p50 {result['sqlite_p50_us']:,.0f} us  "
+                  f"engine select {result['engine_select_p50_us']:,.0f} us / query {result['engine_query_p50_us']:,.0f} us  "
+                  f"agree={result['all_agree']}", flush=True)
+
+    output= Path(args.output) if args.output else RESULTS_DIR / f"catalog-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Compare the torch and int8 ONNX MiniLM encoders.
+
+Each backend runs in its own subprocess, so that its import time and
+resident memory are measured cleanly. The probe encodes every route
+utterance and every query in ``queries.json``. The parent process then
+compares the vectors and the routing decisions:
+
+* cosine similarity between the two backends' vectors for each text;
+* leave-one-out routing of every route utterance, and routing of the
+  benchmark queries, with semantic-router's top-k mean scoring;
+* import + model load time, peak RSS, single-query latency and batch
+  throughput for each backend.
+
+    python app/onnx_encoder.py            # export the ONNX model first
+    python benchmarks/encoder_check.py
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from run import APP_DIR, BENCH_DIR, RESULTS_DIR, peak_rss_mb, percentile
+
+
+BACKENDS= ("torch", "onnx")
+
+
+def load_texts(corpus_path):
+    sys.path.insert(0, str(APP_DIR))
+    from routes import ROUTES
+
+    utterances= [(route.name, u) for route in ROUTES for u in route.utterances]
+    with open(corpus_path) as f:
+        queries= [(route, q) for route, qs in json.load(f).items() for q in qs]
+    return utterances, queries
+
+
+def probe(backend, corpus_path, output, repeat):
+    """Runs inside the subprocess: load ``backend``, time it and save vectors."""
+    os.environ["EMBED_BACKEND"]= backend
+    os.environ["EMBED_BATCHING"]= "0"
+    utterances, queries= load_texts(corpus_path)
+
+    start= time.perf_counter()
+    import embeddings
+    embeddings.get_model()
+    load_seconds= time.perf_counter() - start
+
+    texts= [t for _, t in utterances] + [t for _, t in queries]
+    vectors= embeddings.embed(texts)
+
+    latencies= []
+    for _ in range(repeat):
+        for _, query in queries:
+            start= time.perf_counter()
+            embeddings.embed([query])
+            latencies.append(time.perf_counter() - start)
+
+    start= time.perf_counter()
+    for _ in range(repeat):
+        embeddings.embed(texts)
+    throughput= repeat * len(texts) / (time.perf_counter() - start)
+
+    np.save(output, vectors)
+    print(json.dumps({
+        "import_and_load_seconds": round(load_seconds, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "single_query_ms": {f"p{q}": round(percentile(latencies, q) * 1000, 2) for q in (50, 95)},
+        "batch_texts_per_second": round(throughput, 1),
+    }))
+
+
+def run_probe(backend, corpus_path, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        output= Path(tmp) / "vectors.npy"
+        completed= subprocess.run(
+            [sys.executable, __file__, "--probe", backend, "--corpus", corpus_path,
+             "--repeat", str(repeat), "--vectors", str(output)],
+            capture_output=True, text=True, check=True)
+        stats= json.loads(completed.stdout.strip().splitlines()[-1])
+        return stats, np.load(output)
+
+
+def routing_decisions(vectors, utterances):
+    from route_scores import RouteScorer
+
+    routes= [r for r, _ in utterances]
+    n= len(utterances)
+    leave_one_out= []
+    for i in range(n):
+        keep= np.arange(n) != i
+        scorer= RouteScorer(vectors[:n][keep], [r for r, k in zip(routes, keep) if k])
+        leave_one_out.append(scorer.classify(vectors[i])[0])
+    full= RouteScorer(vectors[:n], routes)
+    return leave_one_out, full.classify(vectors[n:])
+
+
+def compare(vectors, utterances, queries):
+    torch_vectors, onnx_vectors= vectors["torch"], vectors["onnx"]
+    cosine= (torch_vectors * onnx_vectors).sum(axis=1)
+    torch_loo, torch_queries= routing_decisions(torch_vectors, utterances)
+    onnx_loo, onnx_queries= routing_decisions(onnx_vectors, utterances)
+    texts= [t for _, t in utterances] + [t for _, t in queries]
+    mismatches= [
+        {"text": text, "torch": a, "onnx": b}
+        for text, a, b in zip(texts, torch_loo + torch_queries, onnx_loo + onnx_queries) if a != b
+    ]
+    return {
+        "cosine_min": round(float(cosine.min()), 4),
+        "cosine_mean": round(float(cosine.mean()), 4),
+        "utterance_agreement": round(sum(a == b for a, b in zip(torch_loo, onnx_loo)) / len(torch_loo), 4),
+        "query_agreement": round(sum(a == b for a, b in zip(torch_queries, onnx_queries)) / len(torch_queries), 4),
+        "query_accuracy": {
+            "torch": round(sum(p == r for p, (r, _) in zip(torch_queries, queries)) / len(queries), 4),
+            "onnx": round(sum(p == r for p, (r, _) in zip(onnx_queries, queries)) / len(queries), 4),
+        },
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(BENCH_DIR / "queries.json"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/encoder-<timestamp>.json)")
+    parser.add_argument("--probe", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    args= parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.corpus, args.vectors, args.repeat)
+        return
+
+    utterances, queries= load_texts(args.corpus)
+    stats, vectors= {}, {}
+    for backend in BACKENDS:
+        stats[backend], vectors[backend]= run_probe(backend, args.corpus, args.repeat)
+    results= {"backends": stats, "agreement": compare(vectors, utterances, queries)}
+
+    output= Path(args.output) if args.output else RESULTS_DIR / f"encoder-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
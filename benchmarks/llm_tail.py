@@ -0,0 +1,100 @@
+"""Tail latency of LLM streams with and without hedging.
+
+Runs the local Groq stand-in with latency spikes in a separate process and
+streams completions through ``llm.stream_chat`` from concurrent sessions,
+once with hedging off and once with it on. Reports p50/p95/p99
+time-to-first-token and total time, plus retry and hedge counts. No
+embedding model is needed.
+
+    python benchmarks/llm_tail.py --spike-rate 0.02 --spike-ttft 1.5 --requests 400
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_groq import add_config_args, config_from_args, config_to_args
+from run import APP_DIR, BENCH_DIR, percentile
+
+
+def stream_once(stream_chat, client, index):
+    start= time.perf_counter()
+    first= None
+    params= dict(messages=[{"role": "user", "content": f"hello {index}"}], model="mock")
+    for _ in stream_chat(client, "small_talk.llm", **params):
+        if first is None:
+            first= time.perf_counter() - start
+    total= time.perf_counter() - start
+    return first if first is not None else total, total
+
+
+def measure(args, hedge):
+    import llm
+    import llm_client
+
+    llm_client.LLM_HEDGE= hedge
+    llm_client.stats= llm_client.Stats()
+    client= llm_client.get_client()
+    run= lambda i: stream_once(llm.stream_chat, client, i)
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        # Warm-up at full concurrency so the hedge delay comes from a representative p95 TTFT
+        list(pool.map(run, range(args.sessions * 4)))
+        samples= list(pool.map(run, range(args.requests)))
+    ttfts= [s[0] for s in samples]
+    totals= [s[1] for s in samples]
+    return {
+        "ttft_ms": {f"p{q}": round(percentile(ttfts, q) * 1000, 1) for q in (50, 95, 99)},
+        "total_ms": {f"p{q}": round(percentile(totals, q) * 1000, 1) for q in (50, 95, 99)},
+        "hedge_delay_ms": round((llm_client.hedge_delay("small_talk.llm") or 0) * 1000, 1),
+        **llm_client.stats.snapshot(),
+    }
+
+
+def start_mock(config):
+    # Own process, so the mock's threads don't compete with the client for the GIL
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port= sock.getsockname()[1]
+    process= subprocess.Popen([sys.executable, str(BENCH_DIR / "mock_groq.py"), "--port", str(port),
+                               *config_to_args(config)], stdout=subprocess.DEVNULL)
+    url= f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/stats", timeout=1).read()
+            return process, url
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("mock server did not start")
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--sessions", type=int, default=16)
+    add_config_args(parser)
+    parser.set_defaults(spike_rate=0.02, spike_ttft=1.5, reply_tokens=20)
+    args= parser.parse_args()
+
+    process, base_url= start_mock(config_from_args(args))
+    try:
+        os.environ["GROQ_BASE_URL"]= base_url
+        os.environ["GROQ_API_KEY"]= "mock"
+        os.environ["LLM_COALESCE"]= "0"
+        sys.path.insert(0, str(APP_DIR))
+
+        report= {"no_hedge": measure(args, False), "hedge": measure(args, True)}
+        report["mock"]= json.loads(urllib.request.urlopen(base_url + "/stats").read())
+    finally:
+        process.terminate()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Local stand-in for the Groq (OpenAI-compatible) chat completions API.
+
+Replays streamed completions with a configurable time-to-first-token and
+tokens/sec, and can inject latency spikes, so the chatbot can be measured
+without network access or API spend. Point the app at it with
+``GROQ_BASE_URL=http://127.0.0.1:<port>``.
+
+    python benchmarks/mock_groq.py --port 8099 --ttft 0.25 --tps 250
+
+``--error-rate`` answers a fraction of requests with 503 to exercise retries.
+``GET /stats`` returns the request, spike and error counts.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SQL_REPLY= "<SQL>SELECT * FROM product WHERE avg_rating >= 4 ORDER BY price ASC</SQL>"
+WORDS= ("the quick brown fox jumps over the lazy dog while our shoes stay comfy "
+        "light and ready for a long walk in the park").split()
+
+
+@dataclass
+class MockConfig:
+    ttft: float = 0.25
+    tokens_per_second: float = 250.0
+    reply_tokens: int = 60
+    spike_rate: float = 0.0
+    spike_ttft: float = 2.0
+    seed: int = 0
+    error_rate: float = 0.0
+
+
+class MockState:
+    def __init__(self, config):
+        self.config= config
+        self.requests= 0
+        self.spikes= 0
+        self.errors= 0
+        self.lock= threading.Lock()
+        self.random= random.Random(config.seed)
+
+    def next_error(self):
+        with self.lock:
+            if self.config.error_rate and self.random.random() < self.config.error_rate:
+                self.errors+= 1
+                return True
+        return False
+
+    def next_ttft(self):
+        with self.lock:
+            self.requests+= 1
+            if self.config.spike_rate and self.random.random() < self.config.spike_rate:
+                self.spikes+= 1
+                return self.config.spike_ttft
+        return self.config.ttft
+
+
+def reply_for(messages, reply_tokens):
+    """SQL for SQL-generation prompts, filler text for everything else."""
+    if any("<SQL>" in (m.get("content") or "") for m in messages):
+        return [SQL_REPLY]
+    return [WORDS[i % len(WORDS)] + " " for i in range(reply_tokens)]
+
+
+def _prompt_tokens(messages):
+    return sum(len((m.get("content") or "").split()) for m in messages)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version= "HTTP/1.1"
+    state= None
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            self.send_error(404)
+            return
+        payload= json.dumps({"requests": self.state.requests, "spikes": self.state.spikes,
+                             "errors": self.state.errors}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body= json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.state.next_error():
+            payload= json.dumps({"error": {"message": "injected failure", "type": "internal_server_error"}}).encode("utf-8")
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        messages= body.get("messages", [])
+        tokens= reply_for(messages, self.state.config.reply_tokens)
+        usage= {
+            "prompt_tokens": _prompt_tokens(messages),
+            "completion_tokens": len(tokens),
+            "total_tokens": _prompt_tokens(messages) + len(tokens),
+        }
+        base= {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": body.get("model") or "mock",
+        }
+        time.sleep(self.state.next_ttft())
+        try:
+            if body.get("stream"):
+                self._stream(base, tokens, usage)
+            else:
+                self._complete(base, tokens, usage)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            self.close_connection= True
+
+    def _complete(self, base, tokens, usage):
+        payload= json.dumps({
+            **base,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, base, tokens, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        interval= 1.0 / self.state.config.tokens_per_second if self.state.config.tokens_per_second else 0
+        for i, token in enumerate(tokens):
+            if i and interval:
+                time.sleep(interval)
+            self._event({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+        self._event({**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                     "x_groq": {"id": base["id"], "usage": usage}})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """Start the mock in a daemon thread.
+
+    Returns:
+        ``(server, state, base_url)``; ``state`` counts requests and spikes.
+    """
+    state= MockState(config or MockConfig())
+    handler= type("BoundMockHandler", (MockHandler,), {"state": state})
+    server= ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads= True
+    threading.Thread(target=server.serve_forever, name="mock-groq", daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+def add_config_args(parser):
+    parser.add_argument("--ttft", type=float, default=0.25, help="Seconds before the first token")
+    parser.add_argument("--tps", type=float, default=250.0, help="Streamed tokens per second")
+    parser.add_argument("--reply-tokens", type=int, default=60, help="Tokens per non-SQL reply")
+    parser.add_argument("--spike-rate", type=float, default=0.0, help="Fraction of requests with a TTFT spike")
+    parser.add_argument("--spike-ttft", type=float, default=2.0, help="TTFT of a spiked request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+
+
+def config_from_args(args):
+    return MockConfig(args.ttft, args.tps, args.reply_tokens, args.spike_rate, args.spike_ttft, args.seed,
+                      args.error_rate)
+
+
+def config_to_args(config):
+    """Command-line flags that recreate ``config`` in a standalone mock."""
+    return ["--ttft", str(config.ttft), "--tps", str(config.tokens_per_second),
+            "--reply-tokens", str(config.reply_tokens), "--spike-rate", str(config.spike_rate),
+            "--spike-ttft", str(config.spike_ttft), "--seed", str(config.seed),
+            "--error-rate", str(config.error_rate)]
+
+
+if __name__ == "__main__":
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_config_args(parser)
+    args= parser.parse_args()
+    server, _, url= start_mock_server(config_from_args(args), args.host, args.port)
+    print(f"Mock Groq API listening on {url} (GROQ_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
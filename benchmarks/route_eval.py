@@ -0,0 +1,203 @@
+"""Offline routing accuracy and throughput.
+
+Runs a labelled query file through ``router.route_batch`` and reports:
+
+* accuracy, per-route precision and recall, and a confusion matrix
+  (``none`` is the "no route cleared the threshold" outcome);
+* queries/sec of the batch path, best of ``--repeat`` runs, and with
+  ``--single N`` of one ``SemanticRouter`` call per query for the first N
+  queries, plus how often the two paths agree;
+* with ``--sweep``, accuracy at each score threshold, from scores computed
+  once, for re-tuning ``routes.py``.
+
+Labelled files are ``{route: [query, ...]}`` JSON (``queries.json``, or a
+``synthetic.py`` workload), or CSV/JSONL rows with ``query`` and ``route``
+fields. A ``.txt`` file with one query per line is routed without labels,
+e.g. to re-classify logged traffic with ``--predictions``. The embedding
+model must already be in the local Hugging Face cache.
+
+    python benchmarks/route_eval.py --queries benchmarks/queries.json --single 45 --sweep 0.3 0.7 0.05
+    python benchmarks/route_eval.py --queries traffic.txt --predictions routed.jsonl
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from run import APP_DIR, BENCH_DIR, RESULTS_DIR
+
+
+NONE= "none"
+
+
+def load_labelled(path):
+    """``[(query, expected route or None), ...]``; None means unlabelled."""
+    path= Path(path)
+    if path.suffix == ".json":
+        data= json.loads(path.read_text())
+        return [(q, route) for route, queries in data.items() for q in queries]
+    if path.suffix == ".txt":
+        return [(line.strip(), None) for line in path.read_text().splitlines() if line.strip()]
+    with open(path, newline="", encoding="utf-8") as f:
+        rows= [json.loads(line) for line in f if line.strip()] if path.suffix == ".jsonl" else list(csv.DictReader(f))
+    return [(row["query"], row.get("route") or NONE) for row in rows]
+
+
+def confusion(expected, predicted):
+    """``(labels, matrix)`` with rows for expected and columns for predicted routes."""
+    labels= sorted((set(expected) | set(predicted)) - {NONE}) + [NONE]
+    index= {label: i for i, label in enumerate(labels)}
+    matrix= np.zeros((len(labels), len(labels)), dtype=int)
+    for e, p in zip(expected, predicted):
+        matrix[index[e], index[p]]+= 1
+    return labels, matrix
+
+
+def metrics(expected, predicted):
+    labels, matrix= confusion(expected, predicted)
+    per_route= {}
+    for i, label in enumerate(labels):
+        predicted_count, expected_count= matrix[:, i].sum(), matrix[i].sum()
+        per_route[label]= {
+            "precision": round(matrix[i, i] / predicted_count, 4) if predicted_count else None,
+            "recall": round(matrix[i, i] / expected_count, 4) if expected_count else None,
+            "support": int(expected_count),
+        }
+    return {
+        "accuracy": round(sum(e == p for e, p in zip(expected, predicted)) / len(expected), 4),
+        "per_route": per_route,
+        "confusion": {"labels": labels, "matrix": matrix.tolist()},
+    }
+
+
+def format_confusion(labels, matrix):
+    corner= "expected \\ predicted"
+    first, width= len(corner) + 2, max(len(label) for label in labels) + 2
+    lines= [corner.ljust(first) + "".join(label.rjust(width) for label in labels)]
+    for label, row in zip(labels, matrix):
+        lines.append(label.ljust(first) + "".join(str(v).rjust(width) for v in row))
+    return "\n".join(lines)
+
+
+def time_batch(route_batch, queries, repeat, batch_size):
+    best, matches= None, None
+    for _ in range(repeat):
+        start= time.perf_counter()
+        matches= route_batch(queries, batch_size)
+        elapsed= time.perf_counter() - start
+        best= elapsed if best is None else min(best, elapsed)
+    return matches, best
+
+
+def time_single(router, queries):
+    start= time.perf_counter()
+    names= [router(q).name or NONE for q in queries]
+    return names, time.perf_counter() - start
+
+
+def sweep(labelled, thresholds):
+    """Accuracy per threshold, from one batched encode and score."""
+    from embeddings import embed
+    from router import get_route_scorer
+
+    route_scorer= get_route_scorer()
+    scores= route_scorer.scores(embed([q for q, _ in labelled]))
+    expected= [label for _, label in labelled]
+    results= []
+    for threshold in thresholds:
+        names, _= route_scorer.decide(scores, threshold)
+        predicted= [name or NONE for name in names]
+        results.append({"threshold": round(float(threshold), 4),
+                        "accuracy": round(sum(e == p for e, p in zip(expected, predicted)) / len(expected), 4)})
+    return results
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", default=str(BENCH_DIR / "queries.json"), help="Labelled query file")
+    parser.add_argument("--batch-size", type=int, default=None, help="Queries per encode (default: router's)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed batch runs; the best is reported")
+    parser.add_argument("--single", type=int, default=0, help="Also route the first N queries one call at a time")
+    parser.add_argument("--sweep", type=float, nargs=3, metavar=("START", "STOP", "STEP"),
+                        help="Report accuracy for thresholds START..STOP")
+    parser.add_argument("--errors", type=int, default=20, help="Misrouted queries to print")
+    parser.add_argument("--predictions", help="Write one JSON line per query with its route and score")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/route-eval-<timestamp>.json)")
+    args= parser.parse_args()
+
+    sys.path.insert(0, str(APP_DIR))
+    load_start= time.perf_counter()
+    from router import ROUTE_BATCH_SIZE, get_route_scorer, get_router, route_batch
+    get_route_scorer()
+    load_seconds= time.perf_counter() - load_start
+
+    labelled= load_labelled(args.queries)
+    queries= [q for q, _ in labelled]
+    batch_size= args.batch_size or ROUTE_BATCH_SIZE
+    # Untimed pass so the encoder's first-call setup is not counted
+    route_batch(queries[:batch_size], batch_size)
+    matches, batch_seconds= time_batch(route_batch, queries, args.repeat, batch_size)
+    predicted= [m.name or NONE for m in matches]
+
+    results= {
+        "queries": len(queries),
+        "file": str(args.queries),
+        "batch_size": batch_size,
+        "load_seconds": round(load_seconds, 3),
+        "batch": {"seconds": round(batch_seconds, 4), "queries_per_sec": round(len(queries) / batch_seconds, 1)},
+    }
+    print(f"Routed {len(queries):,} queries in {batch_seconds * 1000:.1f} ms "
+          f"({len(queries) / batch_seconds:,.0f} queries/sec, batches of {batch_size})")
+
+    if args.single:
+        single_names, single_seconds= time_single(get_router(), queries[:args.single])
+        count= len(single_names)
+        results["single"]= {
+            "queries": count,
+            "seconds": round(single_seconds, 4),
+            "queries_per_sec": round(count / single_seconds, 1),
+            "agreement": round(sum(a == b for a, b in zip(single_names, predicted)) / count, 4),
+        }
+        print(f"One call per query: {count / single_seconds:,.0f} queries/sec; "
+              f"agreement with batch {results['single']['agreement']:.2%}")
+
+    scored= [(q, label, name, m.score) for (q, label), name, m in zip(labelled, predicted, matches) if label is not None]
+    if scored:
+        results.update(metrics([label for _, label, _, _ in scored], [name for _, _, name, _ in scored]))
+        errors= [{"query": q, "expected": label, "predicted": name, "score": round(score, 4)}
+                 for q, label, name, score in scored if label != name]
+        results["errors"]= errors
+        print(f"Accuracy {results['accuracy']:.2%} on {len(scored):,} labelled queries")
+        print(format_confusion(results["confusion"]["labels"], np.array(results["confusion"]["matrix"])))
+        for label, stats in results["per_route"].items():
+            print(f"  {label:<12} precision {stats['precision']}  recall {stats['recall']}  support {stats['support']}")
+        for error in errors[:args.errors]:
+            print(f"  misrouted: {error['query']!r} expected {error['expected']}, got {error['predicted']} "
+                  f"({error['score']})")
+        if args.sweep:
+            start, stop, step= args.sweep
+            results["sweep"]= sweep([(q, label) for q, label, _, _ in scored], np.arange(start, stop + step / 2, step))
+            for row in results["sweep"]:
+                print(f"  threshold {row['threshold']:.2f}  accuracy {row['accuracy']:.2%}")
+
+    if args.predictions:
+        with open(args.predictions, "w", encoding="utf-8") as f:
+            for (query, label), name, match in zip(labelled, predicted, matches):
+                f.write(json.dumps({"query": query, "expected": label, "route": name,
+                                    "score": round(match.score, 4)}) + "\n")
+        print(f"Predictions written to {args.predictions}")
+
+    output= Path(args.output) if args.output else RESULTS_DIR / f"route-eval-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
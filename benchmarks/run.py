@@ -0,0 +1,231 @@
+"""Offline end-to-end benchmark for ``ask_query``.
+
+Starts the local Groq stand-in, points the app at it and runs the fixed
+per-route query corpus sequentially and across N concurrent sessions.
+Reports p50/p95/p99 latency, time-to-first-chunk, throughput and peak RSS
+per route, and writes everything to JSON so runs can be compared. Per-route
+RSS is sampled while that route runs in the sequential pass; concurrent runs
+interleave routes, so they only report the process-wide peak.
+
+    python benchmarks/run.py --sessions 16 --repeat 3
+    python benchmarks/run.py --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mock_groq import add_config_args, config_from_args, start_mock_server
+
+
+BENCH_DIR= Path(__file__).resolve().parent
+APP_DIR= BENCH_DIR.parent / "app"
+RESULTS_DIR= BENCH_DIR / "results"
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (0 <= q <= 100)."""
+    if not values:
+        return None
+    ordered= sorted(values)
+    rank= max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def current_rss_mb():
+    """Resident set size right now; falls back to the peak off Linux."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages= int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class RSSSampler:
+    """Polls ``current_rss_mb`` on a background thread inside a ``with`` block.
+
+    ``ru_maxrss`` is a process-wide high-water mark, so it cannot say which
+    route pushed memory up; sampling around one route's run can.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval= interval
+        self.start_mb= self.peak_mb= self.end_mb= None
+        self._stop= threading.Event()
+        self._thread= threading.Thread(target=self._poll, daemon=True)
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb= max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb= self.peak_mb= current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end_mb= current_rss_mb()
+        self.peak_mb= max(self.peak_mb, self.end_mb)
+
+    @property
+    def stats(self):
+        return {
+            "peak_rss_mb": round(self.peak_mb, 1),
+            "rss_growth_mb": round(self.peak_mb - self.start_mb, 1),
+        }
+
+
+def load_corpus(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_one(ask_query, query):
+    """Consume one response; returns ``(latency, ttft, chars)`` in seconds."""
+    start= time.perf_counter()
+    first= None
+    chars= 0
+    for chunk in ask_query(query):
+        if first is None:
+            first= time.perf_counter() - start
+        chars+= len(chunk)
+    total= time.perf_counter() - start
+    return total, first if first is not None else total, chars
+
+
+def summarize(samples, wall_seconds):
+    latencies= [s[0] for s in samples]
+    ttfts= [s[1] for s in samples]
+    return {
+        "requests": len(samples),
+        "latency_ms": {f"p{q}": round(percentile(latencies, q) * 1000, 2) for q in (50, 95, 99)},
+        "ttft_ms": {f"p{q}": round(percentile(ttfts, q) * 1000, 2) for q in (50, 95, 99)},
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+def run_sequential(ask_query, corpus, repeat):
+    report= {}
+    for route, queries in corpus.items():
+        samples= []
+        start= time.perf_counter()
+        with RSSSampler() as rss:
+            for _ in range(repeat):
+                for query in queries:
+                    samples.append(run_one(ask_query, query))
+        report[route]= summarize(samples, time.perf_counter() - start)
+        report[route].update(rss.stats)
+    return report
+
+
+def run_concurrent(ask_query, corpus, repeat, sessions):
+    jobs= [(route, query) for _ in range(repeat) for route, queries in corpus.items() for query in queries]
+    samples= {route: [] for route in corpus}
+    start= time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures= [(route, pool.submit(run_one, ask_query, query)) for route, query in jobs]
+        for route, future in futures:
+            samples[route].append(future.result())
+    wall= time.perf_counter() - start
+    report= {route: summarize(route_samples, wall) for route, route_samples in samples.items()}
+    report["all"]= summarize([s for route_samples in samples.values() for s in route_samples], wall)
+    report["all"]["peak_rss_mb"]= round(peak_rss_mb(), 1)
+    return report
+
+
+def compare(current, baseline):
+    """Print p50/p95 latency deltas against a previous result file."""
+    for mode in ("sequential", "concurrent"):
+        for route, stats in current.get(mode, {}).items():
+            old= baseline.get(mode, {}).get(route)
+            if not old:
+                continue
+            deltas= []
+            for q in ("p50", "p95"):
+                new_ms, old_ms= stats["latency_ms"][q], old["latency_ms"][q]
+                change= (new_ms - old_ms) / old_ms * 100 if old_ms else 0.0
+                deltas.append(f"{q} {old_ms:.1f} -> {new_ms:.1f} ms ({change:+.1f}%)")
+            print(f"{mode:10} {route:10} " + ", ".join(deltas))
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(BENCH_DIR / "queries.json"))
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over the corpus per mode")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result file to diff against")
+    add_config_args(parser)
+    args= parser.parse_args()
+
+    server, mock_state, base_url= start_mock_server(config_from_args(args))
+    # Must be set before the app modules build their Groq clients
+    os.environ["GROQ_BASE_URL"]= base_url
+    os.environ["GROQ_API_KEY"]= "mock"
+    os.environ.setdefault("GROQ_MODEL", "mock")
+    sys.path.insert(0, str(APP_DIR))
+
+    import_start= time.perf_counter()
+    import lifecycle
+    lifecycle.warm_up(background=False)
+    from pipeline import ask_query
+    import speculation
+    import sql
+    startup_seconds= time.perf_counter() - import_start
+
+    corpus= load_corpus(args.corpus)
+    # Warm-up pass: one query per route, excluded from the numbers
+    for queries in corpus.values():
+        run_one(ask_query, queries[0])
+
+    results= {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {
+            "sessions": args.sessions,
+            "repeat": args.repeat,
+            "mock": vars(config_from_args(args)),
+        },
+        "startup_seconds": round(startup_seconds, 3),
+        "startup_profile": lifecycle.profile(),
+        "sequential": run_sequential(ask_query, corpus, args.repeat),
+        "concurrent": run_concurrent(ask_query, corpus, args.repeat, args.sessions),
+        "mock_requests": mock_state.requests,
+    }
+    if speculation.ENABLED:
+        results["speculation"]= speculation.stats.snapshot()
+    if sql.result_cache_stats() is not None:
+        results["sql_result_cache"]= sql.result_cache_stats()
+    server.shutdown()
+
+    output= Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(json.dumps({k: results[k] for k in ("sequential", "concurrent")}, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""Synthetic catalogs, FAQ corpora and query workloads for scale tests.
+
+The shipped data (about 900 scraped products and 10 FAQ rows) is too small
+to show how ingestion, retrieval and the caches scale. This generator writes
+data of any size in the formats the app already reads:
+
+* ``products.csv``: the columns of ``web-scrapping/ecommerce_data_final.csv``,
+  for ``csv_to_sqlite.insert_data``. Brand frequencies, per-brand log-normal
+  prices, discounts and (rating, rating count) pairs are fitted from the
+  scraped CSV. Titles recombine scraped model names with scraped product
+  types. Links have the Flipkart ``product_link`` shape, with a unique
+  ``pid`` per row.
+* ``faq.csv``: ``question,answer`` rows for ``faq.ingest_faq_data``. The
+  shipped FAQ comes first, then templated policy, payment and delivery
+  questions.
+* ``queries.json``: a ``{route: [query, ...]}`` workload in the format of
+  ``benchmarks/queries.json``. Queries repeat with a Zipf distribution
+  over a pool of distinct queries, so cache hit rates look like real traffic.
+
+``manifest.json`` records the parameters, the fitted model and workload
+statistics. ``--ingest`` also loads the catalog into SQLite through
+``csv_to_sqlite.insert_data`` and times it.
+
+    python benchmarks/synthetic.py --products 1000000 --faqs 10000 --queries 50000 --ingest
+    python benchmarks/run.py --corpus benchmarks/data/products-1000000/queries.json
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import re
+import string
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from run import APP_DIR, BENCH_DIR
+
+
+ROOT_DIR= BENCH_DIR.parent
+SCRAPED_CSV= ROOT_DIR / "web-scrapping" / "ecommerce_data_final.csv"
+SHIPPED_FAQ= APP_DIR / "resources" / "faq_data.csv"
+SHIPPED_QUERIES= BENCH_DIR / "queries.json"
+DATA_DIR= BENCH_DIR / "data"
+
+COLUMNS= ("product_link", "title", "brand", "price", "discount", "avg_rating", "total_ratings")
+CHUNK= 100_000
+# Brands with fewer scraped rows share the price fit of the whole catalog
+MIN_BRAND_ROWS= 5
+PRICE_RANGE= (99, 50_000)
+# Words of a scraped title that belong to the product type, not the model name
+TYPE_WORDS= {"running", "walking", "casual", "casuals", "sports", "sport", "training", "gym", "sneakers",
+             "sneaker", "shoes", "shoe", "hiking", "trekking", "outdoor", "outdoors", "&", "and", "slip",
+             "on", "loafers", "moccasins", "boots", "sandals", "flats", "slippers", "formal", "party",
+             "wear", "lace", "up", "ups", "tennis", "basketball", "football", "badminton", "jogging"}
+
+PID_ALPHABET= string.digits + string.ascii_uppercase
+PID_SPACE= 36 ** 13
+# Odd and not a multiple of 3, so index -> pid is a bijection modulo 36**13
+PID_STRIDE= 1_000_000_007
+
+FAQ_BANKS= ("HDFC", "ICICI", "SBI", "Axis", "Kotak", "IDFC First", "Yes Bank", "IndusInd", "RBL",
+            "AU Small Finance", "Federal Bank", "Bank of Baroda")
+FAQ_METHODS= ("UPI", "credit card", "debit card", "net banking", "cash on delivery", "EMI", "a wallet",
+              "a gift card", "Pay Later")
+FAQ_CATEGORIES= ("running shoes", "sneakers", "sandals", "formal shoes", "walking shoes", "slippers", "boots",
+                 "loafers", "sports shoes", "casual shoes", "kids' shoes", "hiking shoes")
+FAQ_CITIES= ("Mumbai", "Delhi", "Bengaluru", "Chennai", "Kolkata", "Hyderabad", "Pune", "Ahmedabad", "Jaipur",
+             "Lucknow", "Kochi", "Chandigarh", "Indore", "Guwahati", "Bhopal")
+# (question, answer); {days}, {percent} and {amount} are drawn per row
+FAQ_TEMPLATES= (
+    ("What is the return policy for {category}?",
+     "{category} can be returned within {days} days of delivery if they are unused and in the original box."),
+    ("Can I exchange {category} for a different size?",
+     "Yes, {category} can be exchanged for another size within {days} days of delivery."),
+    ("How long does a refund for {category} take?",
+     "Refunds for returned {category} reach your original payment method within {days} working days."),
+    ("Do I get a discount with the {bank} credit card?",
+     "{bank} credit card users get {percent}% off on orders above Rs. {amount}."),
+    ("Is there a cashback offer on {bank} debit cards?",
+     "{bank} debit card payments get {percent}% cashback up to Rs. {amount} during sale events."),
+    ("Can I pay with {method}?", "Yes, {method} is accepted on all orders."),
+    ("Is {method} available for {category}?",
+     "{method} is available for {category} on orders up to Rs. {amount}."),
+    ("Can I pay for {category} with {method} using a {bank} card?",
+     "Yes, {bank} cards support {method} for {category}, with no extra charges."),
+    ("How long does delivery to {city} take?", "Orders to {city} are usually delivered within {days} days."),
+    ("Is same-day delivery available in {city}?",
+     "Same-day delivery is available in {city} for orders placed before noon, on select items."),
+    ("Do you deliver {category} to {city}?",
+     "Yes, {category} are delivered to {city} within {days} days."),
+    ("Are {category} covered by a warranty?",
+     "{category} carry a {days}-day manufacturer warranty against defects."),
+    ("What should I do if my {category} arrive damaged?",
+     "Raise a return request within {days} days with photos of the damage; a replacement is sent for free."),
+    ("Can I cancel an order for {category} after it has shipped?",
+     "Shipped orders cannot be cancelled, but {category} can be returned within {days} days of delivery."),
+    ("Is there a delivery charge for orders to {city}?",
+     "Delivery to {city} is free on orders above Rs. {amount}."),
+    ("Can I get an invoice for {category} paid with {method}?",
+     "Yes, the invoice for {category} paid with {method} can be downloaded from the order page."),
+    ("Do {bank} cards get no-cost EMI on {category}?",
+     "No-cost EMI on {category} is available with {bank} cards for orders above Rs. {amount}."),
+    ("How do I track an order shipped to {city}?",
+     "Orders shipped to {city} can be tracked from the My Orders page, with updates every few hours."),
+)
+
+SQL_TEMPLATES= (
+    "{brand} shoes under {price}",
+    "cheapest {brand} {kind}",
+    "best rated {brand} {kind}",
+    "{kind} between {low} and {high} rupees",
+    "{brand} {kind} with at least {percent}% discount",
+    "show me {kind} above {price} with rating of at least {rating}",
+    "most expensive {kind}",
+    "{brand} or {other} shoes on sale",
+    "{brand} shoes with more than {count} ratings",
+    "which {brand} shoes have the most ratings?",
+    "compare the average price of {brand} and {other} shoes",
+    "how many {brand} {kind} are there under {price}?",
+)
+SQL_KINDS= ("shoes", "running shoes", "sneakers", "walking shoes", "casual shoes", "sports shoes")
+SMALL_TALK_EXTRA= ("Hey there", "Good evening", "Who made you?", "Thank you so much", "Bye", "What can you do?",
+                   "How is your day going?", "Nice talking to you", "You are helpful", "Good night")
+ROUTE_MIX= {"sql": 0.6, "faq": 0.3, "small_talk": 0.1}
+
+
+class CatalogModel(NamedTuple):
+    """Distributions fitted from the scraped catalog."""
+
+    brands: tuple
+    brand_weights: np.ndarray
+    log_price: np.ndarray
+    heads: tuple
+    tails: tuple
+    discounts: np.ndarray
+    ratings: np.ndarray
+
+    def summary(self):
+        return {
+            "brands": len(self.brands),
+            "top_brands": [b.strip() for b in np.array(self.brands)[np.argsort(-self.brand_weights)[:5]]],
+            "log_price_mean": round(float(np.average(self.log_price[:, 0], weights=self.brand_weights)), 3),
+            "model_names": sum(len(h) for h in self.heads),
+            "product_types": len(self.tails),
+            "discount_mean": round(float(self.discounts.mean()), 3),
+            "rating_mean": round(float(np.nanmean(self.ratings[:, 0])), 3),
+        }
+
+
+def split_title(title):
+    """``(model name, product type)`` of a scraped title, e.g.
+    ``("NRGY Comet", "Running Shoes For Women")``."""
+    words= title.replace("|", " ").split()
+    end= len(words)
+    if "For" in words:
+        end= len(words) - words[::-1].index("For") - 1
+    start= end
+    while start > 0 and words[start - 1].lower() in TYPE_WORDS:
+        start-= 1
+    if start == end:
+        start= max(0, end - 1)
+    return " ".join(words[:start]), " ".join(words[start:])
+
+
+def _number(value):
+    value= value.strip()
+    return float(value) if value else math.nan
+
+
+def fit_catalog(path=SCRAPED_CSV):
+    """Fit a ``CatalogModel`` to a CSV with the scraped catalog's columns."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows= list(csv.DictReader(f))
+    counts= Counter(row["brand"] for row in rows)
+    brands= tuple(sorted(counts))
+    prices= {b: [] for b in brands}
+    heads= {b: set() for b in brands}
+    tails= Counter()
+    for row in rows:
+        price= _number(row["price"])
+        if price > 0:
+            prices[row["brand"]].append(math.log(price))
+        head, tail= split_title(row["title"])
+        if head:
+            heads[row["brand"]].add(head)
+        tails[tail]+= 1
+    every_price= np.array([p for values in prices.values() for p in values])
+    overall= (every_price.mean(), every_price.std())
+    log_price= np.array([(np.mean(prices[b]), max(np.std(prices[b]), 0.1)) if len(prices[b]) >= MIN_BRAND_ROWS
+                         else overall for b in brands])
+    weights= np.array([counts[b] for b in brands], dtype=float)
+    return CatalogModel(
+        brands= brands,
+        brand_weights= weights / weights.sum(),
+        log_price= log_price,
+        # Brands without a scraped model name borrow the brand itself
+        heads= tuple(tuple(sorted(heads[b])) or (b.strip().title(),) for b in brands),
+        tails= tuple(t for t, _ in tails.most_common()),
+        discounts= np.array([_number(row["discount"]) for row in rows if row["discount"].strip()]),
+        ratings= np.array([(_number(row["avg_rating"]), _number(row["total_ratings"])) for row in rows]),
+    )
+
+
+def _base36(value, width):
+    digits= []
+    for _ in range(width):
+        value, digit= divmod(value, 36)
+        digits.append(PID_ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def _slug(text):
+    return "-".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def product_batches(model, n, seed=0):
+    """Yield lists of synthetic product dicts, ``CHUNK`` rows at a time.
+
+    Each dict has the ``COLUMNS`` plus ``link`` (the canonical link
+    ``csv_to_sqlite`` stores), ``pid`` and ``brand_norm``.
+    """
+    rng= np.random.default_rng(seed)
+    offset= int(rng.integers(2 ** 62))
+    session= _base36(int(rng.integers(2 ** 62)), 20).lower()
+    query_hash= f"{int(rng.integers(2 ** 62)):016x}"
+    tail_weights= 1.0 / np.arange(1, len(model.tails) + 1)
+    tail_weights/= tail_weights.sum()
+    for start in range(0, n, CHUNK):
+        size= min(CHUNK, n - start)
+        brand_ids= rng.choice(len(model.brands), size=size, p=model.brand_weights)
+        mean, std= model.log_price[brand_ids, 0], model.log_price[brand_ids, 1]
+        prices= np.clip(np.exp(rng.normal(mean, std)), *PRICE_RANGE).astype(int)
+        discounts= np.clip(rng.choice(model.discounts, size) + rng.normal(0, 0.02, size), 0, 0.95).round(2)
+        pairs= model.ratings[rng.integers(len(model.ratings), size=size)]
+        ratings= np.clip(pairs[:, 0] + rng.normal(0, 0.1, size), 1, 5).round(1)
+        totals= np.maximum(1, np.round(pairs[:, 1] * rng.lognormal(0, 0.5, size)))
+        heads= rng.random(size)
+        tails= rng.choice(len(model.tails), size=size, p=tail_weights)
+        numbers= rng.integers(1, 30, size=size)
+        batch= []
+        for i in range(size):
+            index= start + i
+            brand= model.brands[brand_ids[i]]
+            names= model.heads[brand_ids[i]]
+            head= names[int(heads[i] * len(names))]
+            # Model numbers keep titles varied at millions of rows
+            if numbers[i] < 12:
+                head= f"{head} {numbers[i]}"
+            tail= model.tails[tails[i]]
+            title= f"{head} {tail}"
+            key= index * PID_STRIDE + offset
+            pid= "SHO" + _base36(key % PID_SPACE, 13)
+            link= f"https://www.flipkart.com/{_slug(brand + ' ' + title)}/p/itm{key % 16 ** 13:013x}?pid={pid}"
+            tracking= (f"&lid=LST{pid}{pid[-6:]}&marketplace=FLIPKART&q={'+'.join(_slug(tail).split('-'))}"
+                       f"&store=osp%2Fiko%2Fd20&srno=s_{index // 40 + 1}_{index % 40 + 1}&otracker=search"
+                       f"&otracker1=search&fm=organic&ppt=hp&ppn=homepage&ssid={session}&qH={query_hash}")
+            batch.append({
+                "product_link": link + tracking,
+                "title": title,
+                "brand": brand,
+                "price": int(prices[i]),
+                "discount": float(discounts[i]),
+                "avg_rating": None if math.isnan(ratings[i]) else float(ratings[i]),
+                "total_ratings": None if math.isnan(totals[i]) else int(totals[i]),
+                "link": link,
+                "pid": pid,
+                "brand_norm": brand.strip().lower(),
+            })
+        yield batch
+
+
+def write_products(path, model, n, seed=0):
+    """Write ``n`` products as a scraped-catalog CSV; returns seconds taken."""
+    start= time.perf_counter()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer= csv.writer(f)
+        writer.writerow(COLUMNS)
+        for batch in product_batches(model, n, seed):
+            writer.writerows([row[c] for c in COLUMNS] for row in batch)
+    return time.perf_counter() - start
+
+
+def _fields(template):
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+
+def faq_rows(n, seed=0):
+    """``n`` unique ``(question, answer)`` pairs: the shipped FAQ, then templates."""
+    rng= np.random.default_rng(seed)
+    with open(SHIPPED_FAQ, newline="", encoding="utf-8") as f:
+        rows= [(row["question"], row["answer"]) for row in csv.DictReader(f)][:n]
+    seen= {q for q, _ in rows}
+    slots= {"bank": FAQ_BANKS, "method": FAQ_METHODS, "category": FAQ_CATEGORIES, "city": FAQ_CITIES}
+    combos= []
+    for question, answer in FAQ_TEMPLATES:
+        names= [name for name in dict.fromkeys(_fields(question)) if name in slots]
+        combos.extend((question, answer, dict(zip(names, values)))
+                      for values in itertools.product(*(slots[name] for name in names)))
+    order= rng.permutation(len(combos))
+    # Past the template space, questions are made unique with an order number
+    for count in itertools.count():
+        if len(rows) >= n:
+            break
+        question, answer, values= combos[order[count % len(combos)]]
+        values= dict(values, days=int(rng.choice((3, 5, 7, 10, 14, 30))), percent=int(rng.integers(5, 16)),
+                     amount=int(rng.choice((499, 999, 1499, 1999, 2999, 4999))))
+        text= question.format(**values)
+        if count >= len(combos):
+            text= f"{text} My order number is OD{count:012d}."
+        if text in seen:
+            continue
+        seen.add(text)
+        body= answer.format(**values)
+        rows.append((text, body[0].upper() + body[1:]))
+    return rows
+
+
+def write_faqs(path, n, seed=0):
+    rows= faq_rows(n, seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer= csv.writer(f)
+        writer.writerow(("question", "answer"))
+        writer.writerows(rows)
+    return rows
+
+
+def sql_pool(model, size, rng):
+    """Up to ``size`` distinct product questions over the model's brands."""
+    brands= [b.strip().lower() for b in model.brands]
+    pool= {}
+    for _ in range(size * 20):
+        if len(pool) >= size:
+            break
+        template= SQL_TEMPLATES[rng.integers(len(SQL_TEMPLATES))]
+        brand, other= rng.choice(brands, size=2, replace=False, p=model.brand_weights)
+        low= int(rng.choice((500, 750, 1000, 1500, 2000, 3000)))
+        question= template.format(
+            brand=brand, other=other, kind=SQL_KINDS[rng.integers(len(SQL_KINDS))],
+            price=int(rng.choice((999, 1500, 2000, 2500, 3000, 4000, 5000))), low=low, high=low * 2,
+            percent=int(rng.choice((20, 30, 40, 50, 60))), rating=float(rng.choice((3.5, 4, 4.2, 4.5))),
+            count=int(rng.choice((100, 500, 1000, 5000))))
+        pool.setdefault(question, None)
+    return list(pool)
+
+
+def faq_pool(questions, size, rng):
+    """Shipped-style FAQ questions plus lowercase, unpunctuated variants."""
+    picked= [questions[i] for i in rng.permutation(len(questions))[:size]]
+    variants= [q.lower().rstrip("?") if rng.random() < 0.3 else q for q in picked]
+    return list(dict.fromkeys(variants))
+
+
+def zipf_draws(pool, count, exponent, rng):
+    """``count`` draws from ``pool`` where the k-th query has weight 1/k**exponent."""
+    if not pool or not count:
+        return []
+    weights= 1.0 / np.arange(1, len(pool) + 1) ** exponent
+    ranks= rng.choice(len(pool), size=count, p=weights / weights.sum())
+    return [pool[r] for r in ranks]
+
+
+def workload(model, faq_questions, count, distinct, exponent, seed=0):
+    """``{route: [query, ...]}`` with ``count`` queries split by ``ROUTE_MIX``."""
+    rng= np.random.default_rng(seed)
+    with open(SHIPPED_QUERIES) as f:
+        shipped= json.load(f)
+    pools= {
+        "sql": sql_pool(model, distinct, rng),
+        "faq": faq_pool(faq_questions, distinct, rng),
+        "small_talk": list(dict.fromkeys(shipped["small_talk"] + list(SMALL_TALK_EXTRA))),
+    }
+    routes= rng.choice(list(ROUTE_MIX), size=count, p=list(ROUTE_MIX.values()))
+    draws= Counter(routes)
+    return {route: zipf_draws(pools[route], draws[route], exponent, rng) for route in ROUTE_MIX}
+
+
+def workload_stats(queries):
+    stats= {}
+    for route, items in queries.items():
+        counts= Counter(items)
+        stats[route]= {
+            "queries": len(items),
+            "distinct": len(counts),
+            "top1_share": round(counts.most_common(1)[0][1] / len(items), 3) if items else None,
+            # Hit rate of an unbounded cache keyed by exact text
+            "repeat_share": round(1 - len(counts) / len(items), 3) if items else None,
+        }
+    return stats
+
+
+def ingest(db_path, csv_path):
+    """Load ``csv_path`` into ``db_path`` with the app's own ingest script."""
+    sys.path.insert(0, str(ROOT_DIR / "web-scrapping"))
+    from csv_to_sqlite import insert_data
+
+    start= time.perf_counter()
+    insert_data(Path(db_path), Path(csv_path))
+    return time.perf_counter() - start
+
+
+def main():
+    parser= argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=10_000, help="Catalog rows")
+    parser.add_argument("--faqs", type=int, default=1000, help="FAQ rows")
+    parser.add_argument("--queries", type=int, default=10_000, help="Workload size")
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct sql/faq queries in the workload pool")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of query repeats")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", default=str(SCRAPED_CSV), help="Scraped catalog CSV to fit")
+    parser.add_argument("--out", help="Output directory (default: benchmarks/data/products-<N>)")
+    parser.add_argument("--ingest", action="store_true", help="Also build ecommerce_data.db with csv_to_sqlite")
+    args= parser.parse_args()
+
+    out= Path(args.out) if args.out else DATA_DIR / f"products-{args.products}"
+    out.mkdir(parents=True, exist_ok=True)
+    model= fit_catalog(args.source)
+
+    product_seconds= write_products(out / "products.csv", model, args.products, args.seed)
+    print(f"{args.products:,} products written in {product_seconds:.1f}s", flush=True)
+    faqs= write_faqs(out / "faq.csv", args.faqs, args.seed)
+    print(f"{len(faqs):,} FAQ rows written", flush=True)
+    queries= workload(model, [q for q, _ in faqs], args.queries, args.distinct, args.zipf, args.seed)
+    (out / "queries.json").write_text(json.dumps(queries, indent=2))
+    stats= workload_stats(queries)
+    for route, s in stats.items():
+        print(f"{route:<11} {s['queries']:>8,} queries  {s['distinct']:>6,} distinct  "
+              f"top-1 {s['top1_share']}  repeats {s['repeat_share']}")
+
+    manifest= {
+        "args": vars(args),
+        "model": model.summary(),
+        "product_seconds": round(product_seconds, 2),
+        "faq_rows": len(faqs),
+        "workload": stats,
+    }
+    if args.ingest:
+        manifest["ingest_seconds"]= round(ingest(out / "ecommerce_data.db", out / "products.csv"), 2)
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    print(f"Data written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+
+# The app modules import each other flat, as when run from app/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
@@ -0,0 +1,45 @@
+import os
+import sqlite3
+
+import pytest
+
+np= pytest.importorskip("numpy")
+
+from catalog import ColumnarCatalog
+from db import QueryExecutor
+from sql_rules import ProductQuery
+
+
+def make_db(path, rows):
+    conn= sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (title TEXT, brand_norm TEXT, price REAL, discount REAL, "
+                 "avg_rating REAL, total_ratings INTEGER)")
+    conn.executemany("INSERT INTO product VALUES (?, ?, ?, 0, 4.0, 10)", rows)
+    conn.commit()
+    conn.close()
+
+
+def titles(result):
+    return [row[0] for row in result.rows]
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_swapped_file_is_never_read_with_old_rowids(tmp_path, background):
+    path= tmp_path / "db.sqlite"
+    make_db(path, [("old cheap", "nike", 10), ("old dear", "nike", 90)])
+    executor= QueryExecutor(path, timeout=0)
+    catalog= ColumnarCatalog(path, lambda sql, params: executor.execute(sql, params, max_rows=None),
+                             background=background)
+    spec= ProductQuery(brands=("nike",), order_by="price", limit=1)
+    assert titles(catalog.query(spec)) == ["old cheap"]
+
+    replacement= tmp_path / "new.sqlite"
+    make_db(replacement, [("new dear", "nike", 80), ("new cheap", "nike", 5)])
+    os.replace(replacement, path)
+    result= catalog.query(spec)
+    if background:
+        # The reload is still running; the caller falls back to SQLite
+        assert result is None or titles(result) == ["new cheap"]
+    else:
+        assert titles(result) == ["new cheap"]
+    executor.close()
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+
+import pytest
+
+from db import QueryExecutor, ResultCache, normalize_sql
+
+
+def make_db(path, prices, user_version=0):
+    conn= sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (title TEXT, price REAL)")
+    conn.executemany("INSERT INTO product VALUES (?, ?)", [(f"item {i}", p) for i, p in enumerate(prices)])
+    conn.execute(f"PRAGMA user_version = {user_version}")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def executor(tmp_path):
+    path= tmp_path / "db.sqlite"
+    make_db(path, [100, 200])
+    executor= QueryExecutor(path, cache=ResultCache())
+    yield executor
+    executor.close()
+
+
+def prices(executor):
+    return [row[0] for row in executor.execute("SELECT price FROM product ORDER BY price").rows]
+
+
+def test_repeated_query_is_served_from_cache(executor):
+    assert prices(executor) == [100, 200]
+    assert prices(executor) == [100, 200]
+    assert executor.cache.hits == 1
+
+
+def test_commit_by_other_connection_invalidates(executor):
+    assert prices(executor) == [100, 200]
+    conn= sqlite3.connect(executor.path)
+    conn.execute("INSERT INTO product VALUES ('new', 50)")
+    conn.commit()
+    conn.close()
+    assert prices(executor) == [50, 100, 200]
+    assert executor.cache.invalidations == 1
+
+
+def test_replaced_file_is_read_by_next_query(executor, tmp_path):
+    assert prices(executor) == [100, 200]
+    replacement= tmp_path / "new.sqlite"
+    make_db(replacement, [7, 8, 9])
+    os.replace(replacement, executor.path)
+    assert prices(executor) == [7, 8, 9]
+    assert prices(executor) == [7, 8, 9]
+
+
+def test_user_version_bump_invalidates(executor):
+    assert prices(executor) == [100, 200]
+    conn= sqlite3.connect(executor.path)
+    conn.execute("UPDATE product SET price = price + 1")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    assert executor.check_catalog() is True
+    assert prices(executor) == [101, 201]
+    assert executor.check_catalog() is False
+
+
+def test_uncached_executor_reopens_after_swap(tmp_path):
+    path= tmp_path / "db.sqlite"
+    make_db(path, [1])
+    executor= QueryExecutor(path)
+    assert executor.execute("SELECT price FROM product").rows == [(1,)]
+    replacement= tmp_path / "new.sqlite"
+    make_db(replacement, [2])
+    os.replace(replacement, path)
+    assert executor.execute("SELECT price FROM product").rows == [(2,)]
+    executor.close()
+
+
+
+def test_normalize_sql_collapses_formatting_only():
+    assert normalize_sql("SELECT  *\n FROM product WHERE price < 5;") == normalize_sql("select * from product where price<5")
+    assert normalize_sql("SELECT * FROM product WHERE title = 'A  B'") != normalize_sql("SELECT * FROM product WHERE title = 'A B'")
+    assert normalize_sql("SELECT price - 1 FROM product") == normalize_sql("SELECT price-1 FROM product")
+
+
+def test_normalize_sql_drops_comments_before_collapsing():
+    commented= "SELECT * FROM product -- cheapest first\nWHERE price < 5"
+    assert normalize_sql(commented) == normalize_sql("SELECT * FROM product WHERE price < 5")
+    assert normalize_sql(commented) != normalize_sql("SELECT * FROM product")
+    assert normalize_sql("SELECT * /* it's */ FROM product") == normalize_sql("SELECT * FROM product")
+    assert normalize_sql("SELECT * FROM product WHERE title = '-- x'") != normalize_sql("SELECT * FROM product WHERE title = ''")
+
+
+def test_listeners_run_when_catalog_changes(executor):
+    calls= []
+    executor.add_listener(lambda: calls.append(1))
+    prices(executor)
+    prices(executor)
+    assert calls == []
+    conn= sqlite3.connect(executor.path)
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+    conn.close()
+    prices(executor)
+    assert calls == [1]
+
+
+def test_known_brands_follow_catalog_changes(tmp_path, monkeypatch):
+    sql= pytest.importorskip("sql")
+    path= tmp_path / "db.sqlite"
+    conn= sqlite3.connect(path)
+    conn.execute("CREATE TABLE product (brand_norm TEXT)")
+    conn.execute("INSERT INTO product VALUES ('nike')")
+    conn.commit()
+    executor= QueryExecutor(path, cache=ResultCache())
+    executor.add_listener(sql._known_brands.cache_clear)
+    monkeypatch.setattr(sql, "get_executor", lambda: executor)
+    sql._known_brands.cache_clear()
+    assert sql.known_brands() == ("nike",)
+    conn.execute("INSERT INTO product VALUES ('puma')")
+    conn.commit()
+    conn.close()
+    assert sql.known_brands() == ("nike", "puma")
+    sql._known_brands.cache_clear()
+    executor.close()
@@ -0,0 +1,17 @@
+from db import QueryResult
+from render import EMPTY_MESSAGE, renderer_for
+
+
+def render(columns, rows):
+    result= QueryResult(columns, rows)
+    return "".join(renderer_for(result)(result))
+
+
+def test_aggregate_over_no_rows_is_the_empty_reply():
+    assert render(("MIN(price)",), [(None,)]) == EMPTY_MESSAGE
+    assert render(("avg(discount)",), [(None,)]) == EMPTY_MESSAGE
+
+
+def test_aggregate_values():
+    assert render(("MIN(price)",), [(499.0,)]) == "The lowest price is Rs. 499.0."
+    assert render(("COUNT(*)",), [(0,)]) == "I found 0 matching products."
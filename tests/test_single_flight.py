@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+import pytest
+
+import llm
+from llm import AsyncSingleFlight, SingleFlight
+
+
+class FakeUpstream:
+    """Stands in for ``stream_chat``: yields ``chunks`` once ``release`` is set."""
+
+    def __init__(self, chunks=("a", "b", "c"), error=None):
+        self.chunks= chunks
+        self.error= error
+        self.release= threading.Event()
+        self.calls= 0
+        self.closed= threading.Event()
+
+    def __call__(self, client, stage, **params):
+        self.calls+= 1
+        try:
+            self.release.wait(5)
+            for chunk in self.chunks:
+                yield chunk
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.closed.set()
+
+
+PARAMS= {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake= FakeUpstream()
+    monkeypatch.setattr(llm, "stream_chat", fake)
+    return fake
+
+
+def test_joiners_share_the_leaders_stream(upstream):
+    flights= SingleFlight()
+    subscriptions= [flights.stream(None, "test", dict(PARAMS)) for _ in range(3)]
+    assert [s.leader for s, _ in subscriptions] == [True, False, False]
+    upstream.release.set()
+    assert ["".join(stream) for _, stream in subscriptions] == ["abc"] * 3
+    assert upstream.calls == 1
+    assert flights.stats() == {"started": 1, "joined": 2, "in_flight": 0}
+
+
+def test_late_joiner_replays_from_the_first_chunk(upstream):
+    flights= SingleFlight()
+    _, first= flights.stream(None, "test", dict(PARAMS))
+    upstream.release.set()
+    assert next(first) == "a"
+    _, late= flights.stream(None, "test", dict(PARAMS))
+    assert "".join(late) == "abc"
+    assert "".join(first) == "bc"
+
+
+def test_different_params_do_not_coalesce(upstream):
+    flights= SingleFlight()
+    flights.stream(None, "test", dict(PARAMS))
+    flights.stream(None, "test", dict(PARAMS, temperature=0.5))
+    assert flights.stats()["started"] == 2
+
+
+def test_early_detach_leaves_other_subscribers_running(upstream):
+    flights= SingleFlight()
+    _, leader= flights.stream(None, "test", dict(PARAMS))
+    _, joiner= flights.stream(None, "test", dict(PARAMS))
+    upstream.release.set()
+    assert next(joiner) == "a"
+    joiner.close()
+    assert "".join(leader) == "abc"
+
+
+def test_last_subscriber_leaving_closes_upstream(upstream):
+    upstream.chunks= ("a",) * 1000
+    flights= SingleFlight()
+    _, stream= flights.stream(None, "test", dict(PARAMS))
+    upstream.release.set()
+    next(stream)
+    stream.close()
+    assert upstream.closed.wait(5)
+    assert flights.stats()["in_flight"] == 0
+    # A new request starts a fresh stream instead of joining the abandoned one
+    subscription, _= flights.stream(None, "test", dict(PARAMS))
+    assert subscription.leader
+
+
+def test_upstream_error_reaches_every_subscriber(upstream):
+    upstream.chunks, upstream.error= ("a",), RuntimeError("upstream failed")
+    flights= SingleFlight()
+    streams= [flights.stream(None, "test", dict(PARAMS))[1] for _ in range(2)]
+    upstream.release.set()
+    for stream in streams:
+        assert next(stream) == "a"
+        with pytest.raises(RuntimeError, match="upstream failed"):
+            next(stream)
+
+
+def test_async_joiners_share_one_stream_and_see_errors(monkeypatch):
+    calls= []
+
+    async def fake_astream(client, stage, **params):
+        calls.append(stage)
+        await asyncio.sleep(0.01)
+        yield "a"
+        yield "b"
+        raise RuntimeError("upstream failed")
+
+    monkeypatch.setattr(llm, "astream_chat", fake_astream)
+
+    async def consume(stream):
+        chunks= []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+        except RuntimeError as e:
+            chunks.append(str(e))
+        return chunks
+
+    async def run():
+        flights= AsyncSingleFlight()
+        streams= [flights.stream(None, "test", dict(PARAMS))[1] for _ in range(3)]
+        return await asyncio.gather(*(consume(s) for s in streams)), flights.stats()
+
+    results, stats= asyncio.run(run())
+    assert results == [["a", "b", "upstream failed"]] * 3
+    assert calls == ["test"]
+    assert stats == {"started": 1, "joined": 2, "in_flight": 0}
@@ -0,0 +1,113 @@
+import pytest
+
+from sql_rules import parse_question
+
+
+BRANDS= ("nike", "puma", "hrx", "hrx by hrithik roshan", "red tape")
+
+
+def where(question):
+    spec= parse_question(question, BRANDS)
+    assert spec is not None, question
+    sql, params= spec.to_sql()
+    return sql.partition(" WHERE ")[2], params
+
+
+@pytest.mark.parametrize("question, clause, value", [
+    ("puma shoes under 3000 rupees", "price < ?", 3000),
+    ("nike below rs 2,500", "price < ?", 2500),
+    ("shoes less than ₹1500", "price < ?", 1500),
+    ("nike over 2000", "price > ?", 2000),
+    ("puma above 2.5k", "price > ?", 2500.0),
+    ("shoes more than 4000", "price > ?", 4000),
+    ("nike up to 3000", "price <= ?", 3000),
+    ("nike at most 3000", "price <= ?", 3000),
+    ("puma 3000 or less", "price <= ?", 3000),
+    ("puma at least 1500", "price >= ?", 1500),
+    ("nike 1500 or more", "price >= ?", 1500),
+    ("puma 2000 and above", "price >= ?", 2000),
+])
+def test_price_comparisons(question, clause, value):
+    sql, params= where(question)
+    assert sql == f"brand_norm IN (?) AND {clause}" or sql == clause
+    assert params[-1] == value
+
+
+def test_price_range_is_inclusive():
+    assert where("nike between 1000 and 2000") == ("brand_norm IN (?) AND price >= ? AND price <= ?", ("nike", 1000, 2000))
+
+
+def test_rating_and_rating_count_are_not_prices():
+    assert where("nike 4 stars and above") == ("brand_norm IN (?) AND avg_rating >= ?", ("nike", 4))
+    assert where("puma with more than 1000 ratings") == ("brand_norm IN (?) AND total_ratings > ?", ("puma", 1000))
+
+
+def test_brand_names_match_case_insensitively_as_whole_words():
+    assert where("Show me NIKE shoes") == ("brand_norm IN (?)", ("nike",))
+    assert where("Red Tape or Puma") == ("brand_norm IN (?, ?)", ("red tape", "puma"))
+
+
+def test_longest_brand_name_wins():
+    assert where("hrx by hrithik roshan shoes")[1] == ("hrx by hrithik roshan",)
+    assert where("hrx shoes")[1] == ("hrx",)
+
+
+def test_unrecognised_words_fall_back_to_llm():
+    assert parse_question("nike shoes for my grandmother's birthday", BRANDS) is None
+    assert parse_question("shoes", BRANDS) is None
+
+
+def fts_query(question):
+    spec= parse_question(question, BRANDS)
+    return None if spec is None else spec.to_sql()[1][len(spec.brands)]
+
+
+def test_title_terms_are_anded_by_default():
+    assert fts_query("red running shoes") == '"red" "running"'
+
+
+@pytest.mark.parametrize("question", ["running or walking shoes", "running shoes or walking shoes", "nike running or walking"])
+def test_title_terms_joined_by_or(question):
+    assert fts_query(question) == '"running" OR "walking"'
+
+
+def test_or_between_brands_does_not_join_terms():
+    assert where("nike or puma running shoes")[1] == ("nike", "puma", '"running"')
+
+
+@pytest.mark.parametrize("question", ["red or blue running shoes", "red nike or puma running"])
+def test_mixed_or_and_terms_fall_back_to_llm(question):
+    assert parse_question(question, BRANDS) is None
+
+
+@pytest.mark.parametrize("question", [
+    "nike shoes under 3000 or above 5000",
+    "puma with 4 stars and above or at least 30% off",
+    "nike under 3000 | above 5000",
+    "cheapest or best rated nike",
+])
+def test_or_between_filters_falls_back_to_llm(question):
+    assert parse_question(question, BRANDS) is None
+
+
+def test_or_inside_a_filter_phrase_is_not_a_disjunction():
+    assert where("nike 1500 or more with 4 stars or more") == (
+        "brand_norm IN (?) AND price >= ? AND avg_rating >= ?", ("nike", 1500, 4))
+
+
+@pytest.mark.parametrize("question, clause, value", [
+    ("shoes with average rating above 4", "avg_rating > ?", 4),
+    ("shoes rated over 4.2 stars", "avg_rating > ?", 4.2),
+    ("shoes with a rating of at least 4", "avg_rating >= ?", 4),
+    ("shoes with 4 stars and above", "avg_rating >= ?", 4),
+    ("shoes with more than 1000 ratings", "total_ratings > ?", 1000),
+    ("shoes with at least 1000 ratings", "total_ratings >= ?", 1000),
+    ("shoes with 1000+ reviews", "total_ratings >= ?", 1000),
+    ("shoes with more than 30% discount", "discount > ?", 0.3),
+    ("shoes with over 30% off", "discount > ?", 0.3),
+    ("shoes with at least 30% discount", "discount >= ?", 0.3),
+    ("shoes with 30% off or more", "discount >= ?", 0.3),
+    ("shoes with a discount of 30%", "discount >= ?", 0.3),
+])
+def test_other_field_comparisons(question, clause, value):
+    assert where(question) == (clause, (value,))
@@ -1,7 +1,12 @@
-import pandas as pd
+import csv
+import hashlib
 import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-import os
+from urllib.parse import parse_qs, urlparse
 
 # 1. SETUP PATHS CORRECTLY
 # Get the directory of the current script (web-scrapping)
@@ -14,10 +19,167 @@ db_folder = project_root / 'app' / 'resources'
 db_path = db_folder / 'ecommerce_data.db'
 csv_path = current_dir / 'ecommerce_data_final.csv'
 
+# Links are stored in the same canonical form the app renders them in
+sys.path.insert(0, str(project_root / 'app'))
+from serialize import canonical_link
+
 # 2. ENSURE DIRECTORY EXISTS
 # This prevents "unable to open database file" error
 db_folder.mkdir(parents=True, exist_ok=True)
 
+# Rows per executemany/transaction while streaming the feed
+CHUNK_SIZE = 50_000
+
+COLUMNS = ('product_link', 'title', 'brand', 'price', 'discount', 'avg_rating', 'total_ratings')
+UPDATABLE = COLUMNS + ('brand_norm',)
+
+
+def product_key(link):
+    """Stable product key: the Flipkart ``pid`` from the product link."""
+    pid = parse_qs(urlparse(link).query).get('pid')
+    if pid:
+        return pid[0]
+    # Links without a pid fall back to a hash of the path
+    return 'url_' + hashlib.sha1(urlparse(link).path.encode('utf-8')).hexdigest()[:16]
+
+
+def ensure_schema(conn):
+    """Create the product table, or migrate one from an older ingest.
+
+    Older databases lack ``brand_norm``/``product_key`` and may hold the same
+    product several times; duplicates are collapsed onto the latest row.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product (
+        product_link TEXT,
+        title TEXT,
+        brand TEXT,
+        price INTEGER,
+        discount FLOAT,
+        avg_rating FLOAT,
+        total_ratings INTEGER,
+        brand_norm TEXT,
+        product_key TEXT
+    );
+    ''')
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(product)")]
+    if 'brand_norm' not in columns:
+        cursor.execute("ALTER TABLE product ADD COLUMN brand_norm TEXT")
+    if 'product_key' not in columns:
+        cursor.execute("ALTER TABLE product ADD COLUMN product_key TEXT")
+        conn.create_function('product_key', 1, product_key, deterministic=True)
+        cursor.execute("UPDATE product SET product_key = product_key(product_link)")
+        cursor.execute('''
+        DELETE FROM product WHERE rowid NOT IN (
+            SELECT MAX(rowid) FROM product GROUP BY product_key
+        )
+        ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_product_key ON product(product_key)")
+    conn.commit()
+
+
+def build_indexes(conn):
+    """Add search columns, B-tree indexes and the FTS5 title/brand index.
+
+    Safe to run repeatedly and on databases created before these existed.
+    """
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(product)")]
+    if 'brand_norm' not in columns:
+        cursor.execute("ALTER TABLE product ADD COLUMN brand_norm TEXT")
+    # Scraped brands carry trailing spaces and mixed case ("CAMPUS ")
+    cursor.execute("UPDATE product SET brand_norm = LOWER(TRIM(brand)) WHERE brand_norm IS NOT LOWER(TRIM(brand))")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_brand_norm ON product(brand_norm)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_price ON product(price)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_discount ON product(discount)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_avg_rating ON product(avg_rating)")
+
+    # External-content FTS5 index over title and brand; porter stemming lets
+    # "sneaker" match "Sneakers" and "run" match "Running"
+    has_fts = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'"
+    ).fetchone()
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        title,
+        brand,
+        content='product',
+        content_rowid='rowid',
+        tokenize='porter unicode61'
+    );
+    ''')
+    # Triggers keep the index in step with upserts, so refreshes never
+    # need a full rebuild
+    cursor.executescript('''
+    CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, title, brand) VALUES (new.rowid, new.title, new.brand);
+    END;
+    CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, brand) VALUES ('delete', old.rowid, old.title, old.brand);
+    END;
+    CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF title, brand ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, brand) VALUES ('delete', old.rowid, old.title, old.brand);
+        INSERT INTO product_fts(rowid, title, brand) VALUES (new.rowid, new.title, new.brand);
+    END;
+    ''')
+    if not has_fts:
+        cursor.execute("INSERT INTO product_fts(product_fts) VALUES('rebuild')")
+    cursor.execute("ANALYZE")
+    conn.commit()
+
+
+def _number(value, cast):
+    value = value.strip()
+    return cast(value) if value else None
+
+
+def parse_rows(reader):
+    """Turn CSV dict rows into typed tuples in ``UPDATABLE`` + key order."""
+    for row in reader:
+        link = row['product_link']
+        yield (
+            canonical_link(link),
+            row['title'],
+            row['brand'],
+            _number(row['price'], int),
+            _number(row['discount'], float),
+            _number(row['avg_rating'], float),
+            _number(row['total_ratings'], int),
+            row['brand'].strip().lower(),
+            product_key(link),
+        )
+
+
+UPSERT_SQL = f'''
+INSERT INTO product ({', '.join(UPDATABLE)}, product_key)
+VALUES ({', '.join('?' * (len(UPDATABLE) + 1))})
+ON CONFLICT(product_key) DO UPDATE SET
+    {', '.join(f'{c} = excluded.{c}' for c in UPDATABLE)}
+WHERE {' OR '.join(f'product.{c} IS NOT excluded.{c}' for c in UPDATABLE)}
+'''
+
+
+@contextmanager
+def bulk_load(conn):
+    """WAL and ``synchronous=OFF`` for the duration of a load.
+
+    The file is put back in rollback-journal mode with full syncs even when
+    the load fails, so readers never find it left in the unsafe settings.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        yield
+    finally:
+        if conn.in_transaction:
+            # A failed chunk is rolled back, not committed by the mode switch
+            conn.rollback()
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute("PRAGMA journal_mode=DELETE")
+
+
 def insert_data(db_path, csv_path):
     # Check if CSV exists before proceeding
     if not csv_path.exists():
@@ -25,35 +187,41 @@ def insert_data(db_path, csv_path):
         return
 
     # 3. KEEP LOGIC INSIDE THE CONNECTION CONTEXT
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # Create Table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS product (
-            product_link TEXT,
-            title TEXT,
-            brand TEXT,
-            price INTEGER,
-            discount FLOAT,
-            avg_rating FLOAT,
-            total_ratings INTEGER
-        );
-        ''')
-        # The 'with' context usually handles commits, but explicit commit for DDL is fine
-        conn.commit()
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_schema(conn)
+        build_indexes(conn)
+
+        with bulk_load(conn):
+            before_rows = conn.execute("SELECT COUNT(*) FROM product").fetchone()[0]
+
+            # Stream the feed in chunks; unchanged rows hit the WHERE clause and are not rewritten
+            print("Upserting CSV into database...")
+            start = time.perf_counter()
+            processed = changed = 0
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                rows = parse_rows(csv.DictReader(f))
+                while chunk := list(islice(rows, CHUNK_SIZE)):
+                    # The feed repeats some products; keep the last row per key
+                    chunk = list({row[-1]: row for row in chunk}.values())
+                    with conn:
+                        changed += conn.executemany(UPSERT_SQL, chunk).rowcount
+                    processed += len(chunk)
+            elapsed = time.perf_counter() - start
 
-        # Read CSV
-        print("Reading CSV...")
-        df = pd.read_csv(csv_path)
-        print(df.head())
+            inserted = conn.execute("SELECT COUNT(*) FROM product").fetchone()[0] - before_rows
+            if changed:
+                # Ingest generation number; readers use it to drop stale caches
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.execute("ANALYZE")
 
-        # Insert Data
-        print("Inserting data into database...")
-        df.to_sql('product', conn, if_exists='append', index=False)
-        
-        print("Data inserted successfully!")
-    # Connection closes automatically here
+        print(f"Processed {processed} rows in {elapsed:.2f}s "
+              f"({processed / elapsed if elapsed else 0:,.0f} rows/sec): "
+              f"{inserted} inserted, {max(changed - inserted, 0)} updated, "
+              f"{processed - changed} unchanged")
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    insert_data(db_path, csv_path)
\ No newline at end of file
+    insert_data(db_path, csv_path)